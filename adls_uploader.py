@@ -0,0 +1,379 @@
+# adls_uploader.py
+import base64
+import csv
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+
+from azure_con import ACCOUNT_NAME, FILESYSTEM, _require_azure, blob_service, datalake_service
+
+MB = 1024 * 1024
+UPLOAD_PATTERNS = ("*.csv", "*.json", "*.jsonl", "*.parquet", "*.chatz", "*.chatz.idx")
+
+# <channel>_chat_log.csv and its rotated <channel>_chat_log.<YYYYmmdd-HHMMSS>.csv (TwitchChatReader),
+# or the same names as .chatz archives (ChatArchiveLogWriter) with their .chatz.idx indexes
+_LIVE_LOG = re.compile(r"^(?P<streamer>.+)_chat_log(?:\.(?P<date>\d{8})-\d{6}(?:-\d+)?)?\.(?:csv|chatz(?:\.idx)?)$")
+# <file_prefix>_<vod_id>.<ext> (TwitchVODChatLogger.stream_multiple_vods; the prefix is the user id)
+_VOD_EXPORT = re.compile(r"^(?P<streamer>.+)_(?P<vod_id>\d+)\.\w+(?:\.idx)?$")
+
+
+def _first_message_date(path: Path) -> Optional[str]:
+    """
+    Local date (YYYY-MM-DD) of the first message in an active live log or archive,
+    or None while it has none. Unlike the mtime, this doesn't move as the file grows.
+    """
+    name = path.name
+    if name.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8", errors="replace") as f:
+            rows = csv.reader(f)
+            next(rows, None)  # header
+            row = next(rows, None)
+        stamp = row[0][:10] if row else ""
+        return stamp if re.fullmatch(r"\d{4}-\d{2}-\d{2}", stamp) else None
+    from chat_archive import load_index
+    archive = path.with_name(name[:-len(".idx")]) if name.endswith(".idx") else path
+    times = [entry[3] for entry in load_index(archive) if entry[3] == entry[3]]
+    return time.strftime("%Y-%m-%d", time.localtime(times[0])) if times else None
+
+
+def _block_id(offset: int) -> str:
+    # Block ids must all have the same length within a blob; naming them by offset makes resumes line up
+    return base64.b64encode(f"{offset:016d}".encode()).decode()
+
+
+class _DfsTarget:
+    """One ADLS Gen2 file: parallel append_data at distinct offsets, flush_data commits a prefix"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def properties(self):
+        azure = _require_azure()
+        try:
+            props = self.client.get_file_properties()
+        except azure.core.exceptions.ResourceNotFoundError:
+            return None
+        return props.size, dict(props.metadata or {})
+
+    def start(self, offset: int):
+        if offset == 0:
+            self.client.create_file()  # new, or truncates what was there
+
+    def append(self, offset: int, data: bytes):
+        self.client.append_data(data, offset=offset, length=len(data))
+
+    def commit(self, length: int, metadata: Optional[dict] = None):
+        self.client.flush_data(length)
+        if metadata:
+            self.client.set_metadata(metadata)
+
+
+class _BlobTarget:
+    """
+    One block blob: parallel stage_block, commit_block_list commits a prefix. Used
+    for Azurite (no DFS endpoint) and works against the Blob endpoint of an ADLS
+    Gen2 account too.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._offsets = []
+
+    def properties(self):
+        azure = _require_azure()
+        try:
+            props = self.client.get_blob_properties()
+        except azure.core.exceptions.ResourceNotFoundError:
+            return None
+        return props.size, dict(props.metadata or {})
+
+    def start(self, offset: int):
+        self._offsets = []
+        if offset:
+            committed, _ = self.client.get_block_list("committed")
+            self._offsets = [int(base64.b64decode(b.id)) for b in committed]
+
+    def append(self, offset: int, data: bytes):
+        self.client.stage_block(_block_id(offset), data, length=len(data))
+        self._offsets.append(offset)  # list.append is atomic under the GIL
+
+    def commit(self, length: int, metadata: Optional[dict] = None):
+        azure = _require_azure()
+        blocks = [azure.storage.blob.BlobBlock(block_id=_block_id(o)) for o in sorted(set(self._offsets)) if o < length]
+        self.client.commit_block_list(blocks, metadata=metadata)
+
+
+class UploadJournal:
+    """
+    SQLite record of each local file's last upload: size, mtime and sha256 when it
+    finished, and how many bytes (with their sha256) are committed remotely, so an
+    interrupted upload resumes and a growing log only sends its new tail.
+    """
+
+    def __init__(self, path="chat_logs/.uploads.sqlite3"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS uploads (
+                    local_path TEXT PRIMARY KEY,
+                    remote_path TEXT NOT NULL,
+                    size INTEGER,
+                    mtime_ns INTEGER,
+                    sha256 TEXT,
+                    committed INTEGER NOT NULL DEFAULT 0,
+                    committed_sha256 TEXT,
+                    updated_at REAL NOT NULL
+                )""")
+
+    def get(self, local_path) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM uploads WHERE local_path = ?", (str(local_path),)).fetchone()
+        return dict(row) if row else None
+
+    def update(self, local_path, **fields):
+        fields["updated_at"] = time.time()
+        columns = ", ".join(fields)
+        placeholders = ", ".join("?" for _ in fields)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in fields)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO uploads (local_path, {columns}) VALUES (?, {placeholders}) "
+                f"ON CONFLICT(local_path) DO UPDATE SET {updates}",
+                (str(local_path), *fields.values()))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ADLSUploader:
+    """
+    Copy chat_logs output into ADLS Gen2 with parallel chunked uploads.
+
+    Files land under `<prefix>/streamer=<name>/date=<YYYY-MM-DD>/<file name>`,
+    dated by the rotation stamp in the name, the first message of a still-open
+    live log, or otherwise the file's mtime.
+    Each file is sent as `chunk_size` pieces appended concurrently by `workers`
+    threads (up to `file_workers` files at a time) and committed every
+    `checkpoint_chunks` chunks, so an interrupted upload resumes from the last
+    commit. A file whose remote copy already has the same size and sha256
+    (stored as metadata) is skipped; a log that only grew gets just its new tail.
+
+    Credentials are non-interactive (see azure_con.get_credential). With a
+    connection string that has no DFS endpoint, such as the Azurite emulator's,
+    uploads go through the Blob API (stage/commit blocks) instead.
+    """
+
+    def __init__(self, account_name: str = ACCOUNT_NAME, filesystem: str = FILESYSTEM, credential=None,
+                 connection_string: Optional[str] = None, api: str = "auto", prefix: str = "chat_logs",
+                 chunk_size: int = 4 * MB, workers: int = 8, file_workers: int = 4, checkpoint_chunks: int = 8,
+                 journal: Optional[UploadJournal] = None, streamers: Optional[Dict[str, str]] = None,
+                 patterns=UPLOAD_PATTERNS):
+        if api == "auto":
+            api = "blob" if connection_string and "DfsEndpoint" not in connection_string else "dfs"
+        if api not in ("dfs", "blob"):
+            raise ValueError(f"Unknown api {api!r}; use 'auto', 'dfs' or 'blob'")
+        self.api = api
+        self.account_name = account_name
+        self.filesystem = filesystem
+        self.credential = credential
+        self.connection_string = connection_string
+        self.prefix = prefix.strip("/")
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.file_workers = file_workers
+        self.checkpoint_chunks = checkpoint_chunks
+        self.journal = journal or UploadJournal()
+        self.streamers = streamers or {}  # e.g. {user_id: login} for VOD exports named by user id
+        self.patterns = patterns
+        self._chunks = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="adls-chunk")
+        self._container = None
+        self._container_lock = threading.Lock()
+
+    # -- clients -------------------------------------------------------
+    def _client_kwargs(self) -> dict:
+        """Connection pool big enough for every concurrent append"""
+        import requests
+        from requests.adapters import HTTPAdapter
+        from azure.core.pipeline.transport import RequestsTransport
+        session = requests.Session()
+        pool = self.workers * self.file_workers
+        adapter = HTTPAdapter(pool_connections=pool, pool_maxsize=pool)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return {"transport": RequestsTransport(session=session, session_owner=True)}
+
+    def _filesystem(self):
+        azure = _require_azure()
+        with self._container_lock:
+            if self._container is None:
+                if self.api == "dfs":
+                    service = datalake_service(self.account_name, self.credential, self.connection_string,
+                                               **self._client_kwargs())
+                    container = service.get_file_system_client(self.filesystem)
+                    create = container.create_file_system
+                else:
+                    service = blob_service(self.connection_string, self.account_name, self.credential,
+                                           **self._client_kwargs())
+                    container = service.get_container_client(self.filesystem)
+                    create = container.create_container
+                try:
+                    create()
+                except azure.core.exceptions.ResourceExistsError:
+                    pass
+                self._container = container
+            return self._container
+
+    def _target(self, remote_path: str):
+        container = self._filesystem()
+        if self.api == "dfs":
+            return _DfsTarget(container.get_file_client(remote_path))
+        return _BlobTarget(container.get_blob_client(remote_path))
+
+    # -- layout --------------------------------------------------------
+    def remote_path(self, path) -> str:
+        """Hive-style `<prefix>/streamer=<name>/date=<YYYY-MM-DD>/<file name>` for a chat_logs file."""
+        path = Path(path)
+        match = _LIVE_LOG.match(path.name) or _VOD_EXPORT.match(path.name)
+        streamer = match.group("streamer") if match else "unknown"
+        streamer = self.streamers.get(streamer, streamer)
+        stamp = match.groupdict().get("date") if match else None
+        if stamp:
+            date = f"{stamp[:4]}-{stamp[4:6]}-{stamp[6:]}"
+        else:
+            # The active log keeps growing: an mtime partition would move it (and re-upload it) every day
+            date = _first_message_date(path) if match and match.re is _LIVE_LOG else None
+            date = date or datetime.fromtimestamp(path.stat().st_mtime, tz=timezone.utc).strftime("%Y-%m-%d")
+        return f"{self.prefix}/streamer={streamer}/date={date}/{path.name}"
+
+    # -- upload --------------------------------------------------------
+    @staticmethod
+    def _hash(path, upto: int, mark: Optional[int] = None):
+        """sha256 of the first `upto` bytes, plus the hex digest of the first `mark` bytes on the way"""
+        hasher = hashlib.sha256()
+        marked = hasher.hexdigest() if mark == 0 else None
+        done = 0
+        with open(path, "rb") as f:
+            while done < upto:
+                limit = mark if mark is not None and done < mark < upto else upto
+                block = f.read(min(MB, limit - done))
+                if not block:
+                    break
+                hasher.update(block)
+                done += len(block)
+                if done == mark:
+                    marked = hasher.hexdigest()
+        return hasher, marked
+
+    def upload_file(self, path) -> dict:
+        """Upload one file (or skip / resume it). Returns {path, remote_path, status, bytes, seconds}."""
+        path = Path(path)
+        stat = path.stat()
+        size, mtime_ns = stat.st_size, stat.st_mtime_ns
+        remote_path = self.remote_path(path)
+        target = self._target(remote_path)
+        started = time.perf_counter()
+
+        entry = self.journal.get(path)
+        if entry and entry["remote_path"] != remote_path:
+            entry = None
+        unchanged = entry is not None and entry["size"] == size and entry["mtime_ns"] == mtime_ns
+        committed = entry["committed"] if entry else 0
+        if unchanged and entry["sha256"]:
+            sha256, prefix_ok = entry["sha256"], True
+        else:
+            hasher, prefix_sha = self._hash(path, size, committed if entry else None)
+            sha256 = hasher.hexdigest()
+            prefix_ok = unchanged or (entry is not None and prefix_sha == entry["committed_sha256"])
+
+        remote = target.properties()
+        if remote and remote[0] == size and remote[1].get("sha256") == sha256:
+            self.journal.update(path, remote_path=remote_path, size=size, mtime_ns=mtime_ns, sha256=sha256,
+                                committed=size, committed_sha256=sha256)
+            return {"path": str(path), "remote_path": remote_path, "status": "skipped", "bytes": 0,
+                    "seconds": time.perf_counter() - started}
+
+        # Resume from the last commit if the remote file is exactly that and our prefix still matches
+        start = committed if (remote and prefix_ok and 0 < committed <= size and remote[0] == committed) else 0
+        self.journal.update(path, remote_path=remote_path, size=size, mtime_ns=mtime_ns, sha256=None,
+                            committed=start, committed_sha256=entry["committed_sha256"] if start else None)
+        target.start(start)
+        hasher, _ = self._hash(path, start)
+        segment_bytes = self.chunk_size * self.checkpoint_chunks
+        with open(path, "rb") as f:
+            f.seek(start)
+            offset = start
+            while True:
+                end = min(size, offset + segment_bytes)
+                futures = []
+                while offset < end:
+                    data = f.read(min(self.chunk_size, end - offset))
+                    if not data:
+                        raise RuntimeError(f"{path} shrank while uploading")
+                    hasher.update(data)
+                    futures.append(self._chunks.submit(target.append, offset, data))
+                    offset += len(data)
+                for future in futures:
+                    future.result()
+                final = offset >= size
+                target.commit(offset, {"sha256": hasher.hexdigest(), "source_size": str(size)} if final else None)
+                self.journal.update(path, remote_path=remote_path, committed=offset,
+                                    committed_sha256=hasher.hexdigest(),
+                                    **({"sha256": hasher.hexdigest()} if final else {}))
+                if final:
+                    break
+
+        seconds = time.perf_counter() - started
+        sent = size - start
+        print(f"Uploaded {path} -> {remote_path} ({sent / MB:.1f} MB{' resumed' if start else ''}, "
+              f"{sent / MB / max(seconds, 1e-9):.1f} MB/s)")
+        return {"path": str(path), "remote_path": remote_path, "status": "resumed" if start else "uploaded",
+                "bytes": sent, "seconds": seconds}
+
+    def upload_directory(self, directory="chat_logs") -> dict:
+        """
+        Upload every matching file under `directory`, `file_workers` at a time.
+        Returns counts, bytes sent, throughput (MB/s) and {path: error} for failures.
+        """
+        directory = Path(directory)
+        paths = sorted({p for pattern in self.patterns for p in directory.rglob(pattern) if p.is_file()})
+        started = time.perf_counter()
+        summary = {"uploaded": 0, "resumed": 0, "skipped": 0, "bytes": 0, "failed": {}}
+        with ThreadPoolExecutor(max_workers=max(1, self.file_workers)) as pool:
+            futures = {pool.submit(self.upload_file, p): p for p in paths}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    summary["failed"][str(futures[future])] = f"{type(e).__name__}: {e}"
+                    print(f"Upload of {futures[future]} failed: {e}")
+                    continue
+                summary[result["status"]] += 1
+                summary["bytes"] += result["bytes"]
+        summary["seconds"] = time.perf_counter() - started
+        summary["mb_per_s"] = summary["bytes"] / MB / summary["seconds"] if summary["seconds"] else 0.0
+        print(f"ADLS upload: {summary['uploaded']} uploaded, {summary['resumed']} resumed, "
+              f"{summary['skipped']} unchanged, {len(summary['failed'])} failed; "
+              f"{summary['bytes'] / MB:.1f} MB at {summary['mb_per_s']:.1f} MB/s")
+        return summary
+
+    def close(self):
+        self._chunks.shutdown(wait=True)
+        self.journal.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
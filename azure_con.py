@@ -1,14 +1,72 @@
-# check_adls_interactive.py
-from azure.identity import InteractiveBrowserCredential
-from azure.storage.filedatalake import DataLakeServiceClient
+# azure_con.py
+import argparse
+import os
+
+ACCOUNT_NAME = os.getenv("ADLS_ACCOUNT_NAME", "<streamalyticsdatalake>")  # e.g., streamalyticsdatalake
+FILESYSTEM = os.getenv("ADLS_FILESYSTEM", "twitch-vod-chat")                # your container name
+
+# Well-known Azurite development account (Blob endpoint only: Azurite has no DFS endpoint)
+AZURITE_CONNECTION_STRING = (
+    "DefaultEndpointsProtocol=http;AccountName=devstoreaccount1;"
+    "AccountKey=Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq/K1SZFPTOtr/KBHBeksoGMGw==;"
+    "BlobEndpoint=http://127.0.0.1:10000/devstoreaccount1;"
+)
+
+
+def _require_azure():
+    try:
+        import azure.core.exceptions
+        import azure.identity
+        import azure.storage.blob
+        import azure.storage.filedatalake
+    except ImportError as e:
+        raise ImportError("ADLS access requires the Azure SDK: "
+                          "pip install azure-identity azure-storage-file-datalake azure-storage-blob") from e
+    return azure
+
+
+def get_credential(interactive: bool = False):
+    """
+    Credential for the lake. Non-interactive by default: an account key in
+    AZURE_STORAGE_KEY, else DefaultAzureCredential (service principal from
+    AZURE_CLIENT_ID / AZURE_TENANT_ID / AZURE_CLIENT_SECRET, managed identity,
+    Azure CLI login, ...). interactive=True opens a browser sign-in instead.
+    """
+    azure = _require_azure()
+    if interactive:
+        return azure.identity.InteractiveBrowserCredential()
+    if os.getenv("AZURE_STORAGE_KEY"):
+        return os.getenv("AZURE_STORAGE_KEY")
+    return azure.identity.DefaultAzureCredential(exclude_interactive_browser_credential=True)
+
+
+def datalake_service(account_name: str = ACCOUNT_NAME, credential=None, connection_string: str = None, **kwargs):
+    """DataLakeServiceClient from a connection string or on the account's DFS endpoint."""
+    azure = _require_azure()
+    if connection_string:
+        return azure.storage.filedatalake.DataLakeServiceClient.from_connection_string(connection_string, **kwargs)
+    return azure.storage.filedatalake.DataLakeServiceClient(
+        f"https://{account_name}.dfs.core.windows.net", credential=credential or get_credential(), **kwargs)
+
+
+def blob_service(connection_string: str = None, account_name: str = ACCOUNT_NAME, credential=None, **kwargs):
+    """BlobServiceClient from a connection string (e.g. Azurite) or the account's Blob endpoint."""
+    azure = _require_azure()
+    connection_string = connection_string or os.getenv("AZURE_STORAGE_CONNECTION_STRING")
+    if connection_string:
+        return azure.storage.blob.BlobServiceClient.from_connection_string(connection_string, **kwargs)
+    return azure.storage.blob.BlobServiceClient(
+        f"https://{account_name}.blob.core.windows.net", credential=credential or get_credential(), **kwargs)
 
-ACCOUNT_NAME = "<streamalyticsdatalake>"        # e.g., streamalyticsdatalake
-FILESYSTEM = "twitch-vod-chat"                      # your container name
 
 def main():
-    print("Opening browser to sign in...")
-    cred = InteractiveBrowserCredential()  # forces a browser login prompt
-    svc  = DataLakeServiceClient(f"https://{ACCOUNT_NAME}.dfs.core.windows.net", credential=cred)
+    parser = argparse.ArgumentParser(description="List the lake's filesystems and top-level paths")
+    parser.add_argument("--interactive", action="store_true", help="sign in through the browser")
+    args = parser.parse_args()
+
+    if args.interactive:
+        print("Opening browser to sign in...")
+    svc = datalake_service(credential=get_credential(interactive=args.interactive))
 
     print("Listing file systems (containers):")
     for fs in svc.list_file_systems():
@@ -24,4 +82,4 @@ def main():
         print(" -", ("dir" if p.is_directory else "file"), p.name)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,159 @@
+# benchmarks/bench_adls_upload.py
+"""
+ADLSUploader throughput on a synthetic chat_logs directory: cold upload with 1
+vs N chunk workers, an unchanged rerun (all skipped), a resume after an injected
+failure, and a grown live log sending only its tail.
+
+By default the lake is an in-process stand-in with per-request latency and
+per-connection bandwidth; pass --azurite to upload to a running Azurite
+emulator instead (npx azurite-blob, Blob API).
+
+    python -m benchmarks.bench_adls_upload --files 40 --mb 8
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from adls_uploader import MB, ADLSUploader, UploadJournal
+from azure_con import AZURITE_CONNECTION_STRING
+
+
+class StubLake:
+    """Files as {path: (committed bytes, metadata)} plus staged chunks; sleeps like a remote store"""
+
+    def __init__(self, latency=0.02, mb_per_s=40.0):
+        self.latency = latency
+        self.mb_per_s = mb_per_s  # per connection
+        self.files = {}
+        self.staged = {}
+        self.fail_after = None  # raise after this many more appends (simulated network drop)
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def _request(self, size=0):
+        with self._lock:
+            self.requests += 1
+            if self.fail_after is not None and size:
+                if self.fail_after <= 0:
+                    raise ConnectionError("simulated connection reset")
+                self.fail_after -= 1
+        time.sleep(self.latency + size / MB / self.mb_per_s)
+
+
+class StubTarget:
+    """Same interface as adls_uploader._DfsTarget, against a StubLake"""
+
+    def __init__(self, lake, path):
+        self.lake = lake
+        self.path = path
+
+    def properties(self):
+        self.lake._request()
+        if self.path not in self.lake.files:
+            return None
+        data, metadata = self.lake.files[self.path]
+        return len(data), dict(metadata)
+
+    def start(self, offset):
+        if offset == 0:
+            self.lake._request()
+            self.lake.files[self.path] = (b"", {})
+            self.lake.staged[self.path] = {}
+
+    def append(self, offset, data):
+        self.lake._request(len(data))
+        self.lake.staged.setdefault(self.path, {})[offset] = data
+
+    def commit(self, length, metadata=None):
+        self.lake._request()
+        data, _ = self.lake.files.get(self.path, (b"", {}))
+        staged = self.lake.staged.get(self.path, {})
+        while len(data) < length:
+            data += staged.pop(len(data))
+        self.lake.files[self.path] = (data[:length], metadata or {})
+
+
+def stub_uploader(lake, **kwargs):
+    uploader = ADLSUploader(**kwargs)
+    uploader._target = lambda remote_path: StubTarget(lake, remote_path)
+    return uploader
+
+
+def make_logs(directory, files, mb, seed=0):
+    """Live-log and VOD-export style files of about `mb` MB each"""
+    r = random.Random(seed)
+    words = ["PogChamp", "KEKW", "LUL", "gg", "clip", "insane", "what", "a", "play", "OMEGALUL"]
+    paths = []
+    for i in range(files):
+        name = f"channel{i % 5}_chat_log.2024010{1 + i % 9}-120000.csv" if i % 2 else f"1234{i % 3}_{2000000 + i}.jsonl"
+        path = Path(directory) / name
+        line = (",".join(r.choices(words, k=12)) + "\n").encode()
+        path.write_bytes(line * (int(mb * MB) // len(line)))
+        paths.append(path)
+    return paths
+
+
+def run(label, uploader, directory):
+    summary = uploader.upload_directory(directory)
+    print(f"{label}: {summary['uploaded']} uploaded, {summary['resumed']} resumed, {summary['skipped']} skipped, "
+          f"{len(summary['failed'])} failed; {summary['bytes'] / MB:.0f} MB in {summary['seconds']:.2f}s "
+          f"= {summary['mb_per_s']:.1f} MB/s")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--mb", type=float, default=8.0, help="size of each file")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--chunk-mb", type=float, default=4.0)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--mb-per-s", type=float, default=40.0, help="stub bandwidth per connection")
+    parser.add_argument("--azurite", action="store_true", help="upload to Azurite at 127.0.0.1:10000")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        logs = Path(tmp) / "chat_logs"
+        logs.mkdir()
+        paths = make_logs(logs, args.files, args.mb)
+        lake = StubLake(args.latency, args.mb_per_s)
+
+        def uploader(workers, journal_name, file_workers=4):
+            options = dict(chunk_size=int(args.chunk_mb * MB), workers=workers, file_workers=file_workers,
+                           journal=UploadJournal(Path(tmp) / journal_name), checkpoint_chunks=2)
+            if args.azurite:
+                return ADLSUploader(connection_string=AZURITE_CONNECTION_STRING,
+                                    filesystem=f"bench-{journal_name.split('.')[0]}", **options)
+            return stub_uploader(lake, **options)
+
+        lake_name = "Azurite" if args.azurite else \
+            f"stub lake: {args.latency * 1000:.0f} ms/request, {args.mb_per_s:.0f} MB/s per connection"
+        print(f"{len(paths)} files, {sum(p.stat().st_size for p in paths) / MB:.0f} MB ({lake_name})")
+        with uploader(1, "serial.sqlite3", file_workers=1) as serial:
+            run("serial (1 file, 1 chunk at a time)", serial, logs)
+        lake.files.clear()
+        with uploader(args.workers, "parallel.sqlite3") as parallel:
+            run(f"parallel ({args.workers} chunk workers, 4 files)", parallel, logs)
+            run("rerun, nothing changed", parallel, logs)
+
+            # Drop the connection part-way through a big file, then run again
+            big = logs / "9999_3000000.jsonl"
+            big.write_bytes(paths[0].read_bytes() * 8)
+            if not args.azurite:
+                lake.fail_after = 9
+            run("interrupted upload", parallel, logs)
+            lake.fail_after = None
+            run("rerun after interruption", parallel, logs)
+
+            # A live log that kept growing: only the new tail goes up
+            with open(paths[1], "ab") as f:
+                f.write(os.urandom(MB))
+            run("grown live log", parallel, logs)
+
+
+if __name__ == "__main__":
+    main()
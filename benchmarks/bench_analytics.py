@@ -0,0 +1,80 @@
+# benchmarks/bench_analytics.py
+"""
+Per-message cost and memory of ChatAnalytics on synthetic live chat, and the
+accuracy of its unique-chatter estimate.
+
+    python -m benchmarks.bench_analytics --messages 500000 --channels 10 --rate 10000
+"""
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.fake_irc import synthetic_line
+from chat_analytics import ChatAnalytics
+from irc_parser import parse_line
+
+
+def message_data(channels, count, rate, start):
+    """Parsed message_data dicts as TwitchChatReader builds them, `rate` per simulated second"""
+    for n in range(count):
+        msg = parse_line(synthetic_line(channels[n % len(channels)], n))
+        yield {
+            'username': msg.tags.get('display-name') or msg.nick,
+            'message': msg.trailing.strip(),
+            'channel': msg.channel,
+            'timestamp': start + n / rate,
+            'tags': msg.tags,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=500_000)
+    parser.add_argument("--channels", type=int, default=10)
+    parser.add_argument("--rate", type=int, default=10_000, help="simulated messages/sec across all channels")
+    args = parser.parse_args()
+    channels = [f"channel{i}" for i in range(args.channels)]
+    start = 1_700_000_000.0
+
+    items = list(message_data(channels, args.messages, args.rate, start))
+    analytics = ChatAnalytics()
+    began = time.perf_counter()
+    for data in items:
+        analytics.observe(data)
+    elapsed = time.perf_counter() - began
+
+    # Memory on a second pass: tracemalloc slows every allocation, so it is kept out of the timing
+    tracemalloc.start()
+    measured = ChatAnalytics()
+    for i, data in enumerate(items):
+        measured.observe(data)
+        if i == len(items) // 10:
+            early_mb = tracemalloc.get_traced_memory()[0] / 1e6
+    final_mb = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+
+    per_msg_us = elapsed / len(items) * 1e6
+    print(f"observe: {per_msg_us:.1f} us/message ({len(items) / elapsed:,.0f} msg/s, "
+          f"{args.rate * per_msg_us / 1e4:.1f}% of a core at {args.rate} msg/s)")
+    print(f"memory: {early_mb:.1f} MB after 10% of the stream, {final_mb:.1f} MB at the end")
+
+    now = items[-1]['timestamp']
+    began = time.perf_counter()
+    snapshot = analytics.snapshot(now=now)
+    print(f"snapshot of {len(snapshot)} channels x {len(analytics.windows)} windows: "
+          f"{(time.perf_counter() - began) * 1000:.1f} ms")
+
+    channel = channels[0]
+    window = max(analytics.windows)
+    summary = snapshot[channel][window]
+    recent = [d for d in items if d['channel'] == channel and now - window < d['timestamp'] <= now + 1]
+    exact = len({d['username'].lower() for d in recent})
+    print(f"{channel}, last {window}s: {summary['messages']} messages ({len(recent)} exact), "
+          f"{summary['unique_chatters']} unique chatters ({exact} exact), "
+          f"subscriber ratio {summary['subscriber_ratio']:.2f}")
+    print(f"  top terms: {summary['top_terms'][:5]}")
+    print(f"  all-time: {snapshot[channel]['total']}")
+
+
+if __name__ == "__main__":
+    main()
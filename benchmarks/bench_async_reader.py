@@ -0,0 +1,56 @@
+# benchmarks/bench_async_reader.py
+"""
+Throughput and memory of AsyncTwitchChatReader against the local fake IRC server.
+
+    python -m benchmarks.bench_async_reader --channels 10 100 1000 --seconds 10
+"""
+import argparse
+import tempfile
+import time
+
+from benchmarks.fake_irc import fake_irc_server
+from benchmarks.resources import rss_mb
+from twitch_chat_async import AsyncTwitchChatReader
+
+
+class CountingReader(AsyncTwitchChatReader):
+    """Reader that counts messages instead of printing them"""
+    received = 0
+
+    def handle_chat_message(self, message_data):
+        self.received += 1
+        self.log_writer.write(message_data['channel'],
+                              [message_data['timestamp'], message_data['username'], message_data['message'],
+                               message_data['channel'], '', ''])
+
+
+def run(channel_count, seconds, per_connection):
+    with fake_irc_server() as (host, port), tempfile.TemporaryDirectory() as log_dir:
+        reader = CountingReader([f"bench{i}" for i in range(channel_count)], log_directory=log_dir,
+                                channels_per_connection=per_connection, join_rate=10 ** 6)
+        reader.server, reader.port = host, port
+        reader.start_listening()
+        time.sleep(1)  # let every connection join before measuring
+        start_count, start = reader.received, time.perf_counter()
+        time.sleep(seconds)
+        received, elapsed = reader.received - start_count, time.perf_counter() - start
+        rss = rss_mb()
+        reader.stop_listening()
+    return {"channels": channel_count, "msgs_per_sec": received / elapsed, "rss_mb": rss}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--channels", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--per-connection", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'channels':>10} {'msgs/sec':>12} {'rss MB':>10}")
+    for n in args.channels:
+        r = run(n, args.seconds, args.per_connection)
+        print(f"{r['channels']:>10} {r['msgs_per_sec']:>12,.0f} {r['rss_mb']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
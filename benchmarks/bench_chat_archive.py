@@ -0,0 +1,128 @@
+# benchmarks/bench_chat_archive.py
+"""
+Chat archives (.chatz) against the plain formats: size on disk next to pretty
+JSON, JSON Lines and CSV, time-range reads through the frame index against a
+full JSON Lines scan, compaction, and the live ChatArchiveLogWriter against
+the CSV ChatLogWriter.
+
+    python -m benchmarks.bench_chat_archive --messages 500000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic_vod import synthetic_raw_messages
+from chat_archive import ChatArchiveLogWriter, ChatArchiveReader, compact_archives, compact_directory
+from chat_log_writer import ChatLogWriter
+from chat_sinks import open_sink
+from twitch_vod_chat_logger import TwitchVODChatLogger
+
+LIVE_HEADER = ["timestamp", "username", "message", "channel", "tags"]
+
+
+def size_mb(*paths):
+    return sum(os.path.getsize(p) for p in paths if os.path.exists(p)) / 1e6
+
+
+def jsonl_range(path, start, end):
+    """The baseline: scan the whole JSON Lines file for a time range"""
+    with open(path, encoding="utf-8") as f:
+        return [r for r in map(json.loads, f) if start <= r["vod_time_s"] < end]
+
+
+def live_rows(count, channels, seed=0):
+    r = random.Random(seed)
+    for n in range(count):
+        channel = f"channel{n % channels}"
+        yield channel, [time.strftime('%Y-%m-%d %H:%M:%S'), f"viewer{r.randrange(5000)}",
+                        " ".join(r.choices(["PogChamp", "KEKW", "LUL", "gg", "clip", "what", "a", "play"], k=6)),
+                        channel, str({"id": f"{r.getrandbits(64):016x}", "color": "#1E90FF"})]
+
+
+def run_live(writer, rows):
+    start = time.perf_counter()
+    writer.start()
+    for channel, row in rows:
+        writer.write(channel, row, time.time())
+    writer.close()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--window", type=float, default=60.0, help="seconds of VOD time per range read")
+    parser.add_argument("--reads", type=int, default=50)
+    parser.add_argument("--channels", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp)
+        logger = TwitchVODChatLogger(output_dir=tmp)
+        logger.chat_data = [logger._extract_message(m) for m in synthetic_raw_messages(args.messages)]
+
+        print(f"{'format':<26} {'size MB':>9} {'vs json':>8} {'save s':>8}")
+        sizes = {}
+        for label, file_name, save_to in [("json (pretty)", "vod.json", "json"), ("jsonl", "vod.jsonl", "jsonl"),
+                                          ("csv", "vod.csv", "csv"), ("chatz (level 9)", "vod.chatz", "chatz")]:
+            start = time.perf_counter()
+            logger.save(file_name=file_name, save_to=save_to)
+            seconds = time.perf_counter() - start
+            sizes[label] = size_mb(out / file_name, out / f"{file_name}.idx")
+            print(f"{label:<26} {sizes[label]:>9.1f} {sizes['json (pretty)'] / sizes[label]:>7.1f}x {seconds:>8.2f}")
+
+        # What a resumable download writes: level 3, a frame per 1000-message checkpoint
+        start = time.perf_counter()
+        streamed = out / "streamed.chatz"
+        with open_sink(streamed, "chatz") as sink:
+            for n, record in enumerate(logger.chat_data, 1):
+                sink.write(record)
+                if n % 1000 == 0:
+                    sink.flush()
+        seconds = time.perf_counter() - start
+        streamed_mb = size_mb(streamed, f"{streamed}.idx")
+        print(f"{'chatz (streamed, level 3)':<26} {streamed_mb:>9.1f} {sizes['json (pretty)'] / streamed_mb:>7.1f}x "
+              f"{seconds:>8.2f}")
+        start = time.perf_counter()
+        compact_archives([streamed], out / "compacted.chatz")
+        compacted_mb = size_mb(out / "compacted.chatz", out / "compacted.chatz.idx")
+        print(f"{'  compacted (level 9)':<26} {compacted_mb:>9.1f} {sizes['json (pretty)'] / compacted_mb:>7.1f}x "
+              f"{time.perf_counter() - start:>8.2f}")
+
+        # Random time-range reads
+        r = random.Random(1)
+        duration = logger.chat_data[-1]["vod_time_s"]
+        windows = [(t, t + args.window) for t in (r.uniform(0, duration - args.window) for _ in range(args.reads))]
+        reader = ChatArchiveReader(out / "vod.chatz")
+        start = time.perf_counter()
+        hits = sum(len(list(reader.read(a, b))) for a, b in windows)
+        archive_ms = (time.perf_counter() - start) * 1000 / args.reads
+        start = time.perf_counter()
+        scanned = sum(len(jsonl_range(out / "vod.jsonl", a, b)) for a, b in windows[:5])
+        scan_ms = (time.perf_counter() - start) * 1000 / 5
+        assert scanned == sum(len(list(reader.read(a, b))) for a, b in windows[:5])
+        print(f"\n{args.window:.0f}s range read ({hits / args.reads:.0f} messages): chatz {archive_ms:.1f} ms "
+              f"({reader.frames_read / (args.reads + 5):.1f} of {len(reader.frames)} frames decompressed), "
+              f"jsonl full scan {scan_ms:.0f} ms")
+
+        # Live logging: same rows through the CSV writer and the archive writer
+        rows = list(live_rows(args.messages, args.channels))
+        csv_s = run_live(ChatLogWriter(out / "live_csv", LIVE_HEADER), rows)
+        archive_s = run_live(ChatArchiveLogWriter(out / "live_chatz", LIVE_HEADER, rotate_bytes=64 * 1024), rows)
+        csv_mb = size_mb(*(out / "live_csv").iterdir())
+        archive_mb = size_mb(*(out / "live_chatz").iterdir())
+        print(f"\nlive logging, {len(rows)} rows over {args.channels} channels:")
+        print(f"  csv   {csv_mb:7.1f} MB in {csv_s:.2f}s ({len(rows) / csv_s:,.0f} rows/s)")
+        print(f"  chatz {archive_mb:7.1f} MB in {archive_s:.2f}s ({len(rows) / archive_s:,.0f} rows/s), "
+              f"{len(list((out / 'live_chatz').glob('*.chatz')))} files after rotation")
+        compact_directory(out / "live_chatz", keep_today=False)
+        print(f"  compacted per channel and day: {size_mb(*(out / 'live_chatz').iterdir()):.1f} MB "
+              f"({csv_mb / size_mb(*(out / 'live_chatz').iterdir()):.1f}x smaller than csv)")
+
+
+if __name__ == "__main__":
+    main()
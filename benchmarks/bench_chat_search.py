@@ -0,0 +1,92 @@
+# benchmarks/bench_chat_search.py
+"""
+ChatSearchIndex on synthetic VOD chat: embedding and indexing throughput, a
+second ingest of the same messages (all skipped by id), query latency, and HNSW
+recall@k against the exact flat scan.
+
+    python -m benchmarks.bench_chat_search --messages 200000 --queries 200
+"""
+import argparse
+import random
+import tempfile
+import time
+
+from benchmarks.fake_irc import WORDS
+from chat_search import ChatSearchIndex
+
+# Topic words mixed into the emote-heavy chat so queries have something to find
+TOPICS = ["boss", "fight", "dragon", "raid", "loot", "speedrun", "world", "record", "chat", "music", "song",
+          "stream", "sniper", "headshot", "clutch", "ranked", "lobby", "patch", "nerf", "buff", "build",
+          "donation", "subs", "hype", "train", "lag", "server", "crash", "mod", "ban", "timeout", "vod"]
+
+
+def records(count, seed=0):
+    """VOD chat records shaped like TwitchVODChatLogger's, with varied wording"""
+    r = random.Random(seed)
+    vocabulary = WORDS + TOPICS + [f"{w}{i}" for w in TOPICS for i in range(40)]
+    for n in range(count):
+        yield {
+            "id": f"msg-{n:09d}",
+            "timestamp_ms": 1_700_000_000_000 + n * 100,
+            "vod_time_s": n / 10,
+            "author": f"viewer{r.randrange(20_000)}",
+            "message": " ".join(r.choices(vocabulary, k=r.randint(2, 12))),
+        }
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def run(backend, messages, queries, k):
+    with tempfile.TemporaryDirectory() as directory:
+        index = ChatSearchIndex(directory, backend=backend)
+        start = time.perf_counter()
+        added = index.add_vod_messages(records(messages), vod_id="1")
+        ingest = time.perf_counter() - start
+        stats = index.stats()
+        start = time.perf_counter()
+        again = index.add_vod_messages(records(messages), vod_id="1")
+        dedupe = time.perf_counter() - start
+
+        r = random.Random(1)
+        texts = [" ".join(r.choices(TOPICS, k=3)) for _ in range(queries)]
+        index.search(texts[0], k=k)  # warm-up
+        latencies, results = [], []
+        for text in texts:
+            start = time.perf_counter()
+            results.append([hit["id"] for hit in index.search(text, k=k)])
+            latencies.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        filtered = index.search(texts[0], k=k, author="viewer7")
+        filtered_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        index.close()
+        save = time.perf_counter() - start
+
+    print(f"{backend}: {added} messages in {ingest:.1f}s ({added / ingest:,.0f} msg/s overall; "
+          f"embedding {stats['embed_per_sec']:,.0f} msg/s, indexing {stats['index_per_sec']:,.0f} msg/s), "
+          f"save {save:.2f}s")
+    print(f"  re-ingest: {again} added, {messages} skipped as duplicates in {dedupe:.1f}s")
+    print(f"  query k={k}: p50 {percentile(latencies, 50):.2f} ms, p99 {percentile(latencies, 99):.2f} ms; "
+          f"author-filtered query {filtered_ms:.1f} ms ({len(filtered)} hits)")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--backends", nargs="+", default=["hnsw", "flat"])
+    args = parser.parse_args()
+
+    found = {backend: run(backend, args.messages, args.queries, args.k) for backend in args.backends}
+    if "hnsw" in found and "flat" in found:
+        overlap = [len(set(a) & set(b)) / max(len(b), 1) for a, b in zip(found["hnsw"], found["flat"])]
+        print(f"hnsw recall@{args.k} vs exact: {sum(overlap) / len(overlap):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/bench_chat_store.py
+"""
+Ingest rate and query latency of ChatStore on a large synthetic dataset,
+compared with scanning the same chat from JSONL files.
+
+    python -m benchmarks.bench_chat_store --messages 10000000 --vods 200
+"""
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.synthetic_vod import synthetic_raw_messages
+from chat_sinks import JsonLinesSink
+from chat_store import ChatStore
+from twitch_vod_chat_logger import TwitchVODChatLogger
+
+
+def vod_messages(v, count):
+    """One synthetic VOD: chat over the same 4 hours as every other, with its own message ids"""
+    for raw in synthetic_raw_messages(count):
+        raw["message_id"] = f"{v}-{raw['message_id']}"
+        yield raw
+
+
+def timed_ms(fn, repeat=20):
+    """Median wall time of fn() in ms, and its last result"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=10_000_000)
+    parser.add_argument("--vods", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=5000, help="rows per insert transaction")
+    parser.add_argument("--jsonl-vods", type=int, default=20, help="VODs also written as JSONL for the scan baseline")
+    parser.add_argument("--bulk", action="store_true", help="load inside ChatStore.bulk_load()")
+    parser.add_argument("--dir", default=None, help="where to build the database (default: a temp dir)")
+    args = parser.parse_args()
+    per_vod = args.messages // args.vods
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as out_dir:
+        store = ChatStore(os.path.join(out_dir, "chat.sqlite3"))
+        extract = TwitchVODChatLogger._extract_message
+        start = time.perf_counter()
+        with (store.bulk_load() if args.bulk else contextlib.nullcontext()):
+            for v in range(args.vods):
+                vod_id = str(2_000_000_000 + v)
+                batch = []
+                for raw in vod_messages(v, per_vod):
+                    batch.append(extract(None, raw))
+                    if len(batch) >= args.batch:
+                        store.insert_vod_messages(vod_id, batch, channel=f"channel{v % 20}")
+                        batch = []
+                if batch:
+                    store.insert_vod_messages(vod_id, batch, channel=f"channel{v % 20}")
+        elapsed = time.perf_counter() - start
+        total = per_vod * args.vods
+        size_mb = sum(os.path.getsize(os.path.join(out_dir, f)) for f in os.listdir(out_dir)) / 1e6
+        print(f"ingest{' (bulk_load)' if args.bulk else ''}: {total} messages in {elapsed:.1f}s "
+              f"({total / elapsed:,.0f} msg/s), {size_mb:.0f} MB on disk")
+
+        vod = str(2_000_000_000 + args.vods // 2)
+        queries = {
+            "minute 42 of one VOD": lambda: store.vod_window(vod, 42 * 60, 43 * 60),
+            "all messages by one author": lambda: store.messages_by_author("viewer7"),
+            "one channel, 10 minutes": lambda: store.channel_window("channel3", 1_700_000_000_000, 1_700_000_600_000),
+            "count of one VOD": lambda: store.count(vod_id=vod),
+        }
+        for name, query in queries.items():
+            ms, result = timed_ms(query)
+            rows = result if isinstance(result, int) else len(result)
+            print(f"  {name}: {ms:.2f} ms ({rows} rows)")
+
+        # Baseline: the same "author across VODs" question answered from flat JSONL files
+        paths = []
+        for v in range(min(args.jsonl_vods, args.vods)):
+            path = os.path.join(out_dir, f"{v}.jsonl")
+            with JsonLinesSink(path) as sink:
+                sink.write_many(extract(None, raw) for raw in vod_messages(v, per_vod))
+            paths.append(path)
+
+        def scan():
+            found = 0
+            for path in paths:
+                with open(path, encoding="utf-8") as f:
+                    for line in f:
+                        if json.loads(line)["author"] == "viewer7":
+                            found += 1
+            return found
+
+        ms, found = timed_ms(scan, repeat=1)
+        print(f"  JSONL scan for one author over {len(paths)} VODs: {ms:.0f} ms ({found} rows) "
+              f"-> ~{ms * args.vods / len(paths) / 1000:.1f}s for all {args.vods}")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
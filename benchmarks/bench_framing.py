@@ -0,0 +1,79 @@
+# benchmarks/bench_framing.py
+"""
+Replay a high-traffic IRC stream through the old str-buffer framing and LineFramer.
+
+    python -m benchmarks.bench_framing --capture raid.log --chunk 1024
+    python -m benchmarks.bench_framing --lines 500000        # synthetic stream
+
+A capture is a file of raw IRC lines, one per line (CRLF is re-added).
+"""
+import argparse
+import time
+
+from benchmarks.fake_irc import synthetic_line
+from irc_framing import LineFramer
+
+
+def load_stream(capture, lines):
+    if capture:
+        with open(capture, 'rb') as f:
+            raw = [line.rstrip(b"\r\n") for line in f if line.strip()]
+    else:
+        raw = [synthetic_line(f"chan{n % 50}", n).encode() for n in range(lines)]
+    return b"".join(line + b"\r\n" for line in raw), len(raw)
+
+
+def str_buffer_framing(chunks):
+    """The original TwitchChatReader.listen framing"""
+    count = 0
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk.decode('utf-8', errors='ignore')
+        while '\r\n' in buffer:
+            line, buffer = buffer.split('\r\n', 1)
+            count += 1
+    return count
+
+
+def framer_framing(chunks, buffer_size):
+    framer = LineFramer(buffer_size)
+    count = 0
+    for chunk in chunks:
+        framer.feed(chunk)
+        for _ in framer.lines():
+            count += 1
+    return count, framer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--capture", help="file of raw IRC lines to replay")
+    parser.add_argument("--lines", type=int, default=200000, help="synthetic lines if no capture")
+    parser.add_argument("--chunk", type=int, default=1024, help="bytes per recv() in the old reader")
+    parser.add_argument("--buffer", type=int, default=65536, help="LineFramer receive buffer size")
+    args = parser.parse_args()
+
+    stream, total = load_stream(args.capture, args.lines)
+    print(f"Replaying {total:,} lines ({len(stream) / 1e6:.1f} MB)")
+
+    # The old framing at its own recv size, and at the large size where split() goes quadratic.
+    for size in (args.chunk, args.buffer):
+        old_chunks = [stream[i:i + size] for i in range(0, len(stream), size)]
+        start = time.perf_counter()
+        old_count = str_buffer_framing(old_chunks)
+        old_elapsed = time.perf_counter() - start
+        print(f"str buffer   recv={size:>6}  syscalls={len(old_chunks):>8,}  "
+              f"{old_count / old_elapsed:>12,.0f} lines/sec")
+
+    new_chunks = [stream[i:i + args.buffer] for i in range(0, len(stream), args.buffer)]
+    start = time.perf_counter()
+    new_count, framer = framer_framing(new_chunks, args.buffer)
+    new_elapsed = time.perf_counter() - start
+    print(f"LineFramer   recv={args.buffer:>6}  syscalls={framer.syscalls:>8,}  "
+          f"{new_count / new_elapsed:>12,.0f} lines/sec")
+    assert old_count == new_count == total, (old_count, new_count, total)
+    print(f"Speedup vs str buffer at the same recv size: {old_elapsed / new_elapsed:.1f}x  {framer.stats()}")
+
+
+if __name__ == "__main__":
+    main()
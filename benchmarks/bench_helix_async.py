@@ -0,0 +1,62 @@
+# benchmarks/bench_helix_async.py
+"""
+List every archive for a roster of streamers against the stub Helix server,
+serially with TwitchCon.get_vod_ids and concurrently with
+AsyncTwitchCon.stream_videos.
+
+    python -m benchmarks.bench_helix_async --users 200 --videos 250 --latency 0.03
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from benchmarks.stub_helix import StubHelix, stub_client_class
+from helix_scheduler import RateLimitScheduler
+from token_cache import TokenCache
+from twitch_client import TwitchCon
+from twitch_client_async import AsyncTwitchCon
+
+
+async def stream_all(client_cls, logins, token_cache, concurrency):
+    async with client_cls(client_id="bench", client_secret="bench", token_cache=token_cache,
+                          scheduler=RateLimitScheduler()) as helix:
+        start = time.perf_counter()
+        first = None
+        count = 0
+        async for _login, _video in helix.stream_videos(logins, concurrency=concurrency):
+            count += 1
+            if first is None:
+                first = time.perf_counter() - start
+        return count, time.perf_counter() - start, first
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--videos", type=int, default=250, help="videos per user (100 per page)")
+    parser.add_argument("--latency", type=float, default=0.03)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--skip-sync", action="store_true")
+    args = parser.parse_args()
+    logins = [f"streamer{i}" for i in range(args.users)]
+
+    stub = StubHelix(rate_limit=100000, latency=args.latency, videos_per_user=args.videos)
+    with stub as base_url, tempfile.TemporaryDirectory() as tmp:
+        token_cache = TokenCache(os.path.join(tmp, "token.json"))
+        if not args.skip_sync:
+            client = stub_client_class(TwitchCon, base_url)(client_id="bench", client_secret="bench",
+                                                             token_cache=token_cache,
+                                                             scheduler=RateLimitScheduler())
+            start = time.perf_counter()
+            count = sum(len(client.get_vod_ids(login)) for login in logins)
+            print(f"sync get_vod_ids: {count} VOD ids in {time.perf_counter() - start:.2f}s")
+
+        count, elapsed, first = asyncio.run(stream_all(stub_client_class(AsyncTwitchCon, base_url), logins,
+                                                       token_cache, args.concurrency))
+        print(f"async stream_videos: {count} videos in {elapsed:.2f}s, first after {first * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
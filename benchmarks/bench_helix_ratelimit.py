@@ -0,0 +1,52 @@
+# benchmarks/bench_helix_ratelimit.py
+"""
+Push many concurrent Helix lookups through TwitchCon against the stub server
+and report how the rate-limit scheduler paced them.
+
+    python -m benchmarks.bench_helix_ratelimit --requests 300 --limit 100 --window 10 --threads 16
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.stub_helix import StubHelix, stub_client_class
+from helix_scheduler import RateLimitScheduler
+from token_cache import TokenCache
+from twitch_client import TwitchCon
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--limit", type=int, default=100, help="stub bucket size")
+    parser.add_argument("--window", type=float, default=10.0, help="seconds to refill the stub bucket")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.01)
+    args = parser.parse_args()
+
+    stub = StubHelix(rate_limit=args.limit, window=args.window, latency=args.latency)
+    with stub as base_url, tempfile.TemporaryDirectory() as tmp:
+        client_cls = stub_client_class(TwitchCon, base_url)
+        client = client_cls(client_id="bench", client_secret="bench",
+                            token_cache=TokenCache(os.path.join(tmp, "token.json")),
+                            scheduler=RateLimitScheduler())
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.threads) as pool:
+            results = list(pool.map(lambda i: client._helix_get("users", params={"login": f"user{i}"}).status_code,
+                                    range(args.requests)))
+        elapsed = time.perf_counter() - start
+
+    print(f"{len(results)} requests in {elapsed:.2f}s ({len(results) / elapsed:.1f} req/s), "
+          f"all 200: {all(r == 200 for r in results)}")
+    print(f"Server: {stub.requests} received, {stub.throttled} answered 429")
+    print(f"Scheduler: {client.scheduler.metrics()}")
+    for endpoint, stats in client.request_stats.items():
+        print(f"  {endpoint}: {stats['count']} calls, avg {stats['total_ms'] / stats['count']:.1f} ms, "
+              f"max {stats['max_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
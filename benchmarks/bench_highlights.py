@@ -0,0 +1,77 @@
+# benchmarks/bench_highlights.py
+"""
+Highlight detection speed on synthetic VOD chat with planted spikes, for one
+large VOD in memory and for a directory of VOD exports (serial vs process pool).
+
+    python -m benchmarks.bench_highlights --messages 500000 --vods 16
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.fake_irc import WORDS
+from highlight_detector import HighlightDetector, detect_directory, load_vod_chat
+
+SPIKE_WORDS = ["KEKW", "LUL", "Clip it", "no way", "POGGERS", "OMEGALUL"]
+
+
+def synthetic_vod(messages, duration_s=4 * 3600, spikes=8, seed=0):
+    """(times, texts, spike_times): steady chat plus `spikes` 30-second bursts of reactions"""
+    rng = np.random.default_rng(seed)
+    spike_times = np.sort(rng.uniform(600, duration_s - 600, spikes))
+    burst = messages // 10
+    times = np.concatenate((rng.uniform(0, duration_s, messages - burst),
+                            (spike_times[rng.integers(0, spikes, burst)] + rng.exponential(8, burst))))
+    times.sort()
+    r = random.Random(seed)
+    texts = [" ".join(r.choices(WORDS, k=4)) for _ in range(messages - burst)] + \
+            [r.choice(SPIKE_WORDS) for _ in range(burst)]
+    r.shuffle(texts)
+    return times, texts, spike_times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=500_000)
+    parser.add_argument("--vods", type=int, default=16)
+    parser.add_argument("--vod-messages", type=int, default=100_000, help="messages per VOD file in the batch run")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    detector = HighlightDetector()
+    times, texts, spike_times = synthetic_vod(args.messages)
+    detector.detect(times[:1000], texts[:1000])  # warm up
+    start = time.perf_counter()
+    highlights = detector.detect(times, texts)
+    elapsed = time.perf_counter() - start
+    found = sum(any(h["start_s"] <= t <= h["end_s"] + 30 for h in highlights) for t in spike_times)
+    print(f"detect: {args.messages} messages in {elapsed * 1000:.0f} ms, "
+          f"{found}/{len(spike_times)} planted spikes in the top {len(highlights)}")
+    for h in highlights[:3]:
+        print(f"  {h['start_s']:.0f}-{h['end_s']:.0f}s score {h['score']} {h['top_keywords'][:3]}")
+
+    with tempfile.TemporaryDirectory() as chat_dir:
+        for v in range(args.vods):
+            t, m, _ = synthetic_vod(args.vod_messages, seed=v)
+            with open(os.path.join(chat_dir, f"1234_{v}.jsonl"), "w", encoding="utf-8") as f:
+                for vod_time, message in zip(t.tolist(), m):
+                    f.write(json.dumps({"vod_time_s": vod_time, "message": message}) + "\n")
+
+        start = time.perf_counter()
+        for name in sorted(os.listdir(chat_dir)):
+            detector.detect(*load_vod_chat(os.path.join(chat_dir, name)))
+        serial = time.perf_counter() - start
+        start = time.perf_counter()
+        results = detect_directory(chat_dir, detector, workers=args.workers)
+        pooled = time.perf_counter() - start
+        print(f"{len(results)} VOD files of {args.vod_messages} messages: serial {serial:.2f}s, "
+              f"{args.workers} processes {pooled:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
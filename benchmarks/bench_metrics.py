@@ -0,0 +1,71 @@
+# benchmarks/bench_metrics.py
+"""
+Per-line cost of the reader's hot path (_handle_line -> handle_chat_message)
+with console printing on and off, and with ReaderMetrics at different sampling
+rates, so the metrics layer can be left on in production.
+
+    python -m benchmarks.bench_metrics --lines 300000
+"""
+import argparse
+import contextlib
+import os
+import tempfile
+import time
+
+from benchmarks.fake_irc import synthetic_line
+from reader_metrics import ReaderMetrics
+from twitch_chat_streamer import TwitchChatReader
+
+
+class NullLogWriter:
+    """Stands in for ChatLogWriter so only the reader thread's work is timed"""
+
+    def start(self):
+        return self
+
+    def write(self, channel, row):
+        pass
+
+    def close(self):
+        pass
+
+
+def run(lines, print_messages, metrics, log_dir):
+    reader = TwitchChatReader(["bench"], log_directory=log_dir, log_writer=NullLogWriter(), metrics=metrics,
+                              print_messages=print_messages)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        for line in lines:
+            reader._handle_line(line, "bench")
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=300_000)
+    args = parser.parse_args()
+    lines = [synthetic_line("bench", n) for n in range(args.lines)]
+
+    variants = [
+        ("print every message", True, None),
+        ("no printing", False, None),
+        ("no printing + metrics, 1/16 timed", False, 16),
+        ("no printing + metrics, every line timed", False, 1),
+    ]
+    with tempfile.TemporaryDirectory() as log_dir:
+        print(f"{'reader':<42} {'lines/sec':>12} {'us/line':>8}")
+        baseline = None
+        for label, print_messages, sample_every in variants:
+            metrics = ReaderMetrics(sample_every=sample_every) if sample_every else None
+            seconds = min(run(lines, print_messages, metrics, log_dir) for _ in range(3))
+            per_line = seconds / len(lines) * 1e6
+            note = ""
+            if baseline is None and not print_messages:
+                baseline = per_line
+            elif baseline is not None:
+                note = f"  ({per_line / baseline - 1:+.1%} vs no printing)"
+            print(f"{label:<42} {len(lines) / seconds:>12,.0f} {per_line:>8.2f}{note}")
+
+
+if __name__ == "__main__":
+    main()
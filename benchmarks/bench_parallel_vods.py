@@ -0,0 +1,43 @@
+# benchmarks/bench_parallel_vods.py
+"""
+Wall time of stream_multiple_vods at different worker counts, using a fake
+ChatDownloader that sleeps to simulate network-bound downloads. One VOD is set
+up to fail to show the rest of the batch still completes.
+
+    python -m benchmarks.bench_parallel_vods --vods 32 --delay 0.5 --workers 1 4 16
+"""
+import argparse
+import tempfile
+import time
+
+from benchmarks.synthetic_vod import FakeChatDownloader
+from twitch_vod_chat_logger import TwitchVODChatLogger
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vods", type=int, default=32)
+    parser.add_argument("--messages", type=int, default=2_000)
+    parser.add_argument("--delay", type=float, default=0.5)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--format", default="jsonl")
+    args = parser.parse_args()
+
+    vod_ids = [str(1000 + i) for i in range(args.vods)]
+    fake = lambda: FakeChatDownloader(args.messages, delay=args.delay, fail_on={vod_ids[-1]})
+
+    rows = []
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as out_dir:
+            logger = TwitchVODChatLogger(output_dir=out_dir, chat_downloader=fake)
+            start = time.perf_counter()
+            result = logger.stream_multiple_vods(vod_ids, file_prefix="bench", save_to=args.format, workers=workers)
+            rows.append((workers, time.perf_counter() - start, len(result["saved"]), len(result["failed"])))
+
+    print(f"\n{'workers':>8} {'seconds':>8} {'saved':>6} {'failed':>6}")
+    for workers, seconds, saved, failed in rows:
+        print(f"{workers:>8} {seconds:>8.2f} {saved:>6} {failed:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/bench_pipeline.py
+"""
+CPU time the reader thread spends per line (_handle_line -> handle_chat_message)
+when the handlers run inline and when they run through a ChatPipeline. A
+deliberately slow extra handler stands in for a consumer that can't keep up.
+Run it once for each overflow policy. "block" shows backpressure reaching the
+reader; "drop_oldest" and "sample" keep the reader fast and count the drops.
+
+    python -m benchmarks.bench_pipeline --lines 200000 --slow-us 20
+"""
+import argparse
+import contextlib
+import os
+import tempfile
+import time
+
+from benchmarks.fake_irc import synthetic_line
+from chat_analytics import ChatAnalytics
+from chat_pipeline import OVERFLOW_POLICIES, ChatPipeline
+from twitch_chat_streamer import TwitchChatReader
+
+
+def slow_handler(per_message_s):
+    def slow(batch):
+        time.sleep(per_message_s * len(batch))  # sleeping releases the GIL like real I/O would
+    return slow
+
+
+def run(lines, log_dir, pipeline=None, slow_s=0.0, overflow="block"):
+    reader = TwitchChatReader(["bench"], log_directory=log_dir, analytics=ChatAnalytics(), print_messages=False,
+                              pipeline=pipeline)
+    if pipeline is not None and slow_s:
+        pipeline.register(slow_handler(slow_s), name="slow", max_queue=5000,
+                          overflow=overflow)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start, cpu_start = time.perf_counter(), time.thread_time()
+        for line in lines:
+            reader._handle_line(line, "bench")
+        reader_cpu = time.thread_time() - cpu_start  # the reader thread's own CPU, not the workers'
+        reader_wall = time.perf_counter() - start  # includes waiting on a full "block" queue
+
+        reader.disconnect()  # drains the pipeline and the log writer
+        total_seconds = time.perf_counter() - start
+    stats = pipeline.stats().get("slow", {}) if pipeline is not None else {}
+    return reader_cpu, reader_wall, total_seconds, stats.get("dropped", 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--slow-us", type=float, default=20.0, help="slow handler cost per message (us)")
+    args = parser.parse_args()
+    lines = [synthetic_line("bench", n) for n in range(args.lines)]
+
+    print(f"{'handlers':<38} {'reader cpu us/line':>18} {'reader s':>9} {'drained s':>10} {'slow drops':>11}")
+    variants = [("inline (log + analytics)", None, 0.0, "block"),
+                ("pipeline (log + analytics)", True, 0.0, "block")]
+    variants += [(f"pipeline + slow handler ({policy})", True, args.slow_us / 1e6, policy)
+                 for policy in OVERFLOW_POLICIES]
+    with tempfile.TemporaryDirectory() as log_dir:
+        for label, piped, slow_s, overflow in variants:
+            pipeline = ChatPipeline(args.workers) if piped else None
+            cpu, wall, total, dropped = run(lines, log_dir, pipeline, slow_s, overflow)
+            print(f"{label:<38} {cpu / len(lines) * 1e6:>18.2f} {wall:>9.2f} {total:>10.2f} "
+                  f"{dropped if slow_s else '-':>11}")
+
+if __name__ == "__main__":
+    main()
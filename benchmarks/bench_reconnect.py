@@ -0,0 +1,79 @@
+# benchmarks/bench_reconnect.py
+"""
+Recovery of the threaded and async readers from connection failures: the fake
+IRC server drops each connection, sends RECONNECT, or stalls (no data and no
+PONG) a few seconds after it joins. Reports reconnects, recorded gaps, total
+and worst-case gap time, and the share of the run spent receiving chat.
+
+    python -m benchmarks.bench_reconnect --seconds 10 --after 2
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.fake_irc import fake_irc_server
+from irc_reconnect import read_gaps
+from reader_metrics import ReaderMetrics
+from twitch_chat_async import AsyncTwitchChatReader
+from twitch_chat_streamer import TwitchChatReader
+
+
+class CountingReader(TwitchChatReader):
+    received = 0
+
+    def handle_chat_message(self, message_data):
+        self.received += 1
+
+
+class CountingAsyncReader(AsyncTwitchChatReader):
+    received = 0
+
+    def handle_chat_message(self, message_data):
+        self.received += 1
+
+
+MODES = {"drop": "drop_after", "reconnect": "reconnect_after", "stall": "stall_after"}
+
+
+def run(reader_class, failure, args):
+    channels = [f"bench{i}" for i in range(args.channels)]
+    with fake_irc_server(rate=args.rate, **{MODES[failure]: args.after}) as (host, port), \
+            tempfile.TemporaryDirectory() as log_dir:
+        metrics = ReaderMetrics()
+        reader = reader_class(channels, log_directory=log_dir, metrics=metrics, print_messages=False,
+                              ping_interval=args.ping_interval, pong_timeout=args.pong_timeout,
+                              reconnect_delay=args.reconnect_delay)
+        reader.server, reader.port = host, port
+        reader.start_listening()
+        time.sleep(args.seconds)
+        reader.stop_listening()
+        gaps = read_gaps(os.path.join(log_dir, "gaps.csv"))
+    seconds = [g["seconds"] for g in gaps]
+    return reader.received, metrics.reconnects.value, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--channels", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--after", type=float, default=2, help="seconds after joining that a connection fails")
+    parser.add_argument("--rate", type=int, default=2000, help="fake IRC msgs/sec per connection")
+    parser.add_argument("--ping-interval", type=float, default=1.0)
+    parser.add_argument("--pong-timeout", type=float, default=1.0)
+    parser.add_argument("--reconnect-delay", type=float, default=0.5)
+    args = parser.parse_args()
+
+    print(f"{'reader':<24} {'failure':<10} {'msgs':>8} {'reconn':>7} {'gaps':>5} {'gap s':>7} "
+          f"{'max gap s':>9} {'up %':>6}")
+    for label, reader_class in (("TwitchChatReader", CountingReader), ("AsyncTwitchChatReader", CountingAsyncReader)):
+        for failure in MODES:
+            received, reconnects, gaps = run(reader_class, failure, args)
+            # The threaded reader logs one gap per channel connection, the async one per channel
+            down = sum(gaps) / max(1, args.channels)
+            print(f"{label:<24} {failure:<10} {received:>8,} {reconnects:>7} {len(gaps):>5} {sum(gaps):>7.2f} "
+                  f"{max(gaps, default=0):>9.2f} {100 * (1 - down / args.seconds):>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/bench_sharded_ingest.py
+"""
+Ingest throughput of IngestSupervisor with 1..N worker processes against the
+local fake IRC server, next to a single in-process TwitchChatReader. The
+server replays a pre-built capture so generating traffic stays cheap; scaling
+is bounded by the cores available (the server and the writer need one too).
+
+    python -m benchmarks.bench_sharded_ingest --workers 1 2 4 --channels 64
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.fake_irc import fake_irc_server, synthetic_line
+from ingest_supervisor import IngestSupervisor
+from twitch_chat_streamer import TwitchChatReader
+
+
+class CountingReader(TwitchChatReader):
+    """The single-process baseline: parse and count, no printing or logging"""
+    received = 0
+
+    def handle_chat_message(self, message_data):
+        self.received += 1
+
+
+def measure(counter, warmup, seconds):
+    time.sleep(warmup)  # let every channel join before measuring
+    start_count, start = counter(), time.perf_counter()
+    time.sleep(seconds)
+    return (counter() - start_count) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--channels", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--write", action="store_true", help="write CSV logs in the supervisor instead of counting")
+    args = parser.parse_args()
+
+    channels = [f"bench{i}" for i in range(args.channels)]
+    with tempfile.TemporaryDirectory() as tmp:
+        capture = os.path.join(tmp, "capture.txt")
+        with open(capture, "w", encoding="utf-8") as f:
+            f.writelines(synthetic_line(channels[n % len(channels)], n) + "\n" for n in range(20_000))
+
+        print(f"{args.channels} channels, {os.cpu_count()} CPUs")
+        print(f"{'reader':<28} {'msgs/sec':>12}")
+        with fake_irc_server(replay_file=capture) as (host, port):
+            reader = CountingReader(channels, log_directory=os.path.join(tmp, "single"))
+            reader.server, reader.port = host, port
+            reader.start_listening()
+            rate = measure(lambda: reader.received, 1, args.seconds)
+            reader.stop_listening()
+            print(f"{'TwitchChatReader (1 process)':<28} {rate:>12,.0f}")
+
+            for workers in args.workers:
+                handler = None if args.write else (lambda message_data: None)
+                supervisor = IngestSupervisor(channels, workers=workers, log_directory=os.path.join(tmp, f"w{workers}"),
+                                              handler=handler, server=host, port=port).start()
+                rate = measure(lambda: supervisor.received, 2, args.seconds)
+                supervisor.stop()
+                print(f"{f'IngestSupervisor x{workers}':<28} {rate:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
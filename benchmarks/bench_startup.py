@@ -0,0 +1,80 @@
+# benchmarks/bench_startup.py
+"""
+Cold-start cost of each CLI subcommand: wall time of a fresh interpreter doing
+that command's imports (and building its client where that used to hit the
+network), plus the total import time and the slowest modules reported by
+`python -X importtime`.
+
+    python -m benchmarks.bench_startup --runs 5 --top 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "python (floor)": "pass",
+    "main.py --help": "import main; main.build_parser().format_help()",
+    "live": "import main, twitch_chat_streamer",
+    "live --async": "import main, twitch_chat_async",
+    "live --workers": "import main, ingest_supervisor",
+    "vod-backfill": ("import main, os; main._load_env(); from twitch_master import Twitch; "
+                     "Twitch(client_id='bench', client_secret='bench', output_dir=os.environ['BENCH_TMP'])"),
+    "sully": "import main, sully",
+    "upload": "import main, adls_uploader",
+}
+
+
+def import_times(stderr):
+    """(total microseconds of top-level imports, [(self_us, module)] slowest first) from -X importtime output"""
+    total, modules = 0, []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((int(self_us), name.strip()))
+        if not name[1:].startswith(" "):  # top level: nested imports are indented
+            total += int(cumulative_us)
+    return total, sorted(modules, reverse=True)
+
+
+def run(code, runs, env):
+    walls, result = [], None
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env,
+                              capture_output=True, text=True)
+        walls.append(time.perf_counter() - start)
+        if proc.returncode:
+            return None, None, proc.stderr.strip().splitlines()[-1]
+        result = import_times(proc.stderr)
+    return statistics.median(walls), result, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5, help="runs per scenario (median wall time)")
+    parser.add_argument("--top", type=int, default=3, help="slowest modules to list per scenario")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, BENCH_TMP=tmp, TWITCH_TOKEN_CACHE=os.path.join(tmp, "token.json"))
+        print(f"{'command':<16} {'wall ms':>8} {'imports ms':>11}  slowest imports (self ms)")
+        for name in args.scenarios:
+            wall, imports, error = run(SCENARIOS[name], args.runs, env)
+            if error:
+                print(f"{name:<16} failed: {error}")
+                continue
+            total, modules = imports
+            slowest = ", ".join(f"{m} {us / 1000:.1f}" for us, m in modules[:args.top])
+            print(f"{name:<16} {wall * 1000:>8.1f} {total / 1000:>11.1f}  {slowest}")
+
+
+if __name__ == "__main__":
+    main()
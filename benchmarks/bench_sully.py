@@ -0,0 +1,130 @@
+# benchmarks/bench_sully.py
+"""
+SullyStatsPipeline against a local SullyGnome stand-in: concurrent cold
+downloads, ETag revalidation, and parse + metrics time / memory versus the old
+default-dtype load, for many creators built from the fixture CSV in data/.
+
+    python -m benchmarks.bench_sully --creators 200 --streams 365
+"""
+import argparse
+import hashlib
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sully import SullyStatsPipeline
+
+FIXTURE = next(Path(__file__).resolve().parent.parent.joinpath("data").glob("*SullyGnome.csv"))
+
+
+def creator_csvs(creators, streams, seed=0):
+    """{creator: csv bytes} made by resampling the fixture's rows with scaled viewer numbers"""
+    base = pd.read_csv(FIXTURE, encoding="utf-8-sig")
+    rng = np.random.default_rng(seed)
+    out = {}
+    for i in range(creators):
+        df = base.sample(streams, replace=True, random_state=int(rng.integers(1 << 31))).reset_index(drop=True)
+        scale = rng.uniform(0.1, 20)
+        for col in ("Avg viewers", "Peak viewers", "Watch time (mins)"):
+            df[col] = (df[col] * scale).round().astype(int)
+        df[df.columns[0]] = range(1, len(df) + 1)
+        out[f"creator{i}"] = df.to_csv(index=False).encode("utf-8-sig")
+    return out
+
+
+class SullyStub:
+    """Serves /channel/<creator>/stats/csv with ETags and 304s; counts full responses"""
+
+    def __init__(self, files, latency=0.05):
+        self.files = files
+        self.etags = {c: '"' + hashlib.md5(b).hexdigest() + '"' for c, b in files.items()}
+        self.latency = latency
+        self.full = self.not_modified = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                time.sleep(stub.latency)
+                creator = self.path.split("/")[2]
+                if creator not in stub.files:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                if self.headers.get("If-None-Match") == stub.etags[creator]:
+                    stub.not_modified += 1
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                stub.full += 1
+                body = stub.files[creator]
+                self.send_response(200)
+                self.send_header("ETag", stub.etags[creator])
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/channel/{{creator}}/stats/csv"
+
+
+def legacy(paths):
+    """What SullyGnomeScraper did per creator: default dtypes plus two ratio columns"""
+    frames = []
+    for path in paths.values():
+        df = pd.read_csv(path)
+        df["Variability Ratio"] = df["Peak viewers"] / df["Avg viewers"]
+        df["Peak Deviation Index"] = (df["Peak viewers"] - df["Avg viewers"]) / df["Avg viewers"]
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--creators", type=int, default=200)
+    parser.add_argument("--streams", type=int, default=365)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    stub = SullyStub(creator_csvs(args.creators, args.streams), latency=args.latency)
+    creators = list(stub.files)
+    with tempfile.TemporaryDirectory() as data_dir:
+        pipeline = SullyStatsPipeline(data_dir, workers=args.workers)
+        pipeline.csv_url = stub.url
+
+        start = time.perf_counter()
+        paths = pipeline.download_many(creators)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        pipeline.download_many(creators)
+        warm = time.perf_counter() - start
+        print(f"download {len(paths)} creators: cold {cold:.2f}s, revalidate {warm:.2f}s "
+              f"({stub.full} full responses, {stub.not_modified} x 304); "
+              f"serial cold would be ~{args.creators * args.latency:.1f}s of latency alone")
+
+        start = time.perf_counter()
+        old = legacy(paths)
+        old_s = time.perf_counter() - start
+        start = time.perf_counter()
+        streams = pipeline.stream_metrics(pipeline.load_many(paths))
+        games = pipeline.game_metrics(streams)
+        summary = pipeline.creator_metrics(streams)
+        new_s = time.perf_counter() - start
+        print(f"legacy load + 2 ratios: {old_s:.2f}s, {old.memory_usage(deep=True).sum() / 1e6:.1f} MB")
+        print(f"pipeline load + all metrics: {new_s:.2f}s, {streams.memory_usage(deep=True).sum() / 1e6:.1f} MB "
+              f"({len(streams)} streams, {len(games)} creator/game rows, {len(summary)} creators)")
+        stub.server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
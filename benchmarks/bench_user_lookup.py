@@ -0,0 +1,74 @@
+# benchmarks/bench_user_lookup.py
+"""
+Resolve a large watchlist of logins against the stub Helix server, once one
+call per login (the old get_user path) and once through get_users, then again
+warm from the cache.
+
+    python -m benchmarks.bench_user_lookup --logins 5000 --latency 0.02
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.stub_helix import StubHelix, stub_client_class
+from helix_scheduler import RateLimitScheduler
+from token_cache import TokenCache
+from twitch_client import TwitchCon
+from user_cache import UserCache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=5000)
+    parser.add_argument("--single", type=int, default=500, help="logins to resolve one call at a time")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+    logins = [f"channel{i}" for i in range(args.logins)]
+
+    stub = StubHelix(rate_limit=100000, latency=args.latency)
+    with stub as base_url, tempfile.TemporaryDirectory() as tmp:
+        client_cls = stub_client_class(TwitchCon, base_url)
+
+        def new_client(cache_path=None):
+            return client_cls(client_id="bench", client_secret="bench",
+                              token_cache=TokenCache(os.path.join(tmp, "token.json")),
+                              scheduler=RateLimitScheduler(),
+                              user_cache=UserCache(path=cache_path))
+
+        client = new_client()
+        before = stub.requests
+        start = time.perf_counter()
+        for login in logins[:args.single]:
+            client._helix_get("users", params={"login": login})
+        single = time.perf_counter() - start
+        print(f"one call per login: {args.single} logins in {single:.2f}s, {stub.requests - before} requests "
+              f"(~{single * args.logins / args.single:.1f}s projected for {args.logins})")
+
+        cache_path = os.path.join(tmp, "users.sqlite3")
+        client = new_client(cache_path)
+        before = stub.requests
+        start = time.perf_counter()
+        users = client.get_users(logins, workers=args.workers)
+        cold = time.perf_counter() - start
+        print(f"get_users cold: {len(users)} users in {cold:.2f}s, {stub.requests - before} requests")
+
+        before = stub.requests
+        start = time.perf_counter()
+        client.get_users(logins)
+        warm = time.perf_counter() - start
+        print(f"get_users warm (memory): {warm * 1000:.1f} ms, {stub.requests - before} requests")
+
+        client = new_client(cache_path)
+        before = stub.requests
+        start = time.perf_counter()
+        client.get_users(logins)
+        disk = time.perf_counter() - start
+        print(f"get_users warm (disk cache, new process state): {disk * 1000:.1f} ms, "
+              f"{stub.requests - before} requests")
+        client.user_cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# benchmarks/bench_vod_formats.py
+"""
+File size and pandas load time of VOD chat saved as JSON, CSV and Parquet.
+
+    python -m benchmarks.bench_vod_formats --messages 500000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic_vod import synthetic_raw_messages
+from twitch_vod_chat_logger import TwitchVODChatLogger
+
+LOADERS = {
+    "json": pd.read_json,
+    "csv": pd.read_csv,
+    "parquet": pd.read_parquet,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        logger = TwitchVODChatLogger(output_dir=out_dir)
+        logger.chat_data = [logger._extract_message(m) for m in synthetic_raw_messages(args.messages)]
+
+        print(f"{'format':<8} {'size MB':>10} {'save s':>8} {'load s':>8}")
+        for fmt, load in LOADERS.items():
+            file_name = f"bench.{fmt}"
+            start = time.perf_counter()
+            logger.save(file_name=file_name, save_to=fmt)
+            save_s = time.perf_counter() - start
+
+            path = os.path.join(out_dir, file_name)
+            start = time.perf_counter()
+            df = load(path)
+            load_s = time.perf_counter() - start
+            assert len(df) == args.messages
+            print(f"{fmt:<8} {os.path.getsize(path) / 1e6:>10.1f} {save_s:>8.2f} {load_s:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
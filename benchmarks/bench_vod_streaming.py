@@ -0,0 +1,64 @@
+# benchmarks/bench_vod_streaming.py
+"""
+Peak RSS of streaming a synthetic VOD chat to disk with stream_chat_to_file.
+
+    python -m benchmarks.bench_vod_streaming --messages 1000000 --format jsonl
+
+RSS is sampled every `--every` messages; the run fails if it grows by more than
+`--max-growth-mb` between the first sample and the end, i.e. if memory is not
+flat in the length of the VOD. `--materialize` runs the old fetch_chat + save
+path instead for comparison.
+"""
+import argparse
+import sys
+import tempfile
+
+from benchmarks.resources import peak_rss_mb, rss_mb
+from benchmarks.synthetic_vod import FakeChatDownloader
+from twitch_vod_chat_logger import TwitchVODChatLogger
+
+
+class SampledLogger(TwitchVODChatLogger):
+    """Logger that records RSS while its chat iterator is consumed"""
+
+    def __init__(self, output_dir, messages, every):
+        super().__init__(output_dir=output_dir, chat_downloader=lambda: FakeChatDownloader(messages))
+        self.every = every
+        self.samples = []
+
+    def iter_chat(self, vod_url_or_id, start_time=None):
+        for n, record in enumerate(super().iter_chat(vod_url_or_id, start_time=start_time), 1):
+            if n % self.every == 0:
+                self.samples.append((n, rss_mb()))
+            yield record
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--format", default="jsonl", choices=["csv", "json", "jsonl", "parquet"])
+    parser.add_argument("--every", type=int, default=100_000)
+    parser.add_argument("--max-growth-mb", type=float, default=32.0)
+    parser.add_argument("--materialize", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        logger = SampledLogger(out_dir, args.messages, args.every)
+        file_name = f"bench.{args.format}"
+        if args.materialize:
+            logger.fetch_chat("1")
+            logger.save(file_name=file_name, save_to=args.format)
+        else:
+            logger.stream_chat_to_file("1", file_name=file_name, save_to=args.format)
+
+    for n, rss in logger.samples:
+        print(f"{n:>10,} messages  rss={rss:8.1f} MB")
+    growth = logger.samples[-1][1] - logger.samples[0][1] if logger.samples else 0.0
+    print(f"RSS growth after first sample: {growth:.1f} MB, peak RSS: {peak_rss_mb():.1f} MB")
+    if not args.materialize and growth > args.max_growth_mb:
+        print(f"FAIL: RSS grew by more than {args.max_growth_mb} MB")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# benchmarks/fake_irc.py
+"""
+Local stand-in for irc.chat.twitch.tv used by the benchmarks.
+
+Every client that connects gets a stream of tagged PRIVMSG lines spread over
+the channels it has joined. Traffic is synthetic unless `replay_file` points
+at a captured stream (one raw IRC line per line). To exercise reconnects a
+connection can be dropped (`drop_after`), sent a RECONNECT notice
+(`reconnect_after`) or left silent with PINGs unanswered (`stall_after`), each
+a number of seconds after it joined.
+"""
+import asyncio
+import contextlib
+import itertools
+import multiprocessing
+import time
+
+TAGS = ("@badge-info=subscriber/12;badges=subscriber/12,premium/1;color=#1E90FF;"
+        "display-name={user};emotes=;first-msg=0;flags=;id=6b7c0e4e-2f1a-4f3c-9d7e-{n:012d};"
+        "mod=0;returning-chatter=0;room-id=12345678;subscriber={sub};tmi-sent-ts=1700000000000;"
+        "turbo=0;user-id={n};user-type=")
+WORDS = ["PogChamp", "KEKW", "LUL", "hello", "gg", "that", "was", "insane", "chat", "poggers",
+         "monkaS", "clip", "it", "Kappa", "what", "a", "play", "no", "way", "OMEGALUL"]
+
+
+def synthetic_line(channel, n):
+    """Build one realistic tagged PRIVMSG line"""
+    user = f"viewer{n % 5000}"
+    text = " ".join(WORDS[(n + i * 7) % len(WORDS)] for i in range(3 + n % 9))
+    tags = TAGS.format(user=user, n=n, sub=int(n % 3 == 0))
+    return f"{tags} :{user}!{user}@{user}.tmi.twitch.tv PRIVMSG #{channel} :{text}"
+
+
+class FakeIRCServer:
+    """Asyncio IRC server emitting chat traffic to every joined channel."""
+
+    def __init__(self, host="127.0.0.1", port=0, rate=0, batch_size=200, replay_file=None,
+                 ping_interval=None, drop_after=None, reconnect_after=None, stall_after=None):
+        self.host = host
+        self.port = port
+        self.rate = rate                  # messages/sec per connection, 0 = as fast as possible
+        self.batch_size = batch_size
+        self.replay_lines = None
+        if replay_file:
+            with open(replay_file, 'r', encoding='utf-8', errors='ignore') as f:
+                self.replay_lines = [line.rstrip('\r\n') for line in f if line.strip()]
+        self.ping_interval = ping_interval
+        self.drop_after = drop_after
+        self.reconnect_after = reconnect_after
+        self.stall_after = stall_after
+        self.sent = 0
+        self.connections = 0
+
+    async def _sender(self, writer, channels, state):
+        """Emit batches of PRIVMSG lines until the client goes away"""
+        counter = itertools.count()
+        replay = itertools.cycle(self.replay_lines) if self.replay_lines else None
+        last_ping = time.monotonic()
+        while not channels:
+            await asyncio.sleep(0.01)
+        joined_at = time.monotonic()
+        while not writer.is_closing():
+            started = time.monotonic()
+            alive = started - joined_at
+            if self.drop_after is not None and alive >= self.drop_after:
+                writer.transport.abort()  # vanish without a goodbye, like a network drop
+                return
+            if self.reconnect_after is not None and alive >= self.reconnect_after:
+                writer.write(b":tmi.twitch.tv RECONNECT\r\n")
+                await writer.drain()
+                await asyncio.sleep(1)  # Twitch gives clients a moment before closing
+                writer.close()
+                return
+            if self.stall_after is not None and alive >= self.stall_after:
+                state["stalled"] = True  # keep the socket open but say nothing, not even PONG
+                return
+            joined = list(channels)
+            lines = []
+            for _ in range(self.batch_size):
+                n = next(counter)
+                lines.append(next(replay) if replay else synthetic_line(joined[n % len(joined)], n))
+            writer.write(("\r\n".join(lines) + "\r\n").encode())
+            self.sent += len(lines)
+            if self.ping_interval and started - last_ping >= self.ping_interval:
+                writer.write(b"PING :tmi.twitch.tv\r\n")
+                last_ping = started
+            await writer.drain()
+            if self.rate:
+                await asyncio.sleep(max(0.0, self.batch_size / self.rate - (time.monotonic() - started)))
+
+    async def _handle(self, reader, writer):
+        channels = set()
+        state = {"stalled": False}
+        self.connections += 1
+        sender = asyncio.create_task(self._sender(writer, channels, state))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                line = line.decode(errors='ignore').strip()
+                if state["stalled"]:
+                    continue
+                if line.startswith('NICK'):
+                    nick = line.split(' ', 1)[1]
+                    writer.write(f":tmi.twitch.tv 001 {nick} :Welcome, GLHF!\r\n".encode())
+                elif line.startswith('JOIN'):
+                    channels.update(c.lstrip('#') for c in line.split(' ', 1)[1].split(','))
+                elif line.startswith('PING'):
+                    writer.write(b"PONG :tmi.twitch.tv\r\n")
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            sender.cancel()
+            writer.close()
+
+    async def serve(self, ready=None):
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        if ready is not None:
+            ready.send(self.port)
+        async with server:
+            await server.serve_forever()
+
+
+def _serve_process(conn, kwargs):
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(FakeIRCServer(**kwargs).serve(ready=conn))
+
+
+@contextlib.contextmanager
+def fake_irc_server(**kwargs):
+    """Run a FakeIRCServer in a child process and yield its (host, port)"""
+    parent, child = multiprocessing.Pipe()
+    proc = multiprocessing.Process(target=_serve_process, args=(child, kwargs), daemon=True)
+    proc.start()
+    try:
+        port = parent.recv()
+        yield kwargs.get("host", "127.0.0.1"), port
+    finally:
+        proc.terminate()
+        proc.join()
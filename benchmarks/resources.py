@@ -0,0 +1,22 @@
+# benchmarks/resources.py
+"""Process resource readings shared by the benchmarks."""
+import resource
+import sys
+
+
+def rss_mb():
+    """Current resident set size in MB (Linux), 0 if unavailable"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
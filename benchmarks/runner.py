@@ -0,0 +1,280 @@
+# benchmarks/runner.py
+"""
+Run the ingest hot paths against local fakes and report, per stage, items/sec,
+p50/p99 latency, CPU seconds and peak RSS. Each stage runs in a fresh process
+so its CPU and memory readings are its own. Results can be written as JSON
+and compared with an earlier run to catch regressions.
+
+    python -m benchmarks.runner --output bench.json
+    python -m benchmarks.runner --stages irc_ingest helix_vod_ids --compare bench.json
+
+Stages:
+  irc_parse      irc_parser.parse_line over synthetic tagged PRIVMSG lines
+  irc_ingest     TwitchChatReader.listen + handle_chat_message against the fake IRC server
+  log_writer     ChatLogWriter rows to CSV, ingest-to-disk lag
+  vod_save_csv   TwitchVODChatLogger.save_csv
+  vod_save_json  TwitchVODChatLogger.save_json
+  helix_vod_ids  TwitchCon.get_vod_ids paging /helix/videos on the stub Helix server
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from benchmarks.resources import peak_rss_mb
+
+REGRESSION_THRESHOLD = 0.10  # default: flag stages more than 10% slower than the compared run
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+class _Window:
+    """Wall and CPU time of the measured part of a stage (setup excluded)"""
+
+    def __enter__(self):
+        self._usage = resource.getrusage(resource.RUSAGE_SELF)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self._start
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        self.readings = {"seconds": self.seconds, "cpu_user_s": usage.ru_utime - self._usage.ru_utime,
+                         "cpu_sys_s": usage.ru_stime - self._usage.ru_stime}
+
+
+# -- stages ------------------------------------------------------------
+# Each takes the parsed options and returns {"items": n, **window.readings} plus optional
+# "latencies_ns" (one per item or call) and extra stage-specific readings.
+
+def stage_irc_parse(options):
+    from benchmarks.fake_irc import synthetic_line
+    from irc_parser import parse_line
+    lines = [synthetic_line(f"bench{n % 50}", n) for n in range(options.messages)]
+    latencies = []
+    clock = time.perf_counter_ns
+    with _Window() as window:
+        for line in lines:
+            t = clock()
+            parse_line(line)
+            latencies.append(clock() - t)
+    return {"items": len(lines), **window.readings, "latencies_ns": latencies}
+
+
+def stage_irc_ingest(options):
+    from benchmarks.fake_irc import fake_irc_server
+    from twitch_chat_streamer import TwitchChatReader
+
+    latencies = []
+    clock = time.perf_counter_ns
+
+    class TimedReader(TwitchChatReader):
+        def handle_chat_message(self, message_data):
+            t = clock()
+            super().handle_chat_message(message_data)
+            latencies.append(clock() - t)
+
+    channels = [f"bench{i}" for i in range(options.channels)]
+    with fake_irc_server(rate=options.rate, replay_file=options.capture) as (host, port), \
+            tempfile.TemporaryDirectory() as log_dir, open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stdout(devnull):  # the handler prints every message
+        reader = TimedReader(channels, log_directory=log_dir)
+        reader.server, reader.port = host, port
+        reader.start_listening()
+        time.sleep(1)  # let every channel join before measuring
+        latencies.clear()
+        with _Window() as window:
+            time.sleep(options.seconds)
+            measured = list(latencies)
+        reader.stop_listening()
+        writer = reader.log_writer.stats()
+    return {"items": len(measured), **window.readings, "latencies_ns": measured,
+            "writer_max_lag_ms": writer["max_lag_ms"]}
+
+
+def stage_log_writer(options):
+    from benchmarks.fake_irc import synthetic_line
+    from chat_log_writer import ChatLogWriter
+    header = ['timestamp', 'username', 'message', 'channel', 'tags', 'raw']
+    rows = [(f"bench{n % 50}", ['2024-01-01 00:00:00', f"viewer{n % 5000}", "PogChamp KEKW gg", f"bench{n % 50}",
+                                "{}", synthetic_line(f"bench{n % 50}", n)]) for n in range(options.messages)]
+    with tempfile.TemporaryDirectory() as log_dir:
+        writer = ChatLogWriter(log_dir, header).start()
+        latencies = []
+        clock = time.perf_counter_ns
+        with _Window() as window:
+            for channel, row in rows:
+                t = clock()
+                writer.write(channel, row)
+                latencies.append(clock() - t)
+            writer.close()
+        stats = writer.stats()
+    return {"items": len(rows), **window.readings, "latencies_ns": latencies,
+            "max_lag_ms": stats["max_lag_ms"], "max_batch_write_ms": stats["max_write_ms"]}
+
+
+def _vod_logger(options, out_dir):
+    from benchmarks.synthetic_vod import synthetic_raw_messages
+    from twitch_vod_chat_logger import TwitchVODChatLogger
+    logger = TwitchVODChatLogger(output_dir=out_dir, chat_downloader=object)
+    logger.chat_data = [logger._extract_message(m) for m in synthetic_raw_messages(options.messages)]
+    return logger
+
+
+def _vod_save(options, save_to):
+    with tempfile.TemporaryDirectory() as out_dir, open(os.devnull, "w") as devnull:
+        logger = _vod_logger(options, out_dir)
+        with contextlib.redirect_stdout(devnull), _Window() as window:
+            logger.save(f"bench.{save_to}", save_to=save_to)
+        size = os.path.getsize(os.path.join(out_dir, f"bench.{save_to}"))
+    return {"items": options.messages, **window.readings, "file_mb": size / 1e6}
+
+
+def stage_vod_save_csv(options):
+    return _vod_save(options, "csv")
+
+
+def stage_vod_save_json(options):
+    return _vod_save(options, "json")
+
+
+def stage_helix_vod_ids(options):
+    from benchmarks.stub_helix import StubHelix, stub_client_class
+    from token_cache import TokenCache
+    from twitch_client import TwitchCon
+
+    stub = StubHelix(rate_limit=1_000_000, latency=options.latency, videos_per_user=options.videos)
+    with stub as base_url, tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stdout(devnull):
+        client = stub_client_class(TwitchCon, base_url)(client_id="bench", client_secret="bench",
+                                                        token_cache=TokenCache(os.path.join(tmp, "token.json")))
+        logins = [f"channel{i}" for i in range(options.logins)]
+        client.get_users(logins)  # resolve up front: the stage measures paging
+        latencies, vods = [], 0
+        requests = stub.requests
+        with _Window() as window:  # CPU includes the stub server's threads
+            for login in logins:
+                t = time.perf_counter_ns()
+                vods += len(client.get_vod_ids(login))
+                latencies.append(time.perf_counter_ns() - t)
+    return {"items": vods, **window.readings, "latencies_ns": latencies, "requests": stub.requests - requests}
+
+
+STAGES = {name[len("stage_"):]: fn for name, fn in globals().items() if name.startswith("stage_")}
+
+
+# -- running -----------------------------------------------------------
+def _run_stage(name, options):
+    """Body of a stage's child process: run it and add throughput, latency and memory summaries"""
+    result = STAGES[name](options)
+    latencies = result.pop("latencies_ns", None)
+    seconds = result["seconds"]
+    result.update({
+        "items_per_sec": result["items"] / seconds if seconds else None,
+        "p50_ms": percentile(latencies, 50) / 1e6 if latencies else None,
+        "p99_ms": percentile(latencies, 99) / 1e6 if latencies else None,
+        "peak_rss_mb": peak_rss_mb(),
+    })
+    result["cpu_pct"] = 100 * (result["cpu_user_s"] + result["cpu_sys_s"]) / seconds if seconds else None
+    return result
+
+
+def run_stage(name, options):
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(_run_stage, name, options).result()
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, previous, threshold=REGRESSION_THRESHOLD):
+    """Print throughput and p99 changes against an earlier run; returns the regressed stage names"""
+    regressed = []
+    print(f"\nvs {previous['meta'].get('commit') or 'previous run'} ({previous['meta']['started']}):")
+    for name, stage in results["stages"].items():
+        old = previous["stages"].get(name)
+        if not old or not old.get("items_per_sec") or not stage.get("items_per_sec"):
+            continue
+        change = stage["items_per_sec"] / old["items_per_sec"] - 1
+        line = f"  {name:<14} items/sec {change:+7.1%}"
+        if stage.get("p99_ms") and old.get("p99_ms"):
+            line += f"   p99 {stage['p99_ms'] / old['p99_ms'] - 1:+7.1%}"
+        if change < -threshold:
+            line += "   REGRESSION"
+            regressed.append(name)
+        print(line)
+    return regressed
+
+
+def _fmt(value, spec):
+    return format(value, spec) if value is not None else format("-", f">{spec.split('.')[0].lstrip(',')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--messages", type=int, default=200_000, help="items for the offline stages")
+    parser.add_argument("--channels", type=int, default=20, help="irc_ingest channels")
+    parser.add_argument("--seconds", type=float, default=5.0, help="irc_ingest measuring time")
+    parser.add_argument("--rate", type=int, default=0, help="fake IRC msgs/sec per connection (0 = unthrottled)")
+    parser.add_argument("--capture", default=None, help="replay a recorded IRC capture instead of synthetic chat")
+    parser.add_argument("--logins", type=int, default=20, help="helix_vod_ids streamers")
+    parser.add_argument("--videos", type=int, default=1000, help="helix_vod_ids VODs per streamer")
+    parser.add_argument("--latency", type=float, default=0.0, help="stub Helix latency per request (s)")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="JSON from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="fractional throughput drop flagged as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="exit 1 if a stage regressed against --compare")
+    options = parser.parse_args()
+
+    results = {
+        "meta": {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "options": {k: v for k, v in vars(options).items() if k not in ("output", "compare")},
+        },
+        "stages": {},
+    }
+    print(f"{'stage':<14} {'items/sec':>12} {'p50 ms':>8} {'p99 ms':>8} {'cpu s':>7} {'cpu %':>6} {'rss MB':>7}")
+    for name in options.stages:
+        stage = results["stages"][name] = run_stage(name, options)
+        print(f"{name:<14} {_fmt(stage['items_per_sec'], '12,.0f')} {_fmt(stage['p50_ms'], '8.3f')} "
+              f"{_fmt(stage['p99_ms'], '8.3f')} {stage['cpu_user_s'] + stage['cpu_sys_s']:>7.2f} "
+              f"{_fmt(stage['cpu_pct'], '6.0f')} {stage['peak_rss_mb']:>7.1f}")
+
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to: {options.output}")
+    if options.compare:
+        with open(options.compare, encoding="utf-8") as f:
+            regressed = compare(results, json.load(f), options.threshold)
+        if regressed and options.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+# benchmarks/stub_helix.py
+"""
+Local stand-in for id.twitch.tv and api.twitch.tv/helix used by the benchmarks.
+
+Implements the token endpoint, /helix/users (up to 100 login/id params) and
+/helix/videos with cursor pagination, and enforces a Helix-style token bucket
+with Ratelimit-Limit/Remaining/Reset headers and 429s when it runs dry.
+`fail_next()` makes the next GETs answer with a non-JSON error page, the way a
+proxy in front of Helix reports a 502/503.
+"""
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def user_id_for(login):
+    return str(100000 + zlib.crc32(login.encode()) % 900000)
+
+
+class StubHelix:
+    """Threaded stub server; use as a context manager to get its base URL."""
+
+    def __init__(self, rate_limit=800, window=60.0, latency=0.0, videos_per_user=250, page_size_cap=100):
+        self.rate_limit = rate_limit      # bucket size
+        self.window = window              # seconds to refill an empty bucket
+        self.latency = latency            # seconds added to every response
+        self.videos_per_user = videos_per_user
+        self.page_size_cap = page_size_cap
+        self.tokens_issued = 0
+        self.valid_tokens = set()
+        self.requests = 0
+        self.throttled = 0
+        self.failures = []  # statuses of the next GETs to fail with an HTML body
+        self._bucket = float(rate_limit)
+        self._bucket_at = time.time()
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    # -- rate limiting -------------------------------------------------
+    def _take_token(self):
+        with self._lock:
+            now = time.time()
+            self._bucket = min(self.rate_limit, self._bucket + (now - self._bucket_at) * self.rate_limit / self.window)
+            self._bucket_at = now
+            self.requests += 1
+            allowed = self._bucket >= 1
+            if allowed:
+                self._bucket -= 1
+            else:
+                self.throttled += 1
+            reset = now + (self.rate_limit - self._bucket) * self.window / self.rate_limit
+            return allowed, int(self._bucket), reset
+
+    def revoke_tokens(self):
+        """Invalidate every issued token so the next Helix call gets a 401"""
+        with self._lock:
+            self.valid_tokens.clear()
+
+    def fail_next(self, count=1, status=503):
+        """Answer the next `count` Helix GETs with `status` and an HTML body"""
+        with self._lock:
+            self.failures += [status] * count
+
+    def _next_failure(self):
+        with self._lock:
+            return self.failures.pop(0) if self.failures else None
+
+    # -- data ----------------------------------------------------------
+    def videos(self, user_id):
+        base = int(user_id) * 1000
+        return [{
+            "id": str(base + self.videos_per_user - i),
+            "user_id": user_id,
+            "title": f"Stream {i}",
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(1_700_000_000 - i * 86400)),
+            "duration": f"{3 + i % 4}h{i % 60}m{i % 60}s",
+            "view_count": 1000 + i * 13,
+            "type": "archive",
+        } for i in range(self.videos_per_user)]
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, headers=None):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _send_html(self, status):
+                payload = f"<html><body><h1>{status} Service Unavailable</h1></body></html>".encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                if urlparse(self.path).path != "/oauth2/token":
+                    return self._send(404, {"error": "not found"})
+                length = int(self.headers.get("Content-Length") or 0)
+                self.rfile.read(length)
+                with stub._lock:
+                    stub.tokens_issued += 1
+                    token = f"stub-token-{stub.tokens_issued}"
+                    stub.valid_tokens.add(token)
+                self._send(200, {"access_token": token, "expires_in": 3600, "token_type": "bearer"})
+
+            def do_GET(self):
+                if stub.latency:
+                    time.sleep(stub.latency)
+                failure = stub._next_failure()
+                if failure is not None:
+                    with stub._lock:
+                        stub.requests += 1
+                    return self._send_html(failure)
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                allowed, remaining, reset = stub._take_token()
+                headers = {"Ratelimit-Limit": str(stub.rate_limit), "Ratelimit-Remaining": str(remaining),
+                           "Ratelimit-Reset": str(int(reset) + 1)}
+                if not allowed:
+                    return self._send(429, {"error": "Too Many Requests"}, headers)
+                token = self.headers.get("Authorization", "").replace("Bearer ", "")
+                if token not in stub.valid_tokens:
+                    return self._send(401, {"error": "Unauthorized"}, headers)
+
+                if url.path == "/helix/users":
+                    logins = query.get("login", []) + [f"user{i}" for i in query.get("id", [])]
+                    if len(logins) > 100:
+                        return self._send(400, {"error": "too many ids"}, headers)
+                    data = [{"id": user_id_for(l), "login": l, "display_name": l.capitalize(),
+                             "type": "", "broadcaster_type": "affiliate"} for l in logins]
+                    return self._send(200, {"data": data}, headers)
+
+                if url.path == "/helix/videos":
+                    videos = stub.videos(query.get("user_id", ["0"])[0])
+                    first = min(int(query.get("first", ["20"])[0]), stub.page_size_cap)
+                    start = int(query.get("after", ["0"])[0])
+                    page = videos[start:start + first]
+                    pagination = {"cursor": str(start + first)} if start + first < len(videos) else {}
+                    return self._send(200, {"data": page, "pagination": pagination}, headers)
+
+                self._send(404, {"error": "not found"}, headers)
+
+        return Handler
+
+    # -- lifecycle -----------------------------------------------------
+    def start(self, host="127.0.0.1", port=0):
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return f"http://{host}:{self._server.server_address[1]}"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def stub_client_class(cls, base_url):
+    """Subclass of TwitchCon (or a subclass of it) whose auth and Helix URLs point at a running stub"""
+    return type(f"Stub{cls.__name__}", (cls,), {
+        "auth_url": f"{base_url}/oauth2/token",
+        "helix_url": f"{base_url}/helix",
+    })
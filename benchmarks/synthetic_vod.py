@@ -0,0 +1,47 @@
+# benchmarks/synthetic_vod.py
+"""Synthetic VOD chat in the shape chat_downloader yields, for offline benchmarks."""
+import time
+
+from benchmarks.fake_irc import WORDS
+
+BADGES = [[], [{"name": "subscriber"}], [{"name": "moderator"}, {"name": "subscriber"}], [{"name": "vip"}]]
+COLOURS = ["#FF0000", "#1E90FF", "#9ACD32", None, "#FF69B4"]
+
+
+def synthetic_raw_messages(count, duration_s=4 * 3600, users=5000, start=0):
+    """Yield `count` raw chat_downloader-style message dicts spread over `duration_s` seconds"""
+    for n in range(start, start + count):
+        t = n * duration_s / max(count, 1)
+        user = f"viewer{(n * 7919) % users}"
+        yield {
+            "message_id": f"6b7c0e4e-2f1a-4f3c-9d7e-{n:012d}",
+            "timestamp": 1_700_000_000_000_000 + int(t * 1_000_000),
+            "time_in_seconds": t,
+            "time_text": time.strftime("%H:%M:%S", time.gmtime(t)),
+            "author": {
+                "name": user,
+                "display_name": user.capitalize(),
+                "badges": BADGES[n % len(BADGES)],
+                "colour": COLOURS[n % len(COLOURS)],
+            },
+            "message": " ".join(WORDS[(n + i * 7) % len(WORDS)] for i in range(2 + n % 10)),
+            "message_type": "text_message",
+        }
+
+
+class FakeChatDownloader:
+    """Drop-in for chat_downloader.ChatDownloader that yields synthetic chat"""
+
+    def __init__(self, messages=10_000, delay=0.0, fail_on=()):
+        self.messages = messages
+        self.delay = delay          # seconds to sleep before yielding, like a slow network fetch
+        self.fail_on = set(fail_on)  # VOD IDs whose download raises
+
+    def get_chat(self, url, start_time=None, **kwargs):
+        if self.delay:
+            time.sleep(self.delay)
+        if url.rsplit("/", 1)[-1] in self.fail_on:
+            raise RuntimeError(f"Simulated download failure for {url}")
+        for msg in synthetic_raw_messages(self.messages):
+            if start_time is None or msg["time_in_seconds"] >= start_time:
+                yield msg
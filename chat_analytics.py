@@ -0,0 +1,273 @@
+# chat_analytics.py
+import heapq
+import math
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_MASK64 = (1 << 64) - 1
+
+# Words too common to be interesting as "top terms"
+STOPWORDS = frozenset("""
+a an the and or but if of to in on at by for with is it its this that was are be i you he she we they me my
+your our so no not do does did just what how why when who im its lol
+""".split())
+
+
+class HyperLogLog:
+    """
+    Cardinality estimate in 2**p one-byte registers (p=10: 1 KB, ~3% error).
+
+    Uses Python's string hash, so estimates are only comparable within one
+    process. Sketches with the same p merge by register-wise max.
+    """
+
+    __slots__ = ("p", "m", "registers", "_rank_bits")
+
+    def __init__(self, p: int = 10):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(self.m)
+        self._rank_bits = 64 - p
+
+    def add(self, item: str) -> None:
+        h = hash(item) & _MASK64
+        index = h >> self._rank_bits
+        rank = self._rank_bits - (h & ((1 << self._rank_bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if any(other.registers):
+            self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def clear(self) -> None:
+        self.registers = bytearray(self.m)
+
+    def count(self) -> int:
+        return self.estimate(self.registers)
+
+    @staticmethod
+    def estimate(registers) -> int:
+        m = len(registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -r for r in registers)
+        zeros = registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            return round(m * math.log(m / zeros))  # linear counting for small cardinalities
+        return round(raw)
+
+
+class HeavyHitters:
+    """
+    Misra-Gries frequent-items summary holding at most about 2 * capacity counters.
+
+    When the table overflows, every counter is lowered by the capacity-th largest
+    count and those at zero are dropped, so updates are O(1) amortized and any item
+    with more than total/capacity occurrences is kept. Counts are lower bounds.
+    Summaries merge by adding counters.
+    """
+
+    __slots__ = ("capacity", "counts")
+
+    def __init__(self, capacity: int = 100):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+
+    def add(self, item: str, n: int = 1) -> None:
+        counts = self.counts
+        counts[item] = counts.get(item, 0) + n
+        if len(counts) > 2 * self.capacity:
+            self._shrink()
+
+    def update(self, items: Iterable[str]) -> None:
+        """Count each item once (cheaper than add() in a loop)."""
+        counts = self.counts
+        get = counts.get
+        for item in items:
+            counts[item] = get(item, 0) + 1
+        if len(counts) > 2 * self.capacity:
+            self._shrink()
+
+    def _shrink(self) -> None:
+        cut = heapq.nlargest(self.capacity + 1, self.counts.values())[-1]
+        self.counts = {k: v - cut for k, v in self.counts.items() if v > cut}
+
+    def clear(self) -> None:
+        self.counts = {}
+
+    def top(self, n: int = 10) -> List[Tuple[str, int]]:
+        return heapq.nlargest(n, self.counts.items(), key=lambda kv: kv[1])
+
+
+class _Bucket:
+    """Everything observed in one channel during one second"""
+    __slots__ = ("second", "messages", "subscribers", "chatters", "terms", "emotes")
+
+    def __init__(self, hll_p: int, top_capacity: int):
+        self.second = -1
+        self.messages = 0
+        self.subscribers = 0
+        self.chatters = HyperLogLog(hll_p)
+        self.terms = HeavyHitters(top_capacity)
+        self.emotes = HeavyHitters(top_capacity)
+
+    def reset(self, second: int) -> None:
+        self.second = second
+        self.messages = 0
+        self.subscribers = 0
+        self.chatters.clear()
+        self.terms.clear()
+        self.emotes.clear()
+
+
+class ChannelWindow:
+    """
+    Rolling per-second statistics for one channel over the last `horizon` seconds.
+
+    A ring of one-second buckets is written in O(1) per message; windows of any
+    length up to `horizon` are summarised on demand by combining the buckets they
+    cover. Memory is fixed by horizon, hll_p and top_capacity, not by stream length.
+    """
+
+    def __init__(self, horizon: int = 60, hll_p: int = 10, top_capacity: int = 100):
+        self.horizon = horizon
+        self.buckets = [_Bucket(hll_p, top_capacity) for _ in range(horizon)]
+        self.total_messages = 0
+        self.all_chatters = HyperLogLog(hll_p)  # every second that has left the ring
+        self._lock = threading.Lock()
+
+    def observe(self, second: int, username: str, words: Iterable[str], emotes: Iterable[str],
+                subscriber: bool) -> None:
+        with self._lock:
+            bucket = self.buckets[second % self.horizon]
+            if bucket.second != second:
+                if second < bucket.second:
+                    return  # older than the horizon
+                # Fold the expiring second into the all-time sketch once, not per message
+                self.all_chatters.merge(bucket.chatters)
+                bucket.reset(second)
+            bucket.messages += 1
+            bucket.subscribers += subscriber
+            bucket.chatters.add(username)
+            self.total_messages += 1
+            bucket.terms.update(words)
+            if emotes:
+                bucket.emotes.update(emotes)
+
+    def summaries(self, windows: Iterable[int], now: Optional[float] = None, top: int = 10) -> Dict[int, dict]:
+        """
+        Statistics for the last `w` seconds (up to and including the current one) for each
+        window w, plus "total" for everything since the channel was first seen. One pass
+        from the newest bucket back, so the longer windows reuse the shorter ones' merges.
+        """
+        windows = sorted({max(1, min(w, self.horizon)) for w in windows})
+        end = int(now if now is not None else time.time())
+        messages = subscribers = 0
+        registers = bytearray(self.all_chatters.m)
+        terms: Dict[str, int] = {}
+        emotes: Dict[str, int] = {}
+        result = {}
+        with self._lock:
+            by_second = {b.second: b for b in self.buckets if b.messages}
+            for age in range(windows[-1]):
+                bucket = by_second.get(end - age)
+                if bucket is not None:
+                    messages += bucket.messages
+                    subscribers += bucket.subscribers
+                    registers = bytearray(map(max, registers, bucket.chatters.registers))
+                    for k, v in bucket.terms.counts.items():
+                        terms[k] = terms.get(k, 0) + v
+                    for k, v in bucket.emotes.counts.items():
+                        emotes[k] = emotes.get(k, 0) + v
+                if age + 1 in windows:
+                    result[age + 1] = {
+                        "window_s": age + 1,
+                        "messages": messages,
+                        "messages_per_sec": messages / (age + 1),
+                        "unique_chatters": HyperLogLog.estimate(registers),
+                        "subscriber_ratio": subscribers / messages if messages else 0.0,
+                        "top_terms": heapq.nlargest(top, terms.items(), key=lambda kv: kv[1]),
+                        "top_emotes": heapq.nlargest(top, emotes.items(), key=lambda kv: kv[1]),
+                    }
+            # All-time: seconds already folded into all_chatters, the window just merged, and
+            # any buckets outside it (e.g. `now` in the past)
+            for second, bucket in by_second.items():
+                if not end - windows[-1] < second <= end:
+                    registers = bytearray(map(max, registers, bucket.chatters.registers))
+            registers = bytearray(map(max, registers, self.all_chatters.registers))
+            result["total"] = {"messages": self.total_messages,
+                               "unique_chatters": HyperLogLog.estimate(registers)}
+        return result
+
+    def summary(self, window: int, now: Optional[float] = None, top: int = 10) -> dict:
+        """Statistics for the last `window` seconds (up to and including the current one)."""
+        window = max(1, min(window, self.horizon))
+        return self.summaries([window], now=now, top=top)[window]
+
+    def totals(self) -> dict:
+        """Messages and (estimated) unique chatters since the channel was first seen."""
+        return self.summaries([1])["total"]
+
+
+def emote_names(message: str, emotes_tag: Optional[str]) -> List[str]:
+    """Names of the Twitch emotes in a message from its `emotes` tag ('25:0-4,12-16/1902:6-10')."""
+    if not emotes_tag:
+        return []
+    names = []
+    for entry in emotes_tag.split('/'):
+        _, _, spans = entry.partition(':')
+        for span in spans.split(','):
+            start, _, end = span.partition('-')
+            if start.isdigit() and end.isdigit():
+                names.append(message[int(start):int(end) + 1])
+    return names
+
+
+class ChatAnalytics:
+    """
+    Streaming analytics over live chat, one ChannelWindow per channel.
+
+    Feed it the reader's message_data dicts with `observe()` (TwitchChatReader
+    does when constructed with `analytics=`), then query `snapshot()` from any
+    thread for messages/sec, unique chatters (HyperLogLog), top terms and emotes
+    (Misra-Gries) and subscriber ratio over the last 1/10/60 seconds.
+    """
+
+    def __init__(self, windows=(1, 10, 60), hll_p: int = 10, top_capacity: int = 100,
+                 stopwords=STOPWORDS, min_term_length: int = 2):
+        self.windows = tuple(windows)
+        self.hll_p = hll_p
+        self.top_capacity = top_capacity
+        self.stopwords = stopwords
+        self.min_term_length = min_term_length
+        self.channels: Dict[str, ChannelWindow] = {}
+        self._lock = threading.Lock()
+
+    def _channel(self, channel: str) -> ChannelWindow:
+        window = self.channels.get(channel)
+        if window is None:
+            with self._lock:
+                window = self.channels.setdefault(
+                    channel, ChannelWindow(max(self.windows), self.hll_p, self.top_capacity))
+        return window
+
+    def observe(self, message_data: dict) -> None:
+        """Count one chat message (a TwitchChatReader message_data dict)."""
+        message = message_data['message']
+        tags = message_data.get('tags') or {}
+        stopwords, min_length = self.stopwords, self.min_term_length
+        words = {w for w in message.lower().split() if len(w) >= min_length and w not in stopwords}
+        self._channel(message_data['channel']).observe(
+            int(message_data.get('timestamp') or time.time()),
+            message_data['username'].lower(),
+            words,
+            emote_names(message, tags.get('emotes')),
+            tags.get('subscriber') == '1',
+        )
+
+    def snapshot(self, channel: Optional[str] = None, now: Optional[float] = None, top: int = 10) -> dict:
+        """{channel: {window_s: summary, "total": totals}} for one channel or all of them."""
+        names = [channel] if channel is not None else list(self.channels)
+        return {name: self.channels[name].summaries(self.windows, now=now, top=top)
+                for name in names if name in self.channels}
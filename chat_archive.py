@@ -0,0 +1,399 @@
+# chat_archive.py
+import json
+import os
+import re
+import struct
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+from chat_log_writer import ChatLogWriter
+
+# File: MAGIC + u32 header length + JSON header, then frames. Each frame is a header
+# (FRAME_MAGIC, compressed length, record count, first/last time) and a zstd-compressed
+# block of JSON lines. The sidecar <file>.idx holds one INDEX entry per frame so readers
+# find the frames covering a time range without touching the rest of the file; it can
+# always be rebuilt from the frame headers.
+MAGIC = b"CHATZ\x00\x01\x00"
+FRAME_MAGIC = b"CZF1"
+_FRAME = struct.Struct("<4sIIdd")
+_INDEX = struct.Struct("<QIIdd")  # frame offset, compressed length, records, t_min, t_max
+ARCHIVE_SUFFIX = ".chatz"
+
+# <channel>_chat_log.chatz, rotated to <channel>_chat_log.<YYYYmmdd-HHMMSS>.chatz
+_ROTATED = re.compile(r"^(?P<channel>.+)_chat_log\.(?P<day>\d{8})-(?P<time>\d{6})(?:-(?P<n>\d+))?\.chatz$")
+
+
+def _require_zstd():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("Chat archives require zstandard: pip install zstandard") from e
+    return zstandard
+
+
+def index_path(path) -> Path:
+    path = Path(path)
+    return path.with_name(path.name + ".idx")
+
+
+class ChatArchiveWriter:
+    """
+    Append chat records to a zstd-framed archive (.chatz) with a time index.
+
+    Records are buffered and compressed into one frame per `frame_records` records
+    or `frame_bytes` of JSON, whichever comes first; `flush()` ends the current
+    frame early. Each record's `time_field` (vod_time_s for VOD chat, epoch
+    seconds for live chat) goes into the frame's time range. With `append`, an
+    existing archive is reopened and anything a crash left half-written is
+    dropped. Same interface as the chat_sinks writers.
+    """
+
+    def __init__(self, path, append: bool = False, time_field: str = "vod_time_s", frame_records: int = 4096,
+                 frame_bytes: int = 1 << 20, level: int = 3):
+        zstd = _require_zstd()
+        self.path = Path(path)
+        self.time_field = time_field
+        self.frame_records = frame_records
+        self.frame_bytes = frame_bytes
+        self._compressor = zstd.ZstdCompressor(level=level)
+        self._lines: List[str] = []
+        self._size = 0
+        self._t_min = self._t_max = None
+        self.count = 0
+        self.frames = 0
+
+        if append and self.path.exists() and self.path.stat().st_size >= len(MAGIC):
+            entries = _recover(self.path)
+            self.time_field = _read_header(self.path)["time_field"]
+            self.frames = len(entries)
+            self._file = open(self.path, "ab")
+            self._index = open(index_path(self.path), "ab")
+        else:
+            header = json.dumps({"time_field": time_field, "format": "jsonl"}).encode()
+            self._file = open(self.path, "wb")
+            self._file.write(MAGIC + struct.pack("<I", len(header)) + header)
+            self._index = open(index_path(self.path), "wb")
+        self._offset = self._file.tell()
+
+    def write(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+        self._lines.append(line)
+        self._size += len(line) + 1
+        t = record.get(self.time_field)
+        if t is not None:
+            if self._t_min is None or t < self._t_min:
+                self._t_min = t
+            if self._t_max is None or t > self._t_max:
+                self._t_max = t
+        self.count += 1
+        if len(self._lines) >= self.frame_records or self._size >= self.frame_bytes:
+            self._write_frame()
+
+    def write_many(self, records: Iterable[dict]):
+        for record in records:
+            self.write(record)
+
+    def _write_frame(self):
+        if not self._lines:
+            return
+        payload = self._compressor.compress("\n".join(self._lines).encode("utf-8"))
+        t_min = self._t_min if self._t_min is not None else float("nan")
+        t_max = self._t_max if self._t_max is not None else float("nan")
+        # Frame first, index entry second: a crash in between is repaired from the frame header
+        self._file.write(_FRAME.pack(FRAME_MAGIC, len(payload), len(self._lines), t_min, t_max))
+        self._file.write(payload)
+        self._file.flush()
+        self._index.write(_INDEX.pack(self._offset, len(payload), len(self._lines), t_min, t_max))
+        self._index.flush()
+        self._offset += _FRAME.size + len(payload)
+        self.frames += 1
+        self._lines, self._size = [], 0
+        self._t_min = self._t_max = None
+
+    @property
+    def size(self) -> int:
+        """Bytes on disk so far (buffered records not included)."""
+        return self._offset
+
+    def flush(self):
+        """Compress buffered records into a frame and push it to the OS."""
+        self._write_frame()
+
+    def sync(self):
+        self.flush()
+        os.fsync(self._file.fileno())
+        os.fsync(self._index.fileno())
+
+    def close(self):
+        self.flush()
+        self._file.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _read_header(path) -> dict:
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a chat archive")
+        (length,) = struct.unpack("<I", f.read(4))
+        return json.loads(f.read(length))
+
+
+def _scan(f, offset: int, end: int) -> List[tuple]:
+    """Index entries for the complete frames between offset and end, read from frame headers"""
+    entries = []
+    while offset + _FRAME.size <= end:
+        f.seek(offset)
+        magic, length, records, t_min, t_max = _FRAME.unpack(f.read(_FRAME.size))
+        if magic != FRAME_MAGIC or offset + _FRAME.size + length > end:
+            break
+        entries.append((offset, length, records, t_min, t_max))
+        offset += _FRAME.size + length
+    return entries
+
+
+def _recover(path) -> List[tuple]:
+    """
+    Make the archive and its index agree after a crash or a truncate to a checkpoint:
+    index entries past the end of the data are dropped, complete frames missing from
+    the index are added from their headers, and a trailing partial frame is cut off.
+    """
+    path = Path(path)
+    size = path.stat().st_size
+    _read_header(path)
+    with open(path, "rb") as f:
+        f.seek(len(MAGIC))
+        (length,) = struct.unpack("<I", f.read(4))
+        first = len(MAGIC) + 4 + length
+        entries = load_index(path)
+        entries = [e for e in entries if e[0] + _FRAME.size + e[1] <= size]
+        end = entries[-1][0] + _FRAME.size + entries[-1][1] if entries else first
+        entries += _scan(f, end, size)
+    end = entries[-1][0] + _FRAME.size + entries[-1][1] if entries else first
+    if end < size:
+        os.truncate(path, end)
+    with open(index_path(path), "wb") as idx:
+        idx.write(b"".join(_INDEX.pack(*e) for e in entries))
+    return entries
+
+
+def load_index(path) -> List[tuple]:
+    """(offset, compressed length, records, t_min, t_max) per frame; empty if the index is missing."""
+    try:
+        data = index_path(path).read_bytes()
+    except FileNotFoundError:
+        return []
+    usable = len(data) - len(data) % _INDEX.size
+    return list(_INDEX.iter_unpack(data[:usable]))
+
+
+class ChatArchiveReader:
+    """
+    Read a .chatz archive, all of it or just a time range.
+
+    `read(start, end)` picks the frames whose time range overlaps [start, end)
+    from the sidecar index, seeks to each and decompresses only those. A missing
+    or stale index is rebuilt from the frame headers (no decompression).
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.header = _read_header(self.path)
+        self.time_field = self.header["time_field"]
+        entries = load_index(self.path)
+        size = self.path.stat().st_size
+        if not entries or entries[-1][0] + _FRAME.size + entries[-1][1] != size:
+            with open(self.path, "rb") as f:
+                f.seek(len(MAGIC))
+                (length,) = struct.unpack("<I", f.read(4))
+                entries = _scan(f, len(MAGIC) + 4 + length, size)
+        self.frames = entries
+        self.frames_read = 0
+
+    def __len__(self):
+        return sum(e[2] for e in self.frames)
+
+    def time_range(self):
+        """(first, last) time in the archive, or (None, None) if it has no timed records."""
+        times = [t for e in self.frames for t in e[3:] if t == t]
+        return (min(times), max(times)) if times else (None, None)
+
+    def _frames_for(self, start, end):
+        for entry in self.frames:
+            t_min, t_max = entry[3], entry[4]
+            if t_min != t_min:  # frame without timed records: only returned for an unbounded read
+                if start is None and end is None:
+                    yield entry
+                continue
+            if (start is None or t_max >= start) and (end is None or t_min < end):
+                yield entry
+
+    def read(self, start: Optional[float] = None, end: Optional[float] = None) -> Iterator[dict]:
+        """Records with start <= time < end, in file order (either bound may be None)."""
+        decompressor = _require_zstd().ZstdDecompressor()
+        field = self.time_field
+        with open(self.path, "rb") as f:
+            for offset, length, records, _, _ in self._frames_for(start, end):
+                f.seek(offset + _FRAME.size)
+                text = decompressor.decompress(f.read(length)).decode("utf-8")
+                self.frames_read += 1
+                for line in text.split("\n"):
+                    record = json.loads(line)
+                    if start is None and end is None:
+                        yield record
+                        continue
+                    t = record.get(field)
+                    if t is not None and (start is None or t >= start) and (end is None or t < end):
+                        yield record
+
+    def __iter__(self):
+        return self.read()
+
+
+def compact_archives(paths, output, level: int = 9, frame_records: int = 16384, remove: bool = False) -> int:
+    """
+    Merge archives (in the given order) into one with larger frames and a higher
+    compression level, e.g. a day of hourly rotations. Returns the record count.
+    The output is written under a temporary name and renamed into place.
+    """
+    paths = [Path(p) for p in paths]
+    if not paths:
+        return 0
+    output = Path(output)
+    tmp = output.with_name(output.name + ".part")
+    time_field = _read_header(paths[0])["time_field"]
+    with ChatArchiveWriter(tmp, time_field=time_field, level=level, frame_records=frame_records,
+                           frame_bytes=frame_records * 512) as writer:
+        for path in paths:
+            writer.write_many(ChatArchiveReader(path))
+    os.replace(tmp, output)
+    os.replace(index_path(tmp), index_path(output))
+    if remove:
+        for path in paths:
+            if path != output:
+                path.unlink()
+                index_path(path).unlink(missing_ok=True)
+    return writer.count
+
+
+def compact_directory(directory="chat_logs", level: int = 9, keep_today: bool = True) -> List[Path]:
+    """
+    Compact each channel's rotated live archives into one archive per day
+    (`<channel>_chat_log.<YYYYmmdd>-000000.chatz`). Today's rotations are left
+    alone unless keep_today is False. Returns the archives written.
+    """
+    groups = {}
+    for path in Path(directory).glob(f"*{ARCHIVE_SUFFIX}"):
+        match = _ROTATED.match(path.name)
+        if match:
+            order = (match.group("time"), int(match.group("n") or 0))
+            groups.setdefault((match.group("channel"), match.group("day")), []).append((order, path))
+    today = time.strftime("%Y%m%d")
+    written = []
+    for (channel, day), rotated in sorted(groups.items()):
+        paths = [path for _, path in sorted(rotated)]
+        output = Path(directory) / f"{channel}_chat_log.{day}-000000{ARCHIVE_SUFFIX}"
+        if (keep_today and day == today) or paths == [output]:
+            continue
+        count = compact_archives(paths, output, level=level, remove=True)
+        print(f"Compacted {len(paths)} archives for {channel} on {day} into {output} ({count} messages)")
+        written.append(output)
+    return written
+
+
+@lru_cache(maxsize=8)
+def _epoch(stamp: str) -> Optional[float]:
+    """Epoch seconds for the reader's '%Y-%m-%d %H:%M:%S' local timestamps"""
+    try:
+        return time.mktime(time.strptime(stamp, '%Y-%m-%d %H:%M:%S'))
+    except (TypeError, ValueError):
+        return None
+
+
+class ChatArchiveLogWriter(ChatLogWriter):
+    """
+    ChatLogWriter that writes each channel's live chat to `<channel>_chat_log.chatz`
+    instead of CSV. Rows become records keyed by the reader's CSV header plus `ts`
+    (the message's epoch seconds, the archive's time field). A frame is cut at
+    `frame_records` records or 1 MiB, and at every fsync_interval so synced chat
+    is on disk; with fsync_interval=None only the size limits (and close()) cut
+    frames. Rotation follows rotate_bytes / rotate_hourly like the CSV logs
+    (`<channel>_chat_log.<stamp>.chatz`); use compact_directory() to fold old
+    rotations into one archive per day.
+    """
+
+    def __init__(self, log_directory, header, batch_size=500, flush_interval=1.0, fsync_interval=5.0,
+                 rotate_bytes=None, rotate_hourly=False, frame_records: int = 4096, level: int = 3):
+        super().__init__(log_directory, header, batch_size=batch_size, flush_interval=flush_interval,
+                         fsync_interval=fsync_interval, rotate_bytes=rotate_bytes, rotate_hourly=rotate_hourly)
+        self.frame_records = frame_records
+        self.level = level
+        self._hours = {}
+
+    def log_path(self, channel):
+        return os.path.join(self.log_directory, f"{channel}_chat_log{ARCHIVE_SUFFIX}")
+
+    def _open(self, channel, ts=None):
+        writer = self._files.get(channel)
+        if writer is None:
+            writer = self._files[channel] = ChatArchiveWriter(
+                self.log_path(channel), append=True, time_field="ts", frame_records=self.frame_records,
+                level=self.level)
+            self._hours[channel] = self._hour(ts)
+        elif (self.rotate_bytes and writer.size >= self.rotate_bytes) or \
+                (self.rotate_hourly and self._hour(ts) > self._hours[channel]):
+            writer = self._rotate(channel, writer, ts)
+        return writer
+
+    def _rotate(self, channel, writer, ts=None):
+        writer.close()
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        target = os.path.join(self.log_directory, f"{channel}_chat_log.{stamp}{ARCHIVE_SUFFIX}")
+        n = 1
+        while os.path.exists(target):  # several rotations within one second
+            target = os.path.join(self.log_directory, f"{channel}_chat_log.{stamp}-{n}{ARCHIVE_SUFFIX}")
+            n += 1
+        os.replace(writer.path, target)
+        os.replace(index_path(writer.path), index_path(target))
+        self.rotations += 1
+        self._files.pop(channel)
+        return self._open(channel, ts)
+
+    def _write_rows(self, batch):
+        header = self.header
+        for channel, row, _enqueued, ts in batch:
+            try:
+                record = dict(zip(header, row))
+                record["ts"] = ts if ts is not None else _epoch(row[0])
+                self._open(channel, record["ts"]).write(record)
+            except Exception as e:
+                print(f"Error writing to chat archive for {channel}: {e}")
+
+    def _sync(self):
+        # No frame is cut at flush_interval: a frame per channel per second compresses poorly.
+        # Finished frames are pushed to the OS as they are written, so only fsync has work to do.
+        now = time.monotonic()
+        if self.fsync_interval is not None and now - self._last_fsync >= self.fsync_interval:
+            for writer in self._files.values():
+                writer.sync()
+            self._last_fsync = now
+
+    def close(self):
+        """Drain everything still queued, then write out and close every archive."""
+        if self._thread is not None:
+            self.queue.put(None)
+            self._thread.join()
+            self._thread = None
+        for writer in self._files.values():
+            try:
+                writer.close()
+            except Exception as e:
+                print(f"Error closing chat archive {writer.path}: {e}")
+        self._files.clear()
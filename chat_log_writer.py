@@ -0,0 +1,225 @@
+# chat_log_writer.py
+import csv
+import os
+import queue
+import threading
+import time
+
+
+class _OpenLog:
+    """
+    An open CSV log file and its rotation bookkeeping. The csv writer writes
+    through `write()`, which encodes each row so `size` counts bytes on disk.
+    """
+    __slots__ = ("path", "handle", "writer", "size", "hour")
+
+    def __init__(self, path, header, hour):
+        self.path = path
+        self.handle = open(path, 'ab', buffering=1 << 16)
+        self.size = self.handle.tell()
+        self.writer = csv.writer(self)
+        if self.size == 0:
+            self.writer.writerow(header)
+        self.hour = hour
+
+    def write(self, text):
+        data = text.encode('utf-8')
+        self.size += len(data)
+        return self.handle.write(data)
+
+
+class ChatLogWriter:
+    """
+    Write chat rows for many channels from one background thread.
+
+    File handles stay open; rows are drained from the queue in batches of up to
+    `batch_size`, and buffered data is flushed at least every `flush_interval`
+    seconds and fsynced every `fsync_interval` seconds (None disables fsync).
+    The active file is always `<channel>_chat_log.csv`; when it passes
+    `rotate_bytes` or the hour changes (`rotate_hourly`), it is renamed to
+    `<channel>_chat_log.<YYYYmmdd-HHMMSS>.csv` and a new file is started. The hour
+    is the queued message's own (`ts`), so a backlog drained after the hour turns
+    still lands in the file for the hour it was sent; rows without `ts` use the clock.
+
+    `stats()` reports queue depth (total and per channel), ingest-to-disk lag
+    and batch write latency so logging falling behind ingest is visible; with
+    `metrics` (a reader_metrics.ReaderMetrics) every batch's write time and lag
+    also go into its histograms.
+    """
+
+    metrics = None
+
+    def __init__(self, log_directory, header, batch_size=500, flush_interval=1.0,
+                 fsync_interval=5.0, rotate_bytes=None, rotate_hourly=False):
+        self.log_directory = log_directory
+        self.header = header
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.rotate_bytes = rotate_bytes
+        self.rotate_hourly = rotate_hourly
+        os.makedirs(self.log_directory, exist_ok=True)
+
+        self.queue = queue.Queue()
+        self._files = {}
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._thread = None
+        self._last_flush = self._last_fsync = time.monotonic()
+
+        self.rows_written = 0
+        self.batches_written = 0
+        self.rotations = 0
+        self.last_write_ms = 0.0
+        self.max_write_ms = 0.0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+
+    def log_path(self, channel):
+        return os.path.join(self.log_directory, f"{channel}_chat_log.csv")
+
+    def start(self):
+        """Start the writer thread (idempotent)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def write(self, channel, row, ts=None):
+        """
+        Queue one CSV row for `channel`. Safe to call from any thread. `ts` is the
+        message's epoch seconds, for writers that store the time itself rather than
+        the row's formatted local timestamp.
+        """
+        with self._pending_lock:
+            self._pending[channel] = self._pending.get(channel, 0) + 1
+        self.queue.put((channel, row, time.monotonic(), ts))
+
+    def queue_depth(self, channel=None):
+        """Rows waiting to be written, for one channel or in total"""
+        if channel is None:
+            return self.queue.qsize()
+        return self._pending.get(channel, 0)
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue.qsize(),
+            "queue_depth_by_channel": dict(self._pending),
+            "rows_written": self.rows_written,
+            "batches_written": self.batches_written,
+            "rotations": self.rotations,
+            "last_write_ms": self.last_write_ms,
+            "max_write_ms": self.max_write_ms,
+            "last_lag_ms": self.last_lag_ms,
+            "max_lag_ms": self.max_lag_ms,
+        }
+
+    def close(self):
+        """Drain everything still queued, flush, fsync and close every file."""
+        if self._thread is not None:
+            self.queue.put(None)
+            self._thread.join()
+            self._thread = None
+        for log in self._files.values():
+            try:
+                log.handle.flush()
+                os.fsync(log.handle.fileno())
+                log.handle.close()
+            except Exception as e:
+                print(f"Error closing log file {log.path}: {e}")
+        self._files.clear()
+
+    @staticmethod
+    def _hour(ts=None):
+        """
+        The local (year, day, hour) of epoch `ts` (now if None) that a file belongs to:
+        the hour alone repeats every day
+        """
+        now = time.localtime(ts)
+        return now.tm_year, now.tm_yday, now.tm_hour
+
+    def _open(self, channel, ts=None):
+        log = self._files.get(channel)
+        if log is None:
+            log = self._files[channel] = _OpenLog(self.log_path(channel), self.header, self._hour(ts))
+        # Only a later hour rotates: a row that arrives a little late stays in the current file
+        elif (self.rotate_bytes and log.size >= self.rotate_bytes) or \
+                (self.rotate_hourly and self._hour(ts) > log.hour):
+            log = self._rotate(channel, log, ts)
+        return log
+
+    def _rotate(self, channel, log, ts=None):
+        log.handle.close()
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        target = os.path.join(self.log_directory, f"{channel}_chat_log.{stamp}.csv")
+        n = 1
+        while os.path.exists(target):  # several rotations within one second
+            target = os.path.join(self.log_directory, f"{channel}_chat_log.{stamp}-{n}.csv")
+            n += 1
+        os.replace(log.path, target)
+        self.rotations += 1
+        log = self._files[channel] = _OpenLog(self.log_path(channel), self.header, self._hour(ts))
+        return log
+
+    def _write_rows(self, batch):
+        """Write one drained batch of (channel, row, enqueued_at, ts) items"""
+        for channel, row, _enqueued, ts in batch:
+            try:
+                self._open(channel, ts).writer.writerow(row)
+            except Exception as e:
+                print(f"Error writing to CSV file for {channel}: {e}")
+
+    def _write_batch(self, batch):
+        started = time.monotonic()
+        self._write_rows(batch)
+        counts = {}
+        for channel, *_ in batch:
+            counts[channel] = counts.get(channel, 0) + 1
+        with self._pending_lock:
+            for channel, n in counts.items():
+                self._pending[channel] -= n
+
+        now = time.monotonic()
+        self.rows_written += len(batch)
+        self.batches_written += 1
+        self.last_write_ms = (now - started) * 1000
+        self.max_write_ms = max(self.max_write_ms, self.last_write_ms)
+        self.last_lag_ms = (now - batch[-1][2]) * 1000
+        self.max_lag_ms = max(self.max_lag_ms, (now - batch[0][2]) * 1000)
+        if self.metrics is not None:
+            self.metrics.write_seconds.observe(now - started)
+            self.metrics.lag_seconds.observe(now - batch[0][2])
+
+    def _sync(self):
+        now = time.monotonic()
+        if now - self._last_flush >= self.flush_interval:
+            for log in self._files.values():
+                log.handle.flush()
+            self._last_flush = now
+        if self.fsync_interval is not None and now - self._last_fsync >= self.fsync_interval:
+            for log in self._files.values():
+                log.handle.flush()
+                os.fsync(log.handle.fileno())
+            self._last_fsync = now
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            try:
+                item = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._sync()
+                continue
+            batch = []
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            stopping = item is None
+            if batch:
+                self._write_batch(batch)
+            self._sync()
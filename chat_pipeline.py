@@ -0,0 +1,242 @@
+# chat_pipeline.py
+import collections
+import queue
+import threading
+import time
+
+OVERFLOW_POLICIES = ("block", "drop_oldest", "sample")
+
+
+class HandlerQueue:
+    """
+    Bounded queue in front of one handler. When it is full, `overflow` decides
+    what happens to a new message:
+
+    * "block": wait for room, pushing backpressure onto the reader (and the TCP socket)
+    * "drop_oldest": discard the oldest queued message to make room
+    * "sample": once the queue is `sample_above` full, keep only one message in
+      `sample_every`; past full, the oldest is dropped as with "drop_oldest"
+    """
+
+    def __init__(self, max_size: int = 10000, overflow: str = "block", sample_every: int = 10,
+                 sample_above: float = 0.5):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow!r}; use one of {', '.join(OVERFLOW_POLICIES)}")
+        self.max_size = max(1, max_size)
+        self.overflow = overflow
+        self.sample_every = max(1, sample_every)
+        self.sample_threshold = int(self.max_size * sample_above)
+        self.items = collections.deque()
+        self.cond = threading.Condition()
+        self.closed = False
+        self.scheduled = False  # queued for, or being run by, a worker
+        self.offered = 0
+        self.dropped = 0
+        self.delivered = 0
+        self.max_depth = 0
+
+    def offer(self, item) -> bool:
+        """Add one message under the overflow policy. Returns True if the handler
+        needs scheduling on a worker (the caller then hands it to the pool). Once the
+        queue is closed every message is dropped, including one a producer was blocked on."""
+        with self.cond:
+            self.offered += 1
+            items = self.items
+            if self.closed:
+                self.dropped += 1
+                return False
+            if len(items) >= self.sample_threshold and self.overflow == "sample" \
+                    and self.offered % self.sample_every:
+                self.dropped += 1
+                return False
+            if len(items) >= self.max_size:
+                if self.overflow == "block":
+                    while len(items) >= self.max_size and not self.closed:
+                        self.cond.wait()
+                    if self.closed:
+                        self.dropped += 1
+                        return False
+                else:
+                    items.popleft()
+                    self.dropped += 1
+            items.append(item)
+            if len(items) > self.max_depth:
+                self.max_depth = len(items)
+            if self.scheduled:
+                return False
+            self.scheduled = True
+            return True
+
+    def take(self, n: int) -> list:
+        """Remove up to n messages and wake blocked producers"""
+        with self.cond:
+            items = self.items
+            batch = [items.popleft() for _ in range(min(n, len(items)))]
+            self.cond.notify_all()
+            return batch
+
+    def finish(self) -> bool:
+        """Called by a worker after a batch. Returns True if more messages are waiting
+        (the handler stays scheduled), otherwise marks it idle."""
+        with self.cond:
+            if self.items:
+                return True
+            self.scheduled = False
+            self.cond.notify_all()
+            return False
+
+    def wait_idle(self, timeout=None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.cond:
+            while self.scheduled:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.cond.wait(remaining)
+            return True
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def __len__(self):
+        return len(self.items)
+
+
+class _Registration:
+    __slots__ = ("name", "handler", "queue", "batch_size", "calls", "errors", "busy_seconds")
+
+    def __init__(self, name, handler, handler_queue, batch_size):
+        self.name = name
+        self.handler = handler
+        self.queue = handler_queue
+        self.batch_size = batch_size
+        self.calls = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+
+
+class ChatPipeline:
+    """
+    Fan chat messages out to registered handlers without running them on the
+    socket-reading thread.
+
+    `publish()` only appends to each handler's bounded HandlerQueue; a pool of
+    `workers` threads delivers messages to handlers in batches of up to
+    `batch_size` (whatever has queued up, so batches grow under load). A handler
+    runs on one worker at a time, so it sees its messages in order and needs no
+    locking of its own, and a slow handler only fills its own queue.
+
+        pipeline = ChatPipeline(workers=4)
+        pipeline.register(lambda batch: store.add(batch), name="store", overflow="drop_oldest")
+        reader = TwitchChatReader(channels, pipeline=pipeline)
+    """
+
+    def __init__(self, workers: int = 2):
+        self.workers = max(1, workers)
+        self.handlers = {}
+        self._ready = queue.SimpleQueue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def register(self, handler, name=None, batch_size: int = 100, max_queue: int = 10000,
+                 overflow: str = "block", sample_every: int = 10):
+        """
+        Add a handler called with lists of message_data dicts. Returns the handler,
+        so this also works as a decorator: `@pipeline.register`.
+        """
+        name = name or getattr(handler, "__name__", None) or f"handler{len(self.handlers)}"
+        with self._lock:
+            if name in self.handlers:
+                raise ValueError(f"A handler named {name!r} is already registered")
+            handlers = dict(self.handlers)
+            handlers[name] = _Registration(name, handler, HandlerQueue(max_queue, overflow, sample_every),
+                                           max(1, batch_size))
+            self.handlers = handlers  # replaced, not mutated, so publish() never sees it change
+        return handler
+
+    def unregister(self, name):
+        with self._lock:
+            handlers = dict(self.handlers)
+            registration = handlers.pop(name)
+            self.handlers = handlers
+        registration.queue.close()
+
+    def start(self):
+        """Start the worker threads (idempotent)"""
+        with self._lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        return self
+
+    def publish(self, message_data):
+        """Queue one message for every handler. Called from the reader's thread."""
+        ready = self._ready
+        for registration in self.handlers.values():
+            if registration.queue.offer(message_data):
+                ready.put(registration)
+
+    def _work(self):
+        while True:
+            registration = self._ready.get()
+            if registration is None:
+                return
+            handler_queue = registration.queue
+            batch = handler_queue.take(registration.batch_size)
+            if batch:
+                started = time.perf_counter()
+                try:
+                    registration.handler(batch)
+                except Exception as e:
+                    registration.errors += 1
+                    print(f"Error in chat handler {registration.name} ({len(batch)} messages): {e}")
+                registration.busy_seconds += time.perf_counter() - started
+                registration.calls += 1
+                handler_queue.delivered += len(batch)
+            if handler_queue.finish():
+                self._ready.put(registration)  # back of the line, so other handlers get a turn
+
+    def flush(self, timeout=None) -> bool:
+        """Wait until every queued message has been handled"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for registration in list(self.handlers.values()):
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not registration.queue.wait_idle(remaining):
+                return False
+        return True
+
+    def close(self, timeout=None):
+        """Deliver what is queued, then stop the workers"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._threads and not self.flush(timeout):
+            print("Chat handlers did not drain in time; remaining messages were dropped")
+        for registration in self.handlers.values():
+            registration.queue.close()
+        for _ in self._threads:
+            self._ready.put(None)
+        for thread in self._threads:
+            thread.join(timeout=1)
+        self._threads = []
+
+    def stats(self):
+        """{handler name: queue depth, drops, deliveries and handler time}"""
+        return {
+            name: {
+                "queue_depth": len(r.queue),
+                "max_depth": r.queue.max_depth,
+                "overflow": r.queue.overflow,
+                "offered": r.queue.offered,
+                "dropped": r.queue.dropped,
+                "delivered": r.queue.delivered,
+                "batches": r.calls,
+                "errors": r.errors,
+                "busy_seconds": r.busy_seconds,
+            }
+            for name, r in self.handlers.items()
+        }
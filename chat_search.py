@@ -0,0 +1,626 @@
+# chat_search.py
+import csv
+import hashlib
+import itertools
+import json
+import os
+import queue
+import re
+import sqlite3
+import string
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from chat_store import SOURCE_LIVE, SOURCE_VOD, epoch_ms
+
+# Punctuation becomes spaces before splitting chat into words; NUL separates messages in a batch
+_WORD_BREAKS = str.maketrans({c: " " for c in string.punctuation})
+_MESSAGE_BREAK = "\x00"
+
+SEARCH_FORMATS = (".jsonl", ".json", ".csv", ".parquet", ".chatz")
+_SQL_CHUNK = 900  # stays under SQLite's host-parameter limit
+_FILTERS = ("channel", "vod_id", "author")  # indexed metadata columns search() can filter on
+# Message id in a reader CSV log's tags column: the raw IRC tag string, or str(dict) in older logs
+_TAG_ID = re.compile(r"(?:^|[@;])id=([^;]+)|'id': '([^']+)'")
+
+
+def _require_numpy():
+    try:
+        import numpy as np
+    except ImportError as e:
+        raise ImportError("Chat search requires numpy: pip install numpy") from e
+    return np
+
+
+def _require_hnswlib():
+    try:
+        import hnswlib
+    except ImportError as e:
+        raise ImportError("The HNSW backend requires hnswlib: pip install hnswlib") from e
+    return hnswlib
+
+
+def message_key(channel, timestamp_ms, author, message) -> str:
+    """Stable id for chat that arrived without one (e.g. live rows from a CSV log)"""
+    raw = f"{channel}\x1f{timestamp_ms}\x1f{author}\x1f{message}".encode("utf-8")
+    return "sha1:" + hashlib.sha1(raw).hexdigest()
+
+
+class HashingEmbedder:
+    """
+    Feature-hashing embedder needing no model: every word and its character
+    n-grams ("<kekw>" -> "<ke", "kek", ...) hash to one of `dim` signed buckets and
+    a message is the L2-normalised sum over its words, so "KEKWWW" still lands near
+    "kekw". crc32 (not hash()) keeps vectors identical across processes.
+
+    Each word's features are computed once and kept in a CSR table; a batch of
+    messages is then one split, one dict lookup per word and a single bincount.
+    """
+
+    def __init__(self, dim: int = 256, ngram: int = 3, word_weight: float = 2.0, max_vocab: int = 1_000_000):
+        self.dim = dim
+        self.ngram = ngram
+        self.word_weight = word_weight
+        self.max_vocab = max_vocab
+        self.name = f"hashing-{dim}-{ngram}-{word_weight:g}"
+        self._reset()
+
+    def _reset(self):
+        np = _require_numpy()
+        self._vocab = {_MESSAGE_BREAK: 0}
+        self._offsets = np.zeros(2, dtype=np.int64)  # word id -> its slice of _buckets / _weights
+        self._buckets = np.zeros(0, dtype=np.int64)
+        self._weights = np.zeros(0, dtype=np.float32)
+
+    def _features(self, word: str):
+        wrapped = f"<{word}>"
+        grams = [(word, self.word_weight)]
+        grams.extend((wrapped[i:i + self.ngram], 1.0) for i in range(max(1, len(wrapped) - self.ngram + 1)))
+        for gram, weight in grams:
+            h = zlib.crc32(gram.encode("utf-8"))
+            yield h % self.dim, weight if h & 0x80000000 else -weight
+
+    def _learn(self, words):
+        """Add feature rows for words not seen before"""
+        np = _require_numpy()
+        buckets, weights, lengths = [], [], []
+        for word in words:
+            features = list(self._features(word))
+            self._vocab[word] = len(self._vocab)
+            buckets.extend(b for b, _ in features)
+            weights.extend(w for _, w in features)
+            lengths.append(len(features))
+        self._offsets = np.concatenate((self._offsets, self._offsets[-1] + np.cumsum(lengths)))
+        self._buckets = np.concatenate((self._buckets, np.asarray(buckets, dtype=np.int64)))
+        self._weights = np.concatenate((self._weights, np.asarray(weights, dtype=np.float32)))
+
+    def embed(self, texts) -> "np.ndarray":
+        """(len(texts), dim) float32 unit vectors (all-zero for messages with no words)."""
+        np = _require_numpy()
+        texts = list(texts)
+        n = len(texts)
+        if not n:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        if len(self._vocab) > self.max_vocab:
+            self._reset()  # features are deterministic, so this only costs recomputation
+        words = f" {_MESSAGE_BREAK} ".join(texts).lower().translate(_WORD_BREAKS).split()
+        ids = np.fromiter(map(self._vocab.get, words, itertools.repeat(-1)), dtype=np.int64, count=len(words))
+        new = np.flatnonzero(ids < 0)
+        if new.size:
+            self._learn(dict.fromkeys(words[i] for i in new))
+            ids[new] = [self._vocab[words[i]] for i in new]
+
+        message_of_word = np.cumsum(ids == 0)
+        keep = ids > 0
+        ids, message_of_word = ids[keep], message_of_word[keep]
+        starts = self._offsets[ids]
+        lengths = self._offsets[ids + 1] - starts
+        # Position of every feature of every word: run starts repeated plus an offset within each run
+        ends = np.cumsum(lengths)
+        positions = np.repeat(starts - ends + lengths, lengths) + np.arange(int(ends[-1]) if ends.size else 0)
+        cells = np.repeat(message_of_word, lengths) * self.dim + self._buckets[positions]
+        vectors = np.bincount(cells, weights=self._weights[positions], minlength=n * self.dim)
+        vectors = vectors.reshape(n, self.dim).astype(np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+class SentenceTransformerEmbedder:
+    """A local sentence-transformers model run on CPU (pip install sentence-transformers)."""
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", batch_size: int = 256, device: str = "cpu"):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError("Model embeddings require sentence-transformers: "
+                              "pip install sentence-transformers") from e
+        self.model = SentenceTransformer(model_name, device=device)
+        self.batch_size = batch_size
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = f"sentence-transformers/{model_name}"
+
+    def embed(self, texts):
+        np = _require_numpy()
+        vectors = self.model.encode(list(texts), batch_size=self.batch_size, normalize_embeddings=True,
+                                    convert_to_numpy=True, show_progress_bar=False)
+        return vectors.astype(np.float32, copy=False)
+
+
+class _HnswVectors:
+    """hnswlib graph on inner product, grown in place and saved to one file"""
+
+    def __init__(self, path: Path, dim: int, M: int, ef_construction: int, ef_search: int,
+                 capacity: int = 100_000):
+        self.path = path
+        self.dim = dim
+        self.M = M
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.capacity = capacity
+        if path.exists():
+            self.index = _require_hnswlib().Index(space="ip", dim=dim)
+            self.index.load_index(str(path))
+            self.index.set_ef(ef_search)
+        else:
+            self.index = self._new_index(capacity)
+
+    def _new_index(self, capacity: int):
+        index = _require_hnswlib().Index(space="ip", dim=self.dim)
+        index.init_index(max_elements=max(1, capacity), ef_construction=self.ef_construction, M=self.M)
+        index.set_ef(self.ef_search)
+        return index
+
+    def end(self) -> int:
+        """One past the highest label stored"""
+        return max(self.index.get_ids_list(), default=-1) + 1 if self.index.get_current_count() else 0
+
+    def add(self, vectors, labels):
+        needed = self.index.get_current_count() + len(labels)
+        if needed > self.index.get_max_elements():
+            self.index.resize_index(max(needed, 2 * self.index.get_max_elements()))
+        self.index.add_items(vectors, labels)
+
+    def get(self, labels):
+        return self.index.get_items(labels, return_type="numpy")
+
+    def search(self, vector, k: int):
+        k = min(k, self.index.get_current_count())
+        if k <= 0:
+            return [], []
+        self.index.set_ef(max(self.ef_search, k))  # ef must be at least k
+        labels, distances = self.index.knn_query(vector, k=k)
+        return labels[0].tolist(), (1.0 - distances[0]).tolist()
+
+    def truncate(self, end: int):
+        """Rebuild the graph without labels >= end (vectors saved whose metadata never was)"""
+        keep = sorted(label for label in self.index.get_ids_list() if label < end)
+        index = self._new_index(max(self.capacity, len(keep)))
+        if keep:
+            index.add_items(self.index.get_items(keep, return_type="numpy"), keep)
+        self.index = index
+        self.save()
+
+    def save(self):
+        tmp = self.path.with_name(self.path.name + ".part")
+        self.index.save_index(str(tmp))
+        os.replace(tmp, self.path)
+
+
+class _FlatVectors:
+    """Exact search without hnswlib: float32 rows appended to a file, scanned in chunks"""
+
+    def __init__(self, path: Path, dim: int, chunk: int = 262_144):
+        self.path = path
+        self.dim = dim
+        self.chunk = chunk
+        self.path.touch()
+        self._count = self.path.stat().st_size // (4 * dim)
+
+    def end(self) -> int:
+        return self._count
+
+    def add(self, vectors, labels):
+        if labels[0] != self._count:
+            raise ValueError("flat vector labels must be appended in order")
+        with open(self.path, "ab") as f:
+            f.write(vectors.tobytes())
+        self._count += len(labels)
+
+    def _rows(self):
+        np = _require_numpy()
+        return np.memmap(self.path, dtype=np.float32, mode="r", shape=(self._count, self.dim))
+
+    def get(self, labels):
+        return self._rows()[labels]
+
+    def search(self, vector, k: int):
+        np = _require_numpy()
+        n = self._count
+        k = min(k, n)
+        if k <= 0:
+            return [], []
+        rows = self._rows()
+        best_labels, best_scores = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        for start in range(0, n, self.chunk):
+            scores = rows[start:start + self.chunk] @ vector[0]
+            top = np.argpartition(-scores, k - 1)[:k] if len(scores) > k else np.arange(len(scores))
+            best_labels = np.concatenate((best_labels, top + start))
+            best_scores = np.concatenate((best_scores, scores[top]))
+            if len(best_labels) > k:
+                keep = np.argpartition(-best_scores, k - 1)[:k]
+                best_labels, best_scores = best_labels[keep], best_scores[keep]
+        order = np.argsort(-best_scores)
+        return best_labels[order].tolist(), best_scores[order].tolist()
+
+    def truncate(self, end: int):
+        os.truncate(self.path, end * 4 * self.dim)
+        self._count = end
+
+    def save(self):
+        pass
+
+
+class ChatSearchIndex:
+    """
+    Semantic search over VOD and live chat in `directory`.
+
+    Messages are embedded `batch_size` at a time (HashingEmbedder unless another
+    embedder with `dim`, `name` and `embed(texts)` is given) into an HNSW graph
+    (`backend="hnsw"`, needs hnswlib) or an exact flat file scan (`"flat"`);
+    `"auto"` picks HNSW when hnswlib is installed. Message text and metadata live
+    in SQLite keyed by the vector label, with message ids unique so anything
+    already embedded is skipped. Appends are incremental; `save()` (or `close()`)
+    writes the graph to disk. Filtered searches matching at most
+    `exact_filter_limit` messages score those messages exactly instead of
+    walking the graph.
+    """
+
+    def __init__(self, directory="chat_index", embedder=None, backend: str = "auto", batch_size: int = 4096,
+                 M: int = 16, ef_construction: int = 64, ef_search: int = 64, exact_filter_limit: int = 50_000):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.embedder = embedder or HashingEmbedder()
+        self.batch_size = batch_size
+        self.exact_filter_limit = exact_filter_limit
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.directory / "messages.sqlite3"), check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS messages (
+                    label INTEGER PRIMARY KEY,
+                    id TEXT NOT NULL UNIQUE,
+                    source TEXT,
+                    channel TEXT,
+                    vod_id TEXT,
+                    timestamp_ms INTEGER,
+                    vod_time_s REAL,
+                    author TEXT,
+                    message TEXT
+                )""")
+            for column in _FILTERS:
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS messages_{column} ON messages ({column})")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._check_meta("embedder", self.embedder.name)
+        self._check_meta("dim", str(self.embedder.dim))
+
+        if backend == "auto":
+            stored = self._conn.execute("SELECT value FROM meta WHERE key = 'backend'").fetchone()
+            backend = stored[0] if stored else "auto"
+        if backend == "auto":
+            try:
+                _require_hnswlib()
+                backend = "hnsw"
+            except ImportError:
+                backend = "flat"
+        self._check_meta("backend", backend)
+        if backend == "hnsw":
+            self.vectors = _HnswVectors(self.directory / "vectors.hnsw", self.embedder.dim, M,
+                                        ef_construction, ef_search)
+        elif backend == "flat":
+            self.vectors = _FlatVectors(self.directory / "vectors.f32", self.embedder.dim)
+        else:
+            raise ValueError(f"Unknown backend {backend!r}; use 'auto', 'hnsw' or 'flat'")
+        self.backend = backend
+        self._recover()
+
+        self.embedded = self.duplicates = 0
+        self.embed_seconds = self.index_seconds = 0.0
+
+    def _check_meta(self, key: str, value: str):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            with self._conn:
+                self._conn.execute("INSERT INTO meta VALUES (?, ?)", (key, value))
+        elif row[0] != value:
+            raise ValueError(f"{self.directory} was built with {key}={row[0]}, not {value}")
+
+    def _recover(self):
+        """Line metadata and vectors up again after a run that stopped between the two writes"""
+        meta_end = self._conn.execute("SELECT COALESCE(MAX(label) + 1, 0) FROM messages").fetchone()[0]
+        vector_end = self.vectors.end()
+        if meta_end > vector_end:
+            # Vectors never saved: forget the rows so the messages are embedded again next time
+            with self._conn:
+                self._conn.execute("DELETE FROM messages WHERE label >= ?", (vector_end,))
+        elif vector_end > meta_end:
+            self.vectors.truncate(meta_end)
+        self._next_label = self.vectors.end()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+    # -- ingest --------------------------------------------------------
+    def _unseen(self, rows: list) -> list:
+        """Drop rows whose id is repeated in the batch or already indexed"""
+        rows = list({row[0]: row for row in rows}.values())
+        ids = [row[0] for row in rows]
+        seen = set()
+        for i in range(0, len(ids), _SQL_CHUNK):
+            chunk = ids[i:i + _SQL_CHUNK]
+            seen.update(r[0] for r in self._conn.execute(
+                f"SELECT id FROM messages WHERE id IN ({','.join('?' * len(chunk))})", chunk))
+        return [row for row in rows if row[0] not in seen]
+
+    def _add_rows(self, rows: Iterable[tuple]) -> int:
+        """Embed and index (id, source, channel, vod_id, timestamp_ms, vod_time_s, author, message) rows."""
+        np = _require_numpy()
+        added = 0
+        rows = iter(rows)
+        while True:
+            chunk = list(itertools.islice(rows, self.batch_size))
+            if not chunk:
+                break
+            batch = [row for row in chunk if row[7]]
+            with self._lock:
+                fresh = self._unseen(batch)
+                self.duplicates += len(batch) - len(fresh)
+                if not fresh:  # nothing new (or only empty messages) in this chunk
+                    continue
+                started = time.perf_counter()
+                vectors = self.embedder.embed([row[7] for row in fresh])
+                embedded = time.perf_counter()
+                labels = np.arange(self._next_label, self._next_label + len(fresh), dtype=np.int64)
+                self.vectors.add(vectors, labels)
+                with self._conn:
+                    self._conn.executemany("INSERT INTO messages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                           [(int(label), *row) for label, row in zip(labels, fresh)])
+                self._next_label += len(fresh)
+                self.embed_seconds += embedded - started
+                self.index_seconds += time.perf_counter() - embedded
+                self.embedded += len(fresh)
+                added += len(fresh)
+        return added
+
+    def add_vod_messages(self, records: Iterable[dict], vod_id=None, channel: Optional[str] = None) -> int:
+        """Index TwitchVODChatLogger records (dicts with id, timestamp_ms, vod_time_s, author, message)."""
+        vod_id = str(vod_id) if vod_id is not None else None
+        return self._add_rows(
+            (r.get("id") or message_key(channel or vod_id, r.get("timestamp_ms"), r.get("author"), r.get("message")),
+             SOURCE_VOD, channel, vod_id, epoch_ms(r.get("timestamp_ms")), r.get("vod_time_s"), r.get("author"),
+             r.get("message"))
+            for r in records)
+
+    def add_live_messages(self, messages: Iterable[dict]) -> int:
+        """Index TwitchChatReader message_data dicts (the tags' `id` is the message id)."""
+        def rows():
+            for m in messages:
+                ts = int(m.get("timestamp", 0) * 1000)
+                author = m["username"].lower()
+                message_id = (m.get("tags") or {}).get("id") or message_key(m["channel"], ts, author, m["message"])
+                yield message_id, SOURCE_LIVE, m["channel"], None, ts, None, author, m["message"]
+        return self._add_rows(rows())
+
+    def add_vod_file(self, path, vod_id=None, channel: Optional[str] = None) -> int:
+        """
+        Index a VOD chat export (.jsonl, .json, .csv or .parquet). The VOD id defaults
+        to the `<prefix>_<vod_id>.<ext>` file name stream_multiple_vods writes.
+        """
+        path = Path(path)
+        if vod_id is None:
+            vod_id = path.stem.rsplit("_", 1)[-1]
+        return self.add_vod_messages(iter_chat_export(path), vod_id=vod_id, channel=channel)
+
+    def add_chat_log(self, path) -> int:
+        """Index a TwitchChatReader CSV log (timestamp, username, message, channel, tags, raw)."""
+        def rows():
+            with open(path, newline="", encoding="utf-8") as f:
+                last = (None, None)
+                for row in csv.DictReader(f):
+                    if row["timestamp"] != last[0]:
+                        try:
+                            ms = int(time.mktime(time.strptime(row["timestamp"], "%Y-%m-%d %H:%M:%S")) * 1000)
+                        except ValueError:
+                            ms = None
+                        last = (row["timestamp"], ms)
+                    author = (row["username"] or "").lower()
+                    found = _TAG_ID.search(row.get("tags") or "")
+                    message_id = (found.group(1) or found.group(2)) if found else message_key(row["channel"], last[1], author,
+                                                                           row["message"])
+                    yield message_id, SOURCE_LIVE, row["channel"], None, last[1], None, author, row["message"]
+        return self._add_rows(rows())
+
+    def add_directory(self, chat_dir="chat_logs") -> int:
+        """Index every VOD export and reader CSV log in a directory; already-indexed messages are skipped."""
+        added = 0
+        for path in sorted(Path(chat_dir).iterdir()):
+            if path.suffix.lower() not in SEARCH_FORMATS:
+                continue
+            if path.suffix.lower() == ".chatz" and "_chat_log" in path.name:
+                continue  # live archives: index them as they are read with LiveChatIndexer instead
+            count = self.add_chat_log(path) if "_chat_log" in path.name else self.add_vod_file(path)
+            print(f"Indexed {count} new messages from {path}")
+            added += count
+        return added
+
+    # -- query ---------------------------------------------------------
+    def search(self, query: str, k: int = 10, channel: Optional[str] = None, vod_id=None,
+               author: Optional[str] = None) -> List[dict]:
+        """
+        The k messages most similar to `query` (dicts with score and the stored fields),
+        optionally restricted to a channel, VOD or author.
+        """
+        filters = {key: str(value) for key, value in
+                   (("channel", channel), ("vod_id", vod_id), ("author", author.lower() if author else None))
+                   if value is not None}
+        with self._lock:
+            # Under the lock: HashingEmbedder grows its vocabulary while embedding, and a
+            # LiveChatIndexer may be embedding on its own thread
+            vector = self.embedder.embed([query])
+            if filters:
+                where = " AND ".join(f"{column} = ?" for column in filters)
+                labels = [r[0] for r in self._conn.execute(
+                    f"SELECT label FROM messages WHERE {where} LIMIT ?",
+                    (*filters.values(), self.exact_filter_limit + 1))]
+                if len(labels) <= self.exact_filter_limit:
+                    return self._exact(vector, labels, k)
+            fetch = k if not filters else k * 10
+            total = self._next_label
+            while True:
+                labels, scores = self.vectors.search(vector, fetch)
+                results = self._rows_for(labels, scores, filters)
+                if len(results) >= k or fetch >= total:
+                    return results[:k]
+                fetch *= 4  # filters removed too many candidates
+
+    def _exact(self, vector, labels, k: int) -> List[dict]:
+        """Score a small candidate set directly"""
+        np = _require_numpy()
+        if not labels:
+            return []
+        scores = self.vectors.get(labels) @ vector[0]
+        top = np.argsort(-scores)[:k]
+        return self._rows_for([labels[i] for i in top], scores[top].tolist(), {})
+
+    def _rows_for(self, labels, scores, filters) -> List[dict]:
+        found = {}
+        columns = "label, id, source, channel, vod_id, timestamp_ms, vod_time_s, author, message"
+        for i in range(0, len(labels), _SQL_CHUNK):
+            chunk = labels[i:i + _SQL_CHUNK]
+            query = f"SELECT {columns} FROM messages WHERE label IN ({','.join('?' * len(chunk))})"
+            for row in self._conn.execute(query, chunk):
+                found[row[0]] = row
+        names = columns.split(", ")
+        results = []
+        for label, score in zip(labels, scores):
+            row = found.get(label)
+            if row is None:
+                continue
+            result = dict(zip(names[1:], row[1:]))
+            if all(result[key] == value for key, value in filters.items()):
+                result["score"] = round(float(score), 4)
+                results.append(result)
+        return results
+
+    # -- bookkeeping ---------------------------------------------------
+    def stats(self) -> dict:
+        """Messages indexed, what this session embedded and skipped, and throughput."""
+        return {
+            "messages": len(self),
+            "backend": self.backend,
+            "embedder": self.embedder.name,
+            "embedded": self.embedded,
+            "duplicates_skipped": self.duplicates,
+            "embed_per_sec": self.embedded / self.embed_seconds if self.embed_seconds else 0.0,
+            "index_per_sec": self.embedded / self.index_seconds if self.index_seconds else 0.0,
+        }
+
+    def save(self):
+        """Write the vector index to disk (metadata is committed per batch)."""
+        with self._lock:
+            self.vectors.save()
+
+    def close(self):
+        self.save()
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_chat_export(path):
+    """Records of a VOD chat export written by TwitchVODChatLogger (.jsonl, .json, .csv, .parquet or .chatz)."""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(str(path)).iter_batches():
+            yield from batch.to_pylist()
+    elif suffix == ".csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                row["vod_time_s"] = float(row["vod_time_s"]) if row.get("vod_time_s") else None
+                yield row
+    elif suffix == ".json":
+        with open(path, encoding="utf-8") as f:
+            yield from json.load(f)
+    elif suffix == ".chatz":
+        from chat_archive import ChatArchiveReader
+        yield from ChatArchiveReader(path)
+    else:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class LiveChatIndexer:
+    """
+    Index live chat from a background thread so embedding never blocks the reader.
+
+    Pass as `TwitchChatReader(..., indexer=LiveChatIndexer(index))`; messages are
+    queued by `observe()` and indexed `batch_size` at a time, or after
+    `flush_interval` seconds when chat is slow.
+    """
+
+    def __init__(self, index: ChatSearchIndex, batch_size: int = 1000, flush_interval: float = 2.0):
+        self.index = index
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self.indexed = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def observe(self, message_data: dict) -> None:
+        self.queue.put(message_data)
+
+    def _run(self):
+        batch, deadline, stopping = [], None, False
+        while not stopping:
+            try:
+                item = self.queue.get(timeout=self.flush_interval if deadline is None
+                                      else max(0.0, deadline - time.monotonic()))
+                if item is None:
+                    stopping = True
+                else:
+                    batch.append(item)
+                    deadline = deadline or time.monotonic() + self.flush_interval
+            except queue.Empty:
+                pass
+            if batch and (stopping or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                try:
+                    self.indexed += self.index.add_live_messages(batch)
+                except Exception as e:
+                    print(f"Error indexing {len(batch)} chat messages: {e}")
+                batch, deadline = [], None
+
+    def stop(self):
+        """Index whatever is queued and stop the thread."""
+        if self._thread.is_alive():
+            self.queue.put(None)
+            self._thread.join()
+
+    def close(self):
+        """Stop, then write the index's vectors to disk (the index itself stays open for searching)."""
+        self.stop()
+        self.index.save()
@@ -0,0 +1,196 @@
+# chat_sinks.py
+import csv
+import json
+from pathlib import Path
+
+# Fields produced by TwitchVODChatLogger._extract_message, in column order
+CHAT_FIELDS = [
+    "id", "timestamp_ms", "vod_time_s", "vod_time_str", "author", "display_name",
+    "badges", "color", "message", "message_type",
+]
+
+# Low-cardinality columns stored dictionary-encoded (categoricals in pandas)
+DICTIONARY_FIELDS = ("author", "badges", "color", "message_type")
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet output requires pyarrow: pip install pyarrow") from e
+    return pa, pq
+
+
+def chat_schema():
+    """Arrow schema for VOD chat records."""
+    pa, _ = _require_pyarrow()
+    dict_string = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("id", pa.string()),
+        ("timestamp_ms", pa.int64()),
+        ("vod_time_s", pa.float64()),
+        ("vod_time_str", pa.string()),
+        ("author", dict_string),
+        ("display_name", pa.string()),
+        ("badges", dict_string),
+        ("color", dict_string),
+        ("message", pa.string()),
+        ("message_type", dict_string),
+    ])
+
+
+class JsonLinesSink:
+    """Write one JSON object per line."""
+
+    def __init__(self, path, append: bool = False):
+        self.path = Path(path)
+        self._file = open(self.path, "a" if append else "w", encoding="utf-8", buffering=1 << 16)
+        self.count = 0
+
+    def write(self, record: dict):
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write("\n")
+        self.count += 1
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        """Push buffered rows to the OS so they survive a crash of this process."""
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class JsonArraySink(JsonLinesSink):
+    """Write a JSON array incrementally, one record per line (same shape save_json produces)."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._file.write("[")
+
+    def write(self, record: dict):
+        self._file.write(",\n" if self.count else "\n")
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self.count += 1
+
+    def close(self):
+        self._file.write("\n]\n")
+        super().close()
+
+
+class CsvSink(JsonLinesSink):
+    """Write records as CSV rows with a CHAT_FIELDS header."""
+
+    def __init__(self, path, append: bool = False, fieldnames=CHAT_FIELDS):
+        self.path = Path(path)
+        write_header = not append or not self.path.exists() or self.path.stat().st_size == 0
+        self._file = open(self.path, "a" if append else "w", newline="", encoding="utf-8", buffering=1 << 16)
+        self._writer = csv.DictWriter(self._file, fieldnames=fieldnames)
+        if write_header:
+            self._writer.writeheader()
+        self.count = 0
+
+    def write(self, record: dict):
+        self._writer.writerow(record)
+        self.count += 1
+
+
+class ParquetSink:
+    """
+    Stream chat records into a Parquet file one row group at a time.
+
+    Records are buffered until `row_group_size` is reached, then converted
+    column by column and written, so memory is bounded by one row group.
+    `count` is records accepted (like the other sinks); `flushed` is records
+    already written out as row groups.
+    """
+
+    def __init__(self, path, row_group_size: int = 50_000, compression: str = "zstd"):
+        pa, pq = _require_pyarrow()
+        self._pa = pa
+        self.path = Path(path)
+        self.schema = chat_schema()
+        self.row_group_size = row_group_size
+        self._writer = pq.ParquetWriter(str(self.path), self.schema, compression=compression)
+        self._rows = []
+        self.count = 0
+        self.flushed = 0
+
+    def write(self, record: dict):
+        self._rows.append(record)
+        self.count += 1
+        if len(self._rows) >= self.row_group_size:
+            self.flush()
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        """Write buffered records as a row group."""
+        if not self._rows:
+            return
+        pa, rows = self._pa, self._rows
+        columns = [pa.array([row.get(field.name) for row in rows], type=field.type) for field in self.schema]
+        self._writer.write_table(pa.Table.from_arrays(columns, schema=self.schema))
+        self.flushed += len(rows)
+        self._rows = []
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _chat_store_sink(path, **kwargs):
+    """ChatStoreSink, imported on first use (chat_store builds on this module)"""
+    from chat_store import ChatStoreSink
+    return ChatStoreSink(path, **kwargs)
+
+
+def _chat_archive_sink(path, **kwargs):
+    """
+    ChatArchiveWriter (zstd frames + time index), imported on first use. VOD exports
+    are written once and read many times, so they get compact_archives' large frames
+    and level 9 unless told otherwise.
+    """
+    from chat_archive import ChatArchiveWriter
+    kwargs = {"level": 9, "frame_records": 16384, "frame_bytes": 16384 * 512, **kwargs}
+    return ChatArchiveWriter(path, **kwargs)
+
+
+# Formats whose files can be reopened and appended to when resuming a download
+APPENDABLE_FORMATS = ("csv", "jsonl", "sqlite", "chatz")
+
+SINKS = {
+    "csv": CsvSink,
+    "json": JsonArraySink,
+    "jsonl": JsonLinesSink,
+    "parquet": ParquetSink,
+    "sqlite": _chat_store_sink,  # rows go into a ChatStore database; needs vod_id=
+    "chatz": _chat_archive_sink,  # compressed archive, seekable by vod_time_s
+}
+
+
+def open_sink(path, save_to: str, **kwargs):
+    """Open the incremental writer for a save_to format ('csv', 'json', 'jsonl', 'parquet', 'sqlite' or 'chatz')."""
+    try:
+        sink_cls = SINKS[save_to]
+    except KeyError:
+        raise ValueError(f"Invalid save_to value. Must be one of: {', '.join(SINKS)}.") from None
+    return sink_cls(path, **kwargs)
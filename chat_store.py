@@ -0,0 +1,283 @@
+# chat_store.py
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from chat_log_writer import ChatLogWriter
+from chat_sinks import CHAT_FIELDS
+
+SOURCE_VOD = "vod"
+SOURCE_LIVE = "live"
+
+# Columns of the messages table after the bookkeeping ones, in CHAT_FIELDS order plus live-only extras
+_COLUMNS = ["source", "channel", "vod_id", *CHAT_FIELDS, "tags"]
+_INDEXES = {
+    "messages_vod_time": "vod_id, vod_time_s",
+    "messages_channel_time": "channel, timestamp_ms",
+    "messages_author_time": "author, timestamp_ms",
+    "messages_type": "message_type",
+}
+_INSERT = f"INSERT INTO messages ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' for _ in _COLUMNS)})"
+_MICROSECONDS = 10 ** 14  # epoch values at least this large are microseconds (ms stays below until year 5138)
+
+
+def raw_login(line) -> Optional[str]:
+    """Sender login from a raw `[@tags ]:nick!user@host PRIVMSG ...` line, or None."""
+    if not line:
+        return None
+    if line[0] == "@":
+        start = line.find(" :") + 2
+        if start < 2:
+            return None
+    elif line[0] == ":":
+        start = 1
+    else:
+        return None
+    bang = line.find("!", start)
+    space = line.find(" ", start)
+    return line[start:bang] if start < bang < space else None
+
+
+def epoch_ms(value) -> Optional[int]:
+    """
+    Epoch milliseconds for a VOD record's `timestamp_ms`, which holds chat_downloader's
+    microsecond `timestamp` as exported; values already in ms pass through.
+    """
+    if value is None or value == "":
+        return None
+    value = int(float(value))
+    return value // 1000 if value >= _MICROSECONDS else value
+
+
+class ChatStore:
+    """
+    Live and VOD chat in one SQLite database (WAL mode), queryable without re-parsing files.
+
+    Every message is one row of `messages` with the VOD chat fields (CHAT_FIELDS)
+    plus `source` ('vod' or 'live'), `channel`, `vod_id` and, for live chat, the raw
+    `tags`. Rows are inserted in bulk, one transaction per batch. Indexes on
+    (vod_id, vod_time_s), (channel, timestamp_ms), (author, timestamp_ms) and
+    message_type serve the query helpers. `timestamp_ms` is epoch milliseconds for
+    both sources. Safe to share between threads.
+    """
+
+    def __init__(self, path="chat_logs/chat.sqlite3", cache_mb: int = 64):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # WAL + NORMAL only fsyncs at checkpoints; a power loss can drop the last batches, not corrupt the file
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(f"PRAGMA cache_size=-{cache_mb * 1024}")
+            self._conn.execute("PRAGMA temp_store=MEMORY")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS messages (
+                    source TEXT NOT NULL,
+                    channel TEXT,
+                    vod_id TEXT,
+                    id TEXT,
+                    timestamp_ms INTEGER,
+                    vod_time_s REAL,
+                    vod_time_str TEXT,
+                    author TEXT,
+                    display_name TEXT,
+                    badges TEXT,
+                    color TEXT,
+                    message TEXT,
+                    message_type TEXT,
+                    tags TEXT
+                )""")
+            self._create_indexes()
+
+    def _create_indexes(self):
+        for name, columns in _INDEXES.items():
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON messages ({columns})")
+
+    @contextmanager
+    def bulk_load(self):
+        """
+        Drop the secondary indexes for the duration of a large import and rebuild them
+        once at the end, which beats updating the author index row by row. Queries
+        made meanwhile still work, just without the indexes.
+        """
+        with self._lock, self._conn:
+            for name in _INDEXES:
+                self._conn.execute(f"DROP INDEX IF EXISTS {name}")
+        try:
+            yield self
+        finally:
+            with self._lock, self._conn:
+                self._create_indexes()
+
+    # -- ingest --------------------------------------------------------
+    def insert_vod_messages(self, vod_id, records: Iterable[dict], channel: Optional[str] = None) -> int:
+        """Insert extracted VOD chat records (TwitchVODChatLogger._extract_message dicts) in one transaction."""
+        vod_id = str(vod_id)
+        rows = [(SOURCE_VOD, channel, vod_id, r.get("id"), epoch_ms(r.get("timestamp_ms")),
+                 *(r.get(f) for f in CHAT_FIELDS[2:]), None) for r in records]
+        with self._lock, self._conn:
+            self._conn.executemany(_INSERT, rows)
+        return len(rows)
+
+    def insert_live_messages(self, rows: Iterable[tuple]) -> int:
+        """
+        Insert live chat in one transaction. Each row is
+        (channel, timestamp_ms, login, display_name, message, tags); a missing login
+        falls back to the lowercased display name.
+        """
+        rows = [(SOURCE_LIVE, channel, None, None, ts, None, None,
+                 (login or display_name or "").lower() or None, display_name, None, None, message, "text_message", tags)
+                for channel, ts, login, display_name, message, tags in rows]
+        with self._lock, self._conn:
+            self._conn.executemany(_INSERT, rows)
+        return len(rows)
+
+    def delete_vod(self, vod_id) -> None:
+        """Remove every stored message of a VOD (before downloading it again from the start)."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM messages WHERE vod_id = ?", (str(vod_id),))
+
+    def truncate_vod(self, vod_id, keep: int) -> None:
+        """Keep only the first `keep` messages stored for a VOD (rows past a resume checkpoint)."""
+        if keep <= 0:
+            return self.delete_vod(vod_id)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM messages WHERE vod_id = ? AND rowid > "
+                "(SELECT rowid FROM messages WHERE vod_id = ? ORDER BY rowid LIMIT 1 OFFSET ?)",
+                (str(vod_id), str(vod_id), keep - 1))
+
+    # -- queries -------------------------------------------------------
+    def _select(self, where: str, params: tuple, order: str, limit: Optional[int]) -> List[dict]:
+        query = f"SELECT * FROM messages WHERE {where} ORDER BY {order}"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [dict(r) for r in rows]
+
+    def vod_window(self, vod_id, start_s: float, end_s: float, limit: Optional[int] = None) -> List[dict]:
+        """Messages of a VOD with start_s <= vod_time_s < end_s, in order."""
+        return self._select("vod_id = ? AND vod_time_s >= ? AND vod_time_s < ?",
+                            (str(vod_id), start_s, end_s), "vod_time_s", limit)
+
+    def channel_window(self, channel: str, start_ms: int, end_ms: int, limit: Optional[int] = None) -> List[dict]:
+        """Messages in a channel with start_ms <= timestamp_ms < end_ms, in order."""
+        return self._select("channel = ? AND timestamp_ms >= ? AND timestamp_ms < ?",
+                            (channel, start_ms, end_ms), "timestamp_ms", limit)
+
+    def messages_by_author(self, author: str, limit: Optional[int] = None) -> List[dict]:
+        """Every message by an author (login) across channels and VODs, oldest first."""
+        return self._select("author = ?", (author.lower(),), "timestamp_ms", limit)
+
+    def count(self, vod_id=None, channel=None, message_type=None) -> int:
+        clauses, params = [], []
+        for column, value in (("vod_id", vod_id), ("channel", channel), ("message_type", message_type)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(str(value))
+        query = "SELECT COUNT(*) FROM messages" + (" WHERE " + " AND ".join(clauses) if clauses else "")
+        with self._lock:
+            return self._conn.execute(query, params).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ChatStoreSink:
+    """
+    Incremental writer (same interface as the chat_sinks classes) that inserts one
+    VOD's records into a ChatStore, a transaction per `batch_size` records.
+    Without `append`, rows already stored for the VOD are replaced.
+    """
+
+    def __init__(self, path=None, vod_id=None, channel: Optional[str] = None, append: bool = False,
+                 store: Optional[ChatStore] = None, batch_size: int = 5000):
+        if vod_id is None:
+            raise ValueError("ChatStoreSink needs the vod_id its records belong to")
+        self.store = store or ChatStore(path)
+        self._owns_store = store is None
+        self.vod_id = str(vod_id)
+        self.channel = channel
+        self.batch_size = batch_size
+        self._rows = []
+        self.count = 0
+        if not append:
+            self.store.delete_vod(self.vod_id)
+
+    def write(self, record: dict):
+        self._rows.append(record)
+        self.count += 1
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        """Commit buffered records."""
+        if self._rows:
+            self.store.insert_vod_messages(self.vod_id, self._rows, channel=self.channel)
+            self._rows = []
+
+    def close(self):
+        self.flush()
+        if self._owns_store:
+            self.store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ChatStoreWriter(ChatLogWriter):
+    """
+    ChatLogWriter that inserts live chat into a ChatStore instead of CSV files.
+
+    Pass as `TwitchChatReader(..., log_writer=ChatStoreWriter(store))`: rows are
+    queued the same way and each drained batch becomes one transaction. Times come
+    from the epoch the reader queues with each row; rows queued without one fall
+    back to parsing their local timestamp string (whole seconds). `author` is the
+    login from the raw line's `nick!` prefix; the display name goes to `display_name`.
+    """
+
+    def __init__(self, store: ChatStore, header=None, batch_size=2000, flush_interval=1.0):
+        super().__init__(str(store.path.parent), header or [], batch_size=batch_size,
+                         flush_interval=flush_interval, fsync_interval=None)
+        self.store = store
+        self._last_stamp = (None, None)
+
+    def _timestamp_ms(self, stamp):
+        """Epoch ms for the reader's '%Y-%m-%d %H:%M:%S' local timestamps (consecutive rows share one)"""
+        if stamp != self._last_stamp[0]:
+            try:
+                ms = int(time.mktime(time.strptime(stamp, '%Y-%m-%d %H:%M:%S')) * 1000)
+            except (TypeError, ValueError):
+                ms = None
+            self._last_stamp = (stamp, ms)
+        return self._last_stamp[1]
+
+    def _write_rows(self, batch):
+        rows = []
+        for channel, row, _enqueued, ts in batch:
+            timestamp, username, message, _channel, tags = row[:5]
+            ms = int(ts * 1000) if ts is not None else self._timestamp_ms(timestamp)
+            rows.append((channel, ms, raw_login(row[5]) if len(row) > 5 else None, username, message, tags))
+        try:
+            self.store.insert_live_messages(rows)
+        except Exception as e:
+            print(f"Error writing {len(rows)} chat rows to {self.store.path}: {e}")
+
+    def _sync(self):
+        # Each batch is already committed
+        pass
@@ -0,0 +1,234 @@
+# helix_scheduler.py
+import asyncio
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+try:
+    import aiohttp
+    _AIOHTTP_ERRORS = (aiohttp.ClientError,)
+except ImportError:  # only twitch_client_async needs aiohttp
+    _AIOHTTP_ERRORS = ()
+
+
+class RateLimitScheduler:
+    """
+    Pace Helix requests from the Ratelimit-* response headers.
+
+    Helix reports a token bucket per client: `Ratelimit-Limit` (bucket size),
+    `Ratelimit-Remaining` and `Ratelimit-Reset` (epoch seconds when the bucket
+    is full again). `acquire()` spends a local copy of that bucket and, once it
+    runs low, sleeps only as long as one token takes to refill rather than a
+    fixed delay. `execute()` wraps a request: it waits for a token, updates the
+    bucket from the response, and retries 429s after `Reset` (plus jitter) and
+    5xx responses and connection errors with exponential backoff. It is the
+    only retry layer for Helix calls. `acquire_async()`/`execute_async()` do
+    the same for asyncio code, sharing the bucket with threaded callers.
+    """
+
+    # Raised by send() for network failures worth retrying: requests' exceptions are OSErrors,
+    # aiohttp's are ClientErrors (disconnects, truncated payloads) and asyncio.TimeoutError
+    retry_errors = (OSError, asyncio.TimeoutError, *_AIOHTTP_ERRORS)
+
+    def __init__(self, max_retries: int = 5, base_backoff: float = 1.0, max_backoff: float = 60.0,
+                 jitter: float = 0.5, reserve: int = 1):
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.reserve = reserve  # tokens left untouched for other processes sharing the client ID
+
+        self.limit: Optional[int] = None
+        self.remaining: Optional[float] = None
+        self.reset_at: float = 0.0
+        self._refill_rate = 0.0   # tokens/second, inferred from Remaining and Reset
+        self._updated_at = 0.0
+        self._in_flight = 0       # requests sent whose headers have not come back yet
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.retries = 0
+        self.throttled = 0
+
+    def _available(self, now: float) -> float:
+        """Tokens in the local bucket at `now`, counting linear refill since the last update"""
+        if now >= self.reset_at:
+            # Past Reset the bucket is full; without Ratelimit-Limit its size is unknown, so stop
+            # pacing until the next response's headers rather than waiting on a refill that never comes
+            return float(self.limit) if self.limit is not None else float("inf")
+        available = self.remaining + (now - self._updated_at) * self._refill_rate
+        return min(available, self.limit) if self.limit is not None else available
+
+    def _try_acquire(self, waited: float) -> float:
+        """Take a token if one is available (returns 0) or return how long to sleep first."""
+        with self._lock:
+            now = time.time()
+            if self.remaining is not None:
+                available = self._available(now)
+                if available - self.reserve < 1:
+                    # Sleep just long enough for one token to refill.
+                    needed = 1 + self.reserve - available
+                    delay = needed / self._refill_rate if self._refill_rate else max(0.05, self.reset_at - now)
+                    return min(max(delay, 0.01), self.max_backoff)
+                self.remaining = available - 1
+                self._updated_at = now
+            self._in_flight += 1
+            self.requests += 1
+            if waited:
+                self.waits += 1
+                self.wait_seconds += waited
+            return 0.0
+
+    def acquire(self) -> float:
+        """Block until a request may be sent. Returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            delay = self._try_acquire(waited)
+            if not delay:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+    async def acquire_async(self) -> float:
+        """acquire() for event loops: awaits instead of blocking the thread."""
+        waited = 0.0
+        while True:
+            delay = self._try_acquire(waited)
+            if not delay:
+                return waited
+            await asyncio.sleep(delay)
+            waited += delay
+
+    def release(self) -> None:
+        """Forget an acquired request that never produced a response."""
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+
+    def update(self, headers) -> None:
+        """Refresh the bucket from a response's Ratelimit-* headers (case-insensitive mapping)."""
+        limit = headers.get("Ratelimit-Limit")
+        remaining = headers.get("Ratelimit-Remaining")
+        reset = headers.get("Ratelimit-Reset")
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            if remaining is None:
+                return
+            now = time.time()
+            if limit is not None:
+                self.limit = int(limit)
+            if reset is not None:
+                self.reset_at = float(reset)
+            # Requests still in flight were sent after this response's count was taken.
+            self.remaining = int(remaining) - self._in_flight
+            self._updated_at = now
+            if self.limit is not None and self.reset_at > now:
+                self._refill_rate = max(0.0, self.limit - int(remaining)) / (self.reset_at - now)
+
+    def _backoff(self, attempt: int) -> float:
+        return min(self.max_backoff, self.base_backoff * 2 ** attempt) + random.uniform(0, self.jitter)
+
+    def _retry_delay(self, resp, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying `resp`, or None if it should be returned as is."""
+        if resp.status_code == 429:
+            self.throttled += 1
+            with self._lock:
+                self.remaining = min(self.remaining or 0, 0)
+                delay = max(0.0, self.reset_at - time.time())
+                if self._refill_rate:
+                    delay = min(delay, (1 + self.reserve) / self._refill_rate)
+            delay = (delay or self._backoff(attempt)) + random.uniform(0, self.jitter)
+        elif resp.status_code >= 500:
+            delay = self._backoff(attempt)
+        else:
+            return None
+        if attempt == self.max_retries:
+            return None
+        return self._count_retry(delay)
+
+    def _error_delay(self, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying a request that raised, or None to re-raise."""
+        self.release()
+        if attempt == self.max_retries:
+            return None
+        return self._count_retry(self._backoff(attempt))
+
+    def _count_retry(self, delay: float) -> float:
+        self.retries += 1
+        self.waits += 1
+        self.wait_seconds += delay
+        return delay
+
+    def execute(self, send: Callable):
+        """
+        Call `send()` (which returns a response with .status_code and .headers)
+        under the rate limit, retrying 429 and 5xx responses and connection errors.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire()
+            try:
+                resp = send()
+            except self.retry_errors:
+                delay = self._error_delay(attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            except Exception:
+                self.release()
+                raise
+            self.update(resp.headers)
+            delay = self._retry_delay(resp, attempt)
+            if delay is None:
+                return resp
+            time.sleep(delay)
+        return resp
+
+    async def execute_async(self, send: Callable):
+        """execute() for coroutines: `send()` returns an awaitable response."""
+        for attempt in range(self.max_retries + 1):
+            await self.acquire_async()
+            try:
+                resp = await send()
+            except self.retry_errors:
+                delay = self._error_delay(attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                self.release()
+                raise
+            self.update(resp.headers)
+            delay = self._retry_delay(resp, attempt)
+            if delay is None:
+                return resp
+            await asyncio.sleep(delay)
+        return resp
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "tokens_remaining": self.remaining,
+                "reset_in_s": max(0.0, self.reset_at - time.time()) if self.reset_at else None,
+                "requests": self.requests,
+                "waits": self.waits,
+                "wait_seconds": round(self.wait_seconds, 3),
+                "retries": self.retries,
+                "throttled_429": self.throttled,
+            }
+
+
+_schedulers: Dict[str, RateLimitScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def scheduler_for(client_id: str) -> RateLimitScheduler:
+    """The process-wide scheduler for a client ID (Helix limits are per client)."""
+    with _schedulers_lock:
+        if client_id not in _schedulers:
+            _schedulers[client_id] = RateLimitScheduler()
+        return _schedulers[client_id]
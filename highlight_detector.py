@@ -0,0 +1,238 @@
+# highlight_detector.py
+import csv
+import itertools
+import json
+import os
+import re
+import string
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Chat reactions that usually mean something just happened on stream (phrases work too, at the cost
+# of a regex pass over the whole chat)
+HYPE_KEYWORDS = (
+    "kekw", "lul", "lmao", "omegalul", "pog", "poggers", "pogchamp", "pogu", "monkas", "clip", "clipped",
+    "wtf", "omg", "noway", "holy", "w", "ez", "gg", "sheesh", "letsgo", "hypers",
+)
+
+# Punctuation becomes spaces before splitting chat into words, so "KEKW!!" counts as kekw
+_WORD_BREAKS = str.maketrans({c: " " for c in string.punctuation + "\t\r"})
+_MESSAGE_BREAK = "\n"
+
+HIGHLIGHT_FORMATS = (".jsonl", ".json", ".csv", ".parquet", ".chatz")
+
+
+def _require_numpy():
+    try:
+        import numpy as np
+    except ImportError as e:
+        raise ImportError("Highlight detection requires numpy: pip install numpy") from e
+    return np
+
+
+def load_vod_chat(path) -> Tuple[list, list]:
+    """
+    (vod_time_s values, messages) from a VOD chat export written by TwitchVODChatLogger
+    (.jsonl, .json, .csv, .parquet or .chatz). Messages without a vod_time_s are dropped.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".parquet":
+        import pyarrow.parquet as pq
+        table = pq.read_table(str(path), columns=["vod_time_s", "message"])
+        times, messages = table.column("vod_time_s").to_pylist(), table.column("message").to_pylist()
+    elif suffix == ".csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        times = [float(r["vod_time_s"]) if r.get("vod_time_s") else None for r in rows]
+        messages = [r.get("message") or "" for r in rows]
+    elif suffix == ".chatz":
+        from chat_archive import ChatArchiveReader
+        records = list(ChatArchiveReader(path))
+        times = [r.get("vod_time_s") for r in records]
+        messages = [r.get("message") or "" for r in records]
+    else:
+        with open(path, encoding="utf-8") as f:
+            if suffix == ".json":
+                records = json.load(f)
+            else:
+                records = [json.loads(line) for line in f if line.strip()]
+        times = [r.get("vod_time_s") for r in records]
+        messages = [r.get("message") or "" for r in records]
+    keep = [i for i, t in enumerate(times) if t is not None] if None in times else None
+    if keep is not None:
+        times = [times[i] for i in keep]
+        messages = [messages[i] for i in keep]
+    return times, messages
+
+
+class HighlightDetector:
+    """
+    Find chat spikes in a VOD from its messages' `vod_time_s`.
+
+    Messages are binned into `bin_s`-second buckets. Each bucket's message count
+    and hype-keyword count is scored as a z-score against the preceding
+    `baseline_s` seconds (rolling mean/std from cumulative sums, so everything is
+    array arithmetic). Runs of buckets scoring above `threshold` become
+    highlights, padded by `lead_s` seconds before (the moment chat reacts to) and
+    ranked by peak score.
+    """
+
+    def __init__(self, bin_s: float = 5.0, baseline_s: float = 300.0, threshold: float = 3.0,
+                 keywords: Iterable[str] = HYPE_KEYWORDS, keyword_weight: float = 1.0,
+                 lead_s: float = 20.0, min_std: float = 1.0):
+        self.bin_s = bin_s
+        self.baseline_bins = max(2, int(round(baseline_s / bin_s)))
+        self.threshold = threshold
+        self.keywords = tuple(dict.fromkeys(k.lower() for k in keywords))
+        self.keyword_weight = keyword_weight
+        self.lead_s = lead_s
+        self.min_std = min_std  # keeps near-silent stretches from producing huge z-scores
+        # Single words are looked up token by token; phrases need a regex pass
+        self._keyword_ids = {k: i for i, k in enumerate(self.keywords) if " " not in k}
+        self._keyword_ids[_MESSAGE_BREAK] = -2
+        phrases = [k for k in self.keywords if " " in k]
+        self._phrase_re = re.compile(
+            r"(?<!\w)(" + "|".join(re.escape(p) for p in phrases) + r")(?!\w)") if phrases else None
+
+    def _rolling_z(self, counts):
+        """z-score of each bin against the mean/std of the `baseline_bins` bins before it"""
+        np = _require_numpy()
+        w = self.baseline_bins
+        c = counts.astype(np.float64)
+        cs = np.concatenate(([0.0], np.cumsum(c)))
+        cs2 = np.concatenate(([0.0], np.cumsum(c * c)))
+        idx = np.arange(len(c))
+        lo = np.maximum(idx - w, 0)
+        n = np.maximum(idx - lo, 1)
+        mean = (cs[idx] - cs[lo]) / n
+        var = np.maximum((cs2[idx] - cs2[lo]) / n - mean * mean, 0.0)
+        z = (c - mean) / np.maximum(np.sqrt(var), self.min_std)
+        z[idx < min(w, len(c)) // 2] = 0.0  # not enough history yet
+        return z
+
+    def _keyword_hits(self, messages):
+        """
+        (message index, keyword index) of every keyword occurrence. All chat is lowercased
+        and split into words in single C-level calls with a sentinel between messages, so
+        Python never loops over messages; the message of each word is a cumulative count
+        of sentinels before it.
+        """
+        np = _require_numpy()
+        empty = np.zeros(0, dtype=np.int64)
+        if not self.keywords or not messages:
+            return empty, empty
+        text = f" {_MESSAGE_BREAK} ".join(messages).lower().translate(_WORD_BREAKS)
+        words = text.split(" ")
+        ids = np.fromiter(map(self._keyword_ids.get, words, itertools.repeat(-1)), dtype=np.int64,
+                          count=len(words))
+        message_of_word = np.cumsum(ids == -2)
+        hit = ids >= 0
+        message_index, keyword_index = message_of_word[hit], ids[hit]
+
+        if self._phrase_re is not None:
+            positions, phrases = [], []
+            for m in self._phrase_re.finditer(text):
+                positions.append(m.start())
+                phrases.append(self.keywords.index(m.group(1)))
+            lengths = np.fromiter(map(len, messages), dtype=np.int64, count=len(messages)) + 3
+            starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+            message_index = np.concatenate((message_index, np.searchsorted(
+                starts, np.asarray(positions, dtype=np.int64), side="right") - 1))
+            keyword_index = np.concatenate((keyword_index, np.asarray(phrases, dtype=np.int64)))
+        return message_index, keyword_index
+
+    def detect(self, times, messages=None, top: Optional[int] = 10) -> List[dict]:
+        """
+        Ranked highlights for one VOD: dicts with start_s, end_s, peak_s, score,
+        messages (in the range), rate_z, keyword_z and top_keywords.
+        """
+        np = _require_numpy()
+        times = np.asarray(times, dtype=np.float64)
+        if times.size == 0:
+            return []
+        bins = (times // self.bin_s).astype(np.int64)
+        bins -= min(bins.min(), 0)
+        n_bins = int(bins.max()) + 1
+        counts = np.bincount(bins, minlength=n_bins)
+        rate_z = self._rolling_z(counts)
+
+        hit_bins = keyword_index = np.zeros(0, dtype=np.int64)
+        if messages is not None:
+            message_index, keyword_index = self._keyword_hits(messages)
+            hit_bins = bins[message_index]
+        keyword_counts = np.bincount(hit_bins, minlength=n_bins)
+        keyword_z = self._rolling_z(keyword_counts) if hit_bins.size else np.zeros(n_bins)
+        score = rate_z + self.keyword_weight * keyword_z
+
+        # Runs of bins above the threshold
+        mask = np.concatenate(([False], score > self.threshold, [False]))
+        edges = np.flatnonzero(np.diff(mask.astype(np.int8)))
+        run_starts, run_ends = edges[0::2], edges[1::2]  # [start, end) bin indices
+        if run_starts.size == 0:
+            return []
+        # One iteration per highlight run, not per message
+        peak_bins = np.array([s + int(np.argmax(score[s:e])) for s, e in zip(run_starts, run_ends)])
+        peaks = score[peak_bins]
+        order = np.argsort(-peaks)
+        if top is not None:
+            order = order[:top]
+
+        sorted_hits = np.argsort(hit_bins, kind="stable")
+        hits_sorted = hit_bins[sorted_hits]
+        highlights = []
+        for i in order:
+            s, e = int(run_starts[i]), int(run_ends[i])
+            lo, hi = np.searchsorted(hits_sorted, [s, e])
+            in_range = np.bincount(keyword_index[sorted_hits[lo:hi]], minlength=len(self.keywords))
+            top_keywords = [(self.keywords[k], int(in_range[k])) for k in np.argsort(-in_range)[:5] if in_range[k]]
+            highlights.append({
+                "start_s": max(0.0, s * self.bin_s - self.lead_s),
+                "end_s": e * self.bin_s,
+                "peak_s": int(peak_bins[i]) * self.bin_s,
+                "score": round(float(peaks[i]), 2),
+                "messages": int(counts[s:e].sum()),
+                "rate_z": round(float(rate_z[peak_bins[i]]), 2),
+                "keyword_z": round(float(keyword_z[peak_bins[i]]), 2),
+                "top_keywords": top_keywords,
+            })
+        return highlights
+
+    def detect_file(self, path, top: Optional[int] = 10) -> List[dict]:
+        times, messages = load_vod_chat(path)
+        return self.detect(times, messages, top=top)
+
+
+def _detect_file(args):
+    detector, path, top = args
+    try:
+        return str(path), detector.detect_file(path, top=top), None
+    except Exception as e:
+        return str(path), [], f"{type(e).__name__}: {e}"
+
+
+def detect_directory(chat_dir="chat_logs", detector: Optional[HighlightDetector] = None, top: Optional[int] = 10,
+                     workers: Optional[int] = None, output_file: Optional[str] = None) -> Dict[str, List[dict]]:
+    """
+    Run highlight detection over every VOD chat export in a directory, one file per
+    worker process. Returns {path: highlights}; files that fail to load are reported
+    and skipped. With output_file, the result is also written there as JSON.
+    """
+    detector = detector or HighlightDetector()
+    paths = sorted(p for p in Path(chat_dir).iterdir()
+                   if p.suffix.lower() in HIGHLIGHT_FORMATS and "_chat_log" not in p.name)  # skip live CSV logs
+    results = {}
+    workers = workers or min(len(paths), os.cpu_count() or 1) or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path, highlights, error in pool.map(_detect_file, [(detector, p, top) for p in paths]):
+            if error:
+                print(f"Skipping {path}: {error}")
+                continue
+            results[path] = highlights
+
+    if output_file:
+        with open(output_file, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Highlights for {len(results)} VODs saved to: {output_file}")
+    return results
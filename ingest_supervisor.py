@@ -0,0 +1,409 @@
+# ingest_supervisor.py
+import argparse
+import bisect
+import hashlib
+import multiprocessing
+import multiprocessing.connection
+import socket
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from chat_log_writer import ChatLogWriter
+from irc_parser import format_tags
+from twitch_chat_streamer import TwitchChatReader
+
+CSV_HEADER = ['timestamp', 'username', 'message', 'channel', 'tags', 'raw']
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    Consistent hashing of channels onto shards, `replicas` points per shard.
+
+    Adding or removing a shard only moves the channels that hash next to it
+    (about 1/N of them); everything else stays where it was.
+    """
+
+    def __init__(self, nodes: Iterable[int] = (), replicas: int = 160):
+        self.replicas = replicas
+        self._points: List[int] = []
+        self._nodes: List[int] = []
+        for node in nodes:
+            self.add(node)
+
+    @property
+    def nodes(self) -> List[int]:
+        return sorted(set(self._nodes))
+
+    def add(self, node: int):
+        for i in range(self.replicas):
+            point = _hash(f"{node}:{i}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._nodes.insert(index, node)
+
+    def remove(self, node: int):
+        keep = [(p, n) for p, n in zip(self._points, self._nodes) if n != node]
+        self._points = [p for p, _ in keep]
+        self._nodes = [n for _, n in keep]
+
+    def node_for(self, key: str) -> int:
+        if not self._points:
+            raise ValueError("HashRing has no nodes")
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._nodes[index]
+
+    def assign(self, keys: Iterable[str]) -> Dict[int, List[str]]:
+        """{node: [keys]} for every node, including ones with nothing assigned"""
+        shards = {node: [] for node in self.nodes}
+        for key in keys:
+            shards[self.node_for(key)].append(key)
+        return shards
+
+
+class _Publisher:
+    """Batches a worker's parsed messages to the supervisor (also stands in as its log_writer)"""
+
+    def __init__(self, conn, batch_size, flush_interval):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._batch = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def publish(self, item):
+        with self._lock:
+            self._batch.append(item)
+            if len(self._batch) >= self.batch_size:
+                # Blocks while the pipe is full: a slow writer holds back the readers instead of growing memory
+                self.conn.send(self._batch)
+                self._batch = []
+
+    def flush(self):
+        with self._lock:
+            if self._batch:
+                self.conn.send(self._batch)
+                self._batch = []
+        self._last_flush = time.monotonic()
+
+    def flush_if_due(self):
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def start(self):
+        return self
+
+    def close(self):
+        self.flush()
+
+
+class _ShardReader(TwitchChatReader):
+    """TwitchChatReader that hands parsed chat to the supervisor instead of logging it"""
+
+    def __init__(self, channels, publisher, log_directory="chat_logs", server=None, port=None):
+        super().__init__(channels, log_directory=log_directory, log_writer=publisher)
+        self.publisher = publisher
+        if server:
+            self.server = server
+        if port:
+            self.port = port
+
+    def handle_chat_message(self, message_data):
+        self.publisher.publish((message_data['channel'], message_data['timestamp'], message_data['username'],
+                                message_data['message'], message_data['tags'], message_data['raw']))
+
+    def join(self, channels):
+        for channel in channels:
+            if channel in self.listen_threads and self.listen_threads[channel].is_alive():
+                continue
+            if channel not in self.channels:
+                self.channels.append(channel)
+            if not self.connect(channel):
+                print(f"Failed to connect to {channel}, retrying in the background")
+            # listen() reconnects with backoff, so start it even if the first connect failed
+            self.listen_threads[channel] = threading.Thread(target=self.listen, args=(channel,), daemon=True)
+            self.listen_threads[channel].start()
+
+    def part(self, channels):
+        for channel in channels:
+            # Drop it from channels first: listen() stops instead of treating the EOF as a drop
+            if channel in self.channels:
+                self.channels.remove(channel)
+            sock = self.sockets.pop(channel, None)
+            if sock is not None:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)  # listen() sees EOF, finds the channel parted and returns
+                except OSError:
+                    pass
+            thread = self.listen_threads.pop(channel, None)
+            if thread is not None:
+                thread.join(timeout=1)
+            if sock is not None:
+                sock.close()
+
+
+def _worker_main(channels, conn, options):
+    """Worker process: read `channels`, send batches up `conn` and follow its join/part/stop commands"""
+    publisher = _Publisher(conn, options["batch_size"], options["flush_interval"])
+    reader = _ShardReader([], publisher, log_directory=options["log_directory"], server=options.get("server"),
+                          port=options.get("port"))
+    reader.is_connected = True
+    reader.join(channels)
+    try:
+        while True:
+            if conn.poll(publisher.flush_interval):
+                command, arg = conn.recv()
+                if command == "join":
+                    reader.join(arg)
+                elif command == "part":
+                    reader.part(arg)
+                elif command == "stop":
+                    break
+            publisher.flush_if_due()
+    except (EOFError, OSError, KeyboardInterrupt):
+        pass  # supervisor went away
+    finally:
+        try:
+            reader.disconnect()  # closes the publisher, sending what is left
+        except OSError:
+            pass
+        conn.close()
+
+
+class IngestSupervisor:
+    """
+    Read many channels from `workers` processes and write them from this one.
+
+    Channels are sharded across workers by consistent hashing. Each worker runs a
+    TwitchChatReader (socket reads and IRC parsing) and sends parsed messages in
+    batches over its own pipe, so a worker killed mid-send can't corrupt the
+    others' traffic; this process drains the pipes into the ChatLogWriter,
+    analytics and indexer, or a custom `handler(message_data)`.
+
+    A worker that dies is restarted with its channels after `restart_delay`
+    (doubling per consecutive crash). One that crashes more than `max_restarts`
+    times within `restart_window` seconds is retired and its channels are
+    rebalanced onto the remaining workers, which join them without restarting.
+    """
+
+    def __init__(self, channels, workers: int = None, log_directory="chat_logs", log_writer=None, analytics=None,
+                 indexer=None, handler: Optional[Callable[[dict], None]] = None, server: str = None, port: int = None,
+                 batch_size: int = 200, flush_interval: float = 0.05, max_restarts: int = 5,
+                 restart_window: float = 60.0, restart_delay: float = 1.0, check_interval: float = 0.5):
+        self.channels = list(dict.fromkeys(channel.lower().strip('#') for channel in channels))
+        self.workers = workers or multiprocessing.cpu_count()
+        self.ring = HashRing(range(self.workers))
+        self.log_writer = None if handler else (log_writer or ChatLogWriter(log_directory, CSV_HEADER))
+        self.analytics = analytics
+        self.indexer = indexer
+        self.handler = handler or self._write
+        self.options = {"server": server, "port": port, "log_directory": log_directory, "batch_size": batch_size,
+                        "flush_interval": flush_interval}
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+        self.restart_delay = restart_delay
+        self.check_interval = check_interval
+
+        # spawn, not fork: this process already runs threads (log writer, pipe readers) a fork would copy mid-state
+        self._context = multiprocessing.get_context("spawn")
+        self.assignments: Dict[int, List[str]] = {}
+        self._procs: Dict[int, multiprocessing.Process] = {}
+        self._conns = {}  # shard -> duplex pipe: batches up, commands down
+        self._crashes: Dict[int, List[float]] = {}
+        self._restart_at: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._threads = []
+
+        self.received = 0
+        self.received_by_shard: Dict[int, int] = {}
+        self.restarts = 0
+        self.retired: List[int] = []
+
+    # -- workers -------------------------------------------------------
+    def _spawn(self, shard):
+        parent, child = self._context.Pipe()
+        proc = self._context.Process(target=_worker_main, name=f"ingest-{shard}", daemon=True,
+                                     args=(self.assignments[shard], child, self.options))
+        proc.start()
+        child.close()  # so the parent end reads EOF once the worker is gone
+        self._procs[shard] = proc
+        self._conns[shard] = parent  # the old pipe, if any, is closed by _consume at EOF
+
+    def _send(self, shard, command, arg=None):
+        try:
+            self._conns[shard].send((command, arg))
+        except (OSError, KeyError):
+            pass  # dead worker: picks up its channels when restarted
+
+    def _rebalance(self):
+        """Recompute shard assignments and tell live workers which channels to join or part"""
+        new = self.ring.assign(self.channels)
+        for shard, channels in new.items():
+            old = set(self.assignments.get(shard, []))
+            joined = [c for c in channels if c not in old]
+            parted = [c for c in old if c not in set(channels)]
+            if shard in self._procs and self._procs[shard].is_alive():
+                if parted:
+                    self._send(shard, "part", parted)
+                if joined:
+                    self._send(shard, "join", joined)
+        self.assignments = new
+
+    def _check_workers(self):
+        now = time.monotonic()
+        for shard, proc in list(self._procs.items()):
+            if proc.is_alive() or self._stopping.is_set():
+                continue
+            if shard not in self._restart_at:
+                crashes = [t for t in self._crashes.get(shard, []) if now - t < self.restart_window] + [now]
+                self._crashes[shard] = crashes
+                if len(crashes) > self.max_restarts and len(self.ring.nodes) > 1:
+                    print(f"Worker {shard} crashed {len(crashes)} times in {self.restart_window:.0f}s; "
+                          f"moving its {len(self.assignments[shard])} channels to the other workers")
+                    del self._procs[shard]
+                    del self._conns[shard]
+                    self.retired.append(shard)
+                    self.ring.remove(shard)
+                    self._rebalance()
+                    continue
+                delay = self.restart_delay * 2 ** (len(crashes) - 1)
+                print(f"Worker {shard} exited with code {proc.exitcode}; restarting in {delay:.1f}s")
+                self._restart_at[shard] = now + delay
+            elif now >= self._restart_at[shard]:
+                del self._restart_at[shard]
+                self._spawn(shard)
+                self.restarts += 1
+
+    def _monitor(self):
+        while not self._stopping.wait(self.check_interval):
+            with self._lock:
+                self._check_workers()
+
+    # -- writer --------------------------------------------------------
+    def _write(self, message_data):
+        """Default handler: what TwitchChatReader.handle_chat_message does, minus the printing"""
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(message_data['timestamp']))
+        channel = message_data['channel']
+        self.log_writer.write(channel, [timestamp, message_data['username'], message_data['message'], channel,
+                                        format_tags(message_data['tags']), message_data['raw']],
+                              message_data['timestamp'])
+        if self.analytics is not None:
+            self.analytics.observe(message_data)
+        if self.indexer is not None:
+            self.indexer.observe(message_data)
+
+    def _consume(self):
+        handler = self.handler
+        readers = {}  # pipe -> shard, including pipes of dead workers until they are drained
+        while True:
+            for shard, conn in list(self._conns.items()):
+                if conn not in readers and not conn.closed:
+                    readers[conn] = shard
+            if not readers:
+                if self._stopping.is_set():
+                    return
+                time.sleep(self.check_interval)
+                continue
+            for conn in multiprocessing.connection.wait(list(readers), timeout=self.check_interval):
+                shard = readers[conn]
+                try:
+                    batch = conn.recv()
+                except (EOFError, OSError):
+                    # Worker gone; a message it was killed halfway through sending is lost
+                    del readers[conn]
+                    conn.close()
+                    continue
+                for channel, timestamp, username, message, tags, raw in batch:
+                    try:
+                        handler({'username': username, 'message': message, 'channel': channel,
+                                 'timestamp': timestamp, 'tags': tags, 'raw': raw})
+                    except Exception as e:
+                        print(f"Error handling message from #{channel}: {e}")
+                self.received += len(batch)
+                self.received_by_shard[shard] = self.received_by_shard.get(shard, 0) + len(batch)
+
+    # -- control -------------------------------------------------------
+    def start(self):
+        if self.log_writer is not None:
+            self.log_writer.start()
+        with self._lock:
+            self.assignments = self.ring.assign(self.channels)
+            for shard in self.assignments:
+                self._spawn(shard)
+        for target in (self._consume, self._monitor):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"Reading {len(self.channels)} channels with {self.workers} worker processes")
+        return self
+
+    def add_channels(self, channels):
+        with self._lock:
+            self.channels += [c.lower().strip('#') for c in channels if c.lower().strip('#') not in self.channels]
+            self._rebalance()
+
+    def remove_channels(self, channels):
+        drop = {c.lower().strip('#') for c in channels}
+        with self._lock:
+            self.channels = [c for c in self.channels if c not in drop]
+            self._rebalance()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the workers, write out what they sent, and close the log writer."""
+        self._stopping.set()
+        with self._lock:
+            for shard in self._procs:
+                self._send(shard, "stop")
+            for proc in self._procs.values():
+                proc.join(timeout)
+                if proc.is_alive():
+                    proc.terminate()
+                    proc.join()
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+        if self.indexer is not None:
+            self.indexer.close()
+        if self.log_writer is not None:
+            self.log_writer.close()
+        print(f"Ingest stopped: {self.received} messages, {self.restarts} worker restarts")
+
+    def stats(self):
+        return {
+            "workers": {shard: {"alive": proc.is_alive(), "channels": len(self.assignments.get(shard, [])),
+                                "received": self.received_by_shard.get(shard, 0)}
+                        for shard, proc in self._procs.items()},
+            "received": self.received,
+            "restarts": self.restarts,
+            "retired": list(self.retired),
+        }
+
+    def run(self):
+        """Start, then block until Ctrl+C"""
+        self.start()
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print("\nStopping ingest...")
+        finally:
+            self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read Twitch chat for many channels across worker processes")
+    parser.add_argument("channels", nargs="+")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--log-directory", default="chat_logs")
+    args = parser.parse_args()
+    IngestSupervisor(args.channels, workers=args.workers, log_directory=args.log_directory).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# irc_framing.py
+
+
+class LineFramer:
+    """
+    Split an IRC byte stream into CRLF-terminated lines.
+
+    Data is received straight into a reusable bytearray through a memoryview,
+    lines are found with `bytearray.find` from the last scan position, and only
+    complete lines are decoded. The unread tail is moved to the front of the
+    buffer only when the buffer is full, so a burst of lines costs one copy of
+    the last partial line rather than a copy of the whole remainder per line.
+
+    Counters (`bytes_received`, `lines_framed`, `syscalls`) are kept per framer,
+    i.e. per connection.
+    """
+
+    def __init__(self, buffer_size: int = 65536):
+        self._buf = bytearray(buffer_size)
+        self._view = memoryview(self._buf)
+        self._start = 0  # first unconsumed byte
+        self._end = 0    # end of received data
+        self.bytes_received = 0
+        self.lines_framed = 0
+        self.syscalls = 0
+
+    @property
+    def buffer_size(self) -> int:
+        return len(self._buf)
+
+    def writable(self) -> memoryview:
+        """Return the free tail of the buffer, compacting or growing it if necessary."""
+        if self._end == len(self._buf):
+            pending = self._end - self._start
+            if self._start == 0:
+                # A single line fills the whole buffer: grow it.
+                new_buf = bytearray(len(self._buf) * 2)
+                new_buf[:pending] = self._view[:pending]
+                self._buf, self._view = new_buf, memoryview(new_buf)
+            else:
+                self._buf[:pending] = bytes(self._view[self._start:self._end])
+            self._start, self._end = 0, pending
+        return self._view[self._end:]
+
+    def advance(self, nbytes: int) -> None:
+        """Mark `nbytes` written into the view returned by writable() as received."""
+        self._end += nbytes
+        self.bytes_received += nbytes
+        self.syscalls += 1
+
+    def recv_from(self, sock) -> int:
+        """Receive once from a blocking socket. Returns the number of bytes read (0 on EOF)."""
+        nbytes = sock.recv_into(self.writable())
+        if nbytes:
+            self.advance(nbytes)
+        return nbytes
+
+    def clear(self) -> None:
+        """Drop buffered data (e.g. a partial line left by a closed connection)."""
+        self._start = self._end = 0
+
+    def feed(self, data) -> None:
+        """Copy already-received bytes into the buffer (e.g. when replaying a capture)."""
+        data = memoryview(data)
+        while data:
+            target = self.writable()
+            n = min(len(target), len(data))
+            target[:n] = data[:n]
+            self.advance(n)
+            data = data[n:]
+
+    def lines(self):
+        """Yield every complete line in the buffer as str, without the trailing CRLF."""
+        buf, view, end = self._buf, self._view, self._end
+        start = self._start
+        while True:
+            i = buf.find(b"\r\n", start, end)
+            if i < 0:
+                break
+            line = str(view[start:i], 'utf-8', 'ignore')
+            start = i + 2
+            self._start = start
+            self.lines_framed += 1
+            yield line
+        if self._start == self._end:
+            self._start = self._end = 0
+
+    def stats(self) -> dict:
+        return {
+            "bytes_received": self.bytes_received,
+            "lines_framed": self.lines_framed,
+            "syscalls": self.syscalls,
+            "buffer_size": len(self._buf),
+        }
@@ -0,0 +1,197 @@
+# irc_parser.py
+from collections.abc import Mapping
+
+# Commands besides PRIVMSG that carry chat events worth handling
+EVENT_COMMANDS = frozenset(("USERNOTICE", "CLEARCHAT", "CLEARMSG", "ROOMSTATE", "NOTICE", "RECONNECT"))
+
+_ESCAPES = {":": ";", "s": " ", "\\": "\\", "r": "\r", "n": "\n"}
+_ESCAPE_TABLE = str.maketrans({";": "\\:", " ": "\\s", "\\": "\\\\", "\r": "\\r", "\n": "\\n"})
+
+
+def unescape_tag_value(value: str) -> str:
+    """Undo IRCv3 tag-value escaping (\\: \\s \\\\ \\r \\n); a trailing lone backslash is dropped."""
+    if "\\" not in value:
+        return value
+    out = []
+    i, n = 0, len(value)
+    while i < n:
+        c = value[i]
+        if c == "\\":
+            i += 1
+            if i < n:
+                out.append(_ESCAPES.get(value[i], value[i]))
+        else:
+            out.append(c)
+        i += 1
+    return "".join(out)
+
+
+def escape_tag_value(value) -> str:
+    """IRCv3 tag-value escaping, the inverse of unescape_tag_value."""
+    return str(value).translate(_ESCAPE_TABLE)
+
+
+def parse_tags(tag_string: str) -> dict:
+    """Decode a raw tag string (with or without the leading '@') into a dict."""
+    if tag_string.startswith("@"):
+        tag_string = tag_string[1:]
+    tags = {}
+    for tag in tag_string.split(";"):
+        key, sep, value = tag.partition("=")
+        if key:
+            tags[key] = unescape_tag_value(value) if sep else ""
+    return tags
+
+
+class LazyTags(Mapping):
+    """
+    Read-only tag mapping that only decodes what is asked for.
+
+    `get()` on an undecoded instance scans the raw string for the one key, so a
+    handler that reads `display-name` and `subscriber` never builds the full dict.
+    Iteration, len() or item access decode everything once.
+    """
+    __slots__ = ("_raw", "_dict")
+
+    def __init__(self, raw: str):
+        self._raw = raw  # raw tag string, leading '@' included
+        self._dict = None
+
+    @property
+    def raw(self) -> str:
+        """The tag string as received, without the leading '@'."""
+        return self._raw[1:] if self._raw.startswith("@") else self._raw
+
+    def _decoded(self) -> dict:
+        if self._dict is None:
+            self._dict = parse_tags(self._raw) if self._raw else {}
+        return self._dict
+
+    def get(self, key, default=None):
+        if self._dict is not None:
+            return self._dict.get(key, default)
+        raw = self._raw
+        needle = key + "="
+        start = raw.find(needle)
+        # Skip matches that are the tail of a longer key (e.g. "id=" inside "room-id=")
+        while start > 0 and raw[start - 1] not in "@;":
+            start = raw.find(needle, start + 1)
+        if start < 0:
+            return default
+        start += len(needle)
+        end = raw.find(";", start)
+        value = raw[start:end] if end >= 0 else raw[start:]
+        return unescape_tag_value(value) if "\\" in value else value
+
+    def __getitem__(self, key):
+        return self._decoded()[key]
+
+    def __contains__(self, key):
+        return key in self._decoded()
+
+    def __iter__(self):
+        return iter(self._decoded())
+
+    def __len__(self):
+        return len(self._decoded())
+
+    def __bool__(self):
+        return len(self._raw) > 1
+
+    def __repr__(self):
+        return repr(self._decoded())
+
+
+def format_tags(tags) -> str:
+    """
+    Tags as an IRC tag string (`key=value;...`, no '@') for logging. LazyTags give
+    back their raw slice without decoding; a plain dict is escaped and joined.
+    """
+    if not tags:
+        return ""
+    if isinstance(tags, LazyTags):
+        return tags.raw
+    return ";".join(f"{key}={escape_tag_value(value)}" for key, value in tags.items())
+
+
+class IRCMessage:
+    """
+    A parsed IRC line: `@tags :prefix COMMAND params :trailing`.
+
+    Only the split into sections happens up front; tags, nick and channel are
+    derived on access.
+    """
+    __slots__ = ("raw", "command", "trailing", "_args", "_prefix", "_tags_raw", "_tags")
+
+    def __init__(self, raw, tags_raw, prefix, command, args, trailing):
+        self.raw = raw
+        self.command = command
+        self.trailing = trailing
+        self._args = args
+        self._prefix = prefix
+        self._tags_raw = tags_raw
+        self._tags = None
+
+    @property
+    def tags(self) -> LazyTags:
+        if self._tags is None:
+            self._tags = LazyTags(self._tags_raw)
+        return self._tags
+
+    @property
+    def prefix(self):
+        """`nick!user@host` or server name, or None."""
+        return self._prefix[1:] if self._prefix else None
+
+    @property
+    def params(self) -> list:
+        """Middle parameters after the command (the trailing parameter is in `trailing`)."""
+        return self._args[2:] if self._prefix else self._args[1:]
+
+    @property
+    def nick(self):
+        """Sender nick from `nick!user@host`, or None for server messages."""
+        prefix = self._prefix
+        if not prefix:
+            return None
+        bang = prefix.find("!")
+        return prefix[1:bang] if bang >= 0 else None
+
+    @property
+    def channel(self):
+        """First `#channel` parameter without the '#', or None."""
+        for param in self._args:
+            if param[0] == "#":
+                return param[1:]
+        return None
+
+    @property
+    def text(self):
+        """
+        Trailing text: the chat message for PRIVMSG, the optional user message for
+        USERNOTICE, the target login for CLEARCHAT (None when the whole chat was cleared).
+        """
+        return self.trailing
+
+    def __repr__(self):
+        return f"IRCMessage(command={self.command!r}, channel={self.channel!r}, nick={self.nick!r}, text={self.trailing!r})"
+
+
+def parse_line(line: str):
+    """Parse one IRC line (without CRLF). Returns an IRCMessage, or None for blank input."""
+    if not line:
+        return None
+    tags_raw = ""
+    rest = line
+    if line[0] == "@":
+        tags_raw, _, rest = line.partition(" ")
+    # A leading ":prefix" has no space before its colon, so " :" always marks the trailing part.
+    head, sep, trailing = rest.partition(" :")
+    args = head.split()
+    if not args:
+        return None
+    if args[0][0] == ":":
+        if len(args) < 2:
+            return None
+        return IRCMessage(line, tags_raw, args[0], args[1], args, trailing if sep else None)
+    return IRCMessage(line, tags_raw, None, args[0], args, trailing if sep else None)
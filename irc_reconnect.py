@@ -0,0 +1,76 @@
+# irc_reconnect.py
+import csv
+import os
+import random
+import threading
+
+GAP_HEADER = ['channel', 'start', 'end', 'seconds', 'reason']
+
+
+class Backoff:
+    """
+    Exponential reconnect delays with jitter: attempt n waits a random time in
+    [(1 - jitter) * d, d] where d = min(max_delay, base * factor ** n), so many
+    connections dropped at once don't all come back in the same instant.
+    """
+
+    def __init__(self, base: float = 1.0, max_delay: float = 60.0, factor: float = 2.0, jitter: float = 0.5):
+        self.base = base
+        self.max_delay = max_delay
+        self.factor = factor
+        self.jitter = jitter
+        self.attempt = 0
+
+    def next_delay(self) -> float:
+        delay = min(self.max_delay, self.base * self.factor ** self.attempt)
+        self.attempt += 1
+        return delay * random.uniform(1 - self.jitter, 1)
+
+    def reset(self):
+        self.attempt = 0
+
+
+class GapLog:
+    """
+    Intervals with no chat because a connection was down, appended to
+    `<log_directory>/gaps.csv` (channel, start, end, seconds, reason; times as
+    epoch seconds) so downstream analytics can tell quiet chat from missing data.
+    The most recent gaps are also kept in `gaps`.
+    """
+
+    def __init__(self, path, keep: int = 1000):
+        self.path = path
+        self.keep = keep
+        self.gaps = []
+        self._lock = threading.Lock()
+
+    def record(self, channels, start: float, end: float, reason: str):
+        rows = [[channel, f"{start:.3f}", f"{end:.3f}", f"{end - start:.3f}", reason] for channel in channels]
+        with self._lock:
+            try:
+                new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+                with open(self.path, 'a', newline='', encoding='utf-8') as f:
+                    writer = csv.writer(f)
+                    if new_file:
+                        writer.writerow(GAP_HEADER)
+                    writer.writerows(rows)
+            except OSError as e:
+                print(f"Error writing gap log {self.path}: {e}")
+            self.gaps.extend({"channel": channel, "start": start, "end": end, "reason": reason}
+                             for channel in channels)
+            del self.gaps[:-self.keep]
+        print(f"Chat gap of {end - start:.1f}s for {', '.join('#' + c for c in channels)} ({reason})")
+
+
+def read_gaps(path):
+    """Gap rows from a gaps.csv as dicts with float start/end/seconds"""
+    if not os.path.exists(path):
+        return []
+    with open(path, newline='', encoding='utf-8') as f:
+        return [dict(row, start=float(row['start']), end=float(row['end']), seconds=float(row['seconds']))
+                for row in csv.DictReader(f)]
+
+
+def in_gap(gaps, channel, timestamp: float) -> bool:
+    """True if `timestamp` falls inside a recorded gap for `channel`"""
+    return any(g['channel'] == channel and g['start'] <= timestamp <= g['end'] for g in gaps)
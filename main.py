@@ -1,18 +1,133 @@
 # main.py
-from dotenv import load_dotenv
-load_dotenv()
-# from twitch_client import TwitchClient 
-# from twitch_vod_chat_logger import TwitchVODChatLogger
-from twitch_master import Twitch
+"""
+Command line entry point. Each subcommand imports only the modules it needs,
+so `live` never loads requests or chat_downloader, only `sully` loads pandas,
+and the Helix token is fetched on the first Helix call rather than at startup.
 
+    python main.py live channel1 channel2 --quiet --metrics-port 9108
+    python main.py vod-backfill haunibunni --save-to json --workers 4
+    python main.py sully creator1 creator2 --output-dir data/metrics
+    python main.py upload chat_logs
+"""
+import argparse
+import os
 
 
-def main():
-    twitch = Twitch()
-    twitch.run_fetch_and_save_multiple_vods(streamer_name="haunibunni", save_to="json", limit=None) # 
-    # twitch.get_user_info(login="haunibunni")
-    # twitch.get_user(login="haunibunni")
-    # print(twitch.user_id)
+def _load_env():
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
+def live(args):
+    """Log live chat until interrupted"""
+    if args.workers:
+        from ingest_supervisor import IngestSupervisor
+        IngestSupervisor(args.channels, workers=args.workers, log_directory=args.log_directory).run()
+        return
+
+    metrics = pipeline = None
+    if args.metrics_port is not None:
+        from reader_metrics import ReaderMetrics
+        metrics = ReaderMetrics()
+    if args.pipeline_workers:
+        from chat_pipeline import ChatPipeline
+        pipeline = ChatPipeline(workers=args.pipeline_workers)
+    if args.use_async:
+        from twitch_chat_async import AsyncTwitchChatReader as Reader
+    else:
+        from twitch_chat_streamer import TwitchChatReader as Reader
+    reader = Reader(args.channels, log_directory=args.log_directory, metrics=metrics,
+                    print_messages=not args.quiet, pipeline=pipeline)
+    if metrics is not None:
+        metrics.serve(args.metrics_port)
+    reader.run()
+
+
+def vod_backfill(args):
+    """Download chat for a streamer's VODs that aren't complete in the manifest yet"""
+    _load_env()
+    from twitch_master import Twitch
+    twitch = Twitch(output_dir=args.output_dir)
+    twitch.run_fetch_and_save_multiple_vods(streamer_name=args.streamer, save_to=args.save_to, limit=args.limit,
+                                            workers=args.workers)
+
+
+def sully(args):
+    """Download (or read) SullyGnome stats and write the computed metrics"""
+    from sully import SullyStatsPipeline
+    if not args.creators and not args.directory:
+        raise SystemExit("sully: pass creator names or --directory with downloaded CSVs")
+    results = SullyStatsPipeline(args.data_directory, workers=args.workers).run(
+        creators=args.creators or None, directory=args.directory)
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+        for name, df in results.items():
+            path = os.path.join(args.output_dir, f"sully_{name}.csv")
+            df.to_csv(path, index=False)
+            print(f"Saved {len(df)} rows to: {path}")
+    print(results["creators"].to_string())
+
+
+def upload(args):
+    """Upload chat_logs output to ADLS Gen2"""
+    _load_env()
+    from adls_uploader import ADLSUploader
+    uploader = ADLSUploader(connection_string=args.connection_string or os.getenv("AZURE_STORAGE_CONNECTION_STRING"),
+                            prefix=args.prefix, workers=args.workers, file_workers=args.file_workers)
+    summary = uploader.upload_directory(args.directory)
+    print(summary)
+    if summary["failed"]:
+        raise SystemExit(1)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Twitch chat logging and analytics",
+                                     formatter_class=argparse.RawDescriptionHelpFormatter, epilog=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("live", help=live.__doc__)
+    p.add_argument("channels", nargs="+")
+    p.add_argument("--log-directory", default="chat_logs")
+    p.add_argument("--async", dest="use_async", action="store_true",
+                   help="read every channel from one event loop (AsyncTwitchChatReader)")
+    p.add_argument("--workers", type=int, default=0, help="shard channels across this many processes")
+    p.add_argument("--pipeline-workers", type=int, default=0,
+                   help="run logging and printing on a handler pipeline with this many threads")
+    p.add_argument("--quiet", action="store_true", help="don't print every message")
+    p.add_argument("--metrics-port", type=int, default=None, help="serve Prometheus metrics on this port")
+    p.set_defaults(func=live)
+
+    p = commands.add_parser("vod-backfill", help=vod_backfill.__doc__)
+    p.add_argument("streamer")
+    p.add_argument("--save-to", default="json", choices=["csv", "json", "jsonl", "parquet", "sqlite", "chatz"])
+    p.add_argument("--limit", type=int, default=None, help="only process the first N VODs")
+    p.add_argument("--workers", type=int, default=1, help="VODs to download in parallel")
+    p.add_argument("--output-dir", default="chat_logs")
+    p.set_defaults(func=vod_backfill)
+
+    p = commands.add_parser("sully", help=sully.__doc__)
+    p.add_argument("creators", nargs="*")
+    p.add_argument("--directory", default=None, help="read CSVs from here instead of downloading")
+    p.add_argument("--data-directory", default="data", help="where downloaded CSVs are cached")
+    p.add_argument("--output-dir", default=None, help="write streams/games/creators metrics as CSV")
+    p.add_argument("--workers", type=int, default=8)
+    p.set_defaults(func=sully)
+
+    p = commands.add_parser("upload", help=upload.__doc__)
+    p.add_argument("directory", nargs="?", default="chat_logs")
+    p.add_argument("--connection-string", default=None,
+                   help="storage connection string (default: AZURE_STORAGE_CONNECTION_STRING)")
+    p.add_argument("--prefix", default="chat_logs")
+    p.add_argument("--workers", type=int, default=8, help="concurrent chunk uploads")
+    p.add_argument("--file-workers", type=int, default=4, help="files uploaded at once")
+    p.set_defaults(func=upload)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
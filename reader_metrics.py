@@ -0,0 +1,279 @@
+# reader_metrics.py
+import bisect
+import itertools
+import threading
+from typing import Callable, Iterable, Optional
+
+# Upper bounds in seconds, from 1 us to 5 s
+LATENCY_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Optional[dict]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class _PerThread:
+    """
+    Per-thread cells summed when read, so updates take no lock: each thread only
+    ever writes its own cell, and a scrape adds them up (slightly stale at worst).
+    """
+
+    def __init__(self, size):
+        self._size = size
+        self._local = threading.local()
+        self._cells = []
+        self._lock = threading.Lock()  # only taken the first time a thread updates
+
+    def _new_cell(self):
+        cell = [0] * self._size
+        self._local.cell = cell
+        with self._lock:
+            self._cells.append(cell)
+        return cell
+
+    def totals(self):
+        with self._lock:
+            cells = list(self._cells)
+        return [sum(column) for column in zip(*cells)] if cells else [0] * self._size
+
+
+class Counter(_PerThread):
+    """Monotonic count; `inc()` is safe from any thread without locking."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        super().__init__(1)
+        self.name = name
+        self.help = help
+
+    def inc(self, n=1):
+        try:
+            self._local.cell[0] += n
+        except AttributeError:
+            self._new_cell()[0] += n
+
+    @property
+    def value(self):
+        return self.totals()[0]
+
+    def samples(self):
+        yield self.name, None, self.value
+
+
+class Histogram(_PerThread):
+    """Bucketed observations (seconds by default) with sum and count, Prometheus style."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(len(self.buckets) + 3)  # buckets, +Inf, sum, count
+        self.name = name
+        self.help = help
+
+    def observe(self, value: float):
+        try:
+            cell = self._local.cell
+        except AttributeError:
+            cell = self._new_cell()
+        cell[bisect.bisect_left(self.buckets, value)] += 1
+        cell[-2] += value
+        cell[-1] += 1
+
+    @property
+    def count(self):
+        return self.totals()[-1]
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bucket bound below which a fraction q of observations fall (None if empty)."""
+        totals = self.totals()
+        if not totals[-1]:
+            return None
+        target, seen = q * totals[-1], 0
+        for bound, n in zip(self.buckets + (float("inf"),), totals):
+            seen += n
+            if seen >= target:
+                return bound
+        return float("inf")
+
+    def samples(self):
+        totals = self.totals()
+        seen = 0
+        for bound, n in zip(self.buckets, totals):
+            seen += n
+            yield f"{self.name}_bucket", {"le": repr(bound)}, seen
+        yield f"{self.name}_bucket", {"le": "+Inf"}, seen + totals[len(self.buckets)]
+        yield f"{self.name}_sum", None, totals[-2]
+        yield f"{self.name}_count", None, totals[-1]
+
+
+class Gauge:
+    """
+    Value read at scrape time from `fn()`: a number, or {label value: number} for
+    `label`. kind="counter" exposes a total something else already keeps.
+    """
+
+    def __init__(self, name: str, help: str, fn: Callable, label: Optional[str] = None, kind: str = "gauge"):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.label = label
+        self.kind = kind
+
+    def samples(self):
+        value = self.fn()
+        if self.label is None:
+            yield self.name, None, value
+        else:
+            for key, v in sorted(value.items()):
+                yield self.name, {self.label: key}, v
+
+
+class MetricsRegistry:
+    """A set of metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help):
+        return self.register(Counter(name, help))
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help, buckets))
+
+    def gauge(self, name, help, fn, label=None, kind="gauge"):
+        return self.register(Gauge(name, help, fn, label, kind))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            try:
+                for name, labels, value in metric.samples():
+                    lines.append(f"{name}{_labels(labels)} {value}")
+            except Exception as e:
+                lines.append(f"# error collecting {metric.name}: {e}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int = 9108, host: str = "127.0.0.1") -> "MetricsServer":
+        """Expose render() on http://host:port/metrics from a daemon thread."""
+        return MetricsServer(self, host, port).start()
+
+
+class MetricsServer:
+    """Minimal threaded HTTP server answering GET /metrics."""
+
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9108):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server = None
+
+    def start(self):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # only needed once serving
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        print(f"Metrics at http://{self.host}:{self.port}/metrics")
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class ReaderMetrics(MetricsRegistry):
+    """
+    The live reader's metrics. Counts are exact; parse and handler times are
+    measured on one line in `sample_every` (1 = every line), so the timing cost
+    stays negligible at full ingest rate. Pass as `TwitchChatReader(metrics=...)`;
+    bytes received, lines framed, per-channel queue depth, writer stats and
+    handler pipeline queues are read from the reader when scraped.
+    """
+
+    def __init__(self, sample_every: int = 16):
+        super().__init__()
+        self.sample_every = max(1, sample_every)
+        self._ticks = itertools.count()  # next() is atomic under the GIL
+        self.messages = self.counter("twitch_chat_messages_total", "Chat messages handled")
+        self.events = self.counter("twitch_chat_events_total", "Non-chat IRC events handled")
+        self.parse_errors = self.counter("twitch_chat_parse_errors_total", "Lines that failed to parse")
+        self.handler_errors = self.counter("twitch_chat_handler_errors_total",
+                                           "Exceptions raised by handle_chat_message")
+        self.connects = self.counter("twitch_chat_connects_total", "IRC connections opened")
+        self.reconnects = self.counter("twitch_chat_reconnects_total", "IRC connections re-opened after a drop")
+        self.gaps = self.counter("twitch_chat_gaps_total", "Outages recorded in the gap log (per connection)")
+        self.gap_seconds = self.histogram("twitch_chat_gap_seconds", "Length of chat outages",
+                                          buckets=(1, 5, 15, 30, 60, 120, 300, 900, 3600))
+        self.parse_seconds = self.histogram("twitch_chat_parse_seconds", "IRC line parse time (sampled)")
+        self.handler_seconds = self.histogram("twitch_chat_handler_seconds", "handle_chat_message time (sampled)")
+        self.write_seconds = self.histogram("twitch_chat_log_write_seconds", "Log writer batch write time")
+        self.lag_seconds = self.histogram("twitch_chat_log_lag_seconds",
+                                          "Time from a row being queued to being written (oldest row per batch)")
+
+    def sample(self) -> bool:
+        return next(self._ticks) % self.sample_every == 0
+
+    def watch_reader(self, reader):
+        """Add scrape-time gauges for a reader's framers and log writer"""
+        framers = lambda: list(reader.framers.values())
+        self.gauge("twitch_chat_recv_bytes_total", "Bytes received from IRC",
+                   lambda: sum(f.bytes_received for f in framers()), kind="counter")
+        self.gauge("twitch_chat_lines_total", "IRC lines framed",
+                   lambda: sum(f.lines_framed for f in framers()), kind="counter")
+        self.gauge("twitch_chat_recv_calls_total", "recv syscalls",
+                   lambda: sum(f.syscalls for f in framers()), kind="counter")
+        self.gauge("twitch_chat_connections", "Open IRC connections", lambda: len(framers()))
+        writer = reader.log_writer
+        if hasattr(writer, "queue_depth"):
+            self.gauge("twitch_chat_log_queue_depth", "Rows waiting for the log writer", writer.queue_depth)
+            self.gauge("twitch_chat_log_queue_depth_by_channel", "Rows waiting for the log writer, per channel",
+                       lambda: dict(writer._pending), label="channel")
+            self.gauge("twitch_chat_log_rows_written_total", "Rows written by the log writer",
+                       lambda: writer.rows_written, kind="counter")
+            writer.metrics = self
+        pipeline = getattr(reader, "pipeline", None)
+        if pipeline is not None:
+            stat = lambda key: lambda: {name: s[key] for name, s in pipeline.stats().items()}
+            self.gauge("twitch_chat_handler_queue_depth", "Messages waiting for each pipeline handler",
+                       stat("queue_depth"), label="handler")
+            self.gauge("twitch_chat_handler_dropped_total", "Messages dropped by each handler's overflow policy",
+                       stat("dropped"), label="handler", kind="counter")
+            self.gauge("twitch_chat_handler_delivered_total", "Messages delivered to each pipeline handler",
+                       stat("delivered"), label="handler", kind="counter")
+            self.gauge("twitch_chat_handler_busy_seconds_total", "Time spent inside each pipeline handler",
+                       stat("busy_seconds"), label="handler", kind="counter")
+        return self
@@ -1,52 +1,268 @@
-
+# sully.py
+import json
 import os
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
-from langchain import LangChain
-from mcp import MCP  # Assuming MCP is a library or tool you have access to
+
+from twitch_client import shared_session
+
+SULLY_CSV_URL = "https://sullygnome.com/channel/{creator}/stats/csv"
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+              'Chrome/58.0.3029.110 Safari/537.3')
+
+# SullyGnome stream export columns and the compact dtypes they are parsed with. Text columns are
+# left to pandas' default string inference; Games becomes a categorical once, after the concat.
+SULLY_DTYPES = {
+    "Stream start time": None,
+    "Stream URL": None,
+    "Stream length (mins)": "uint16",
+    "Watch time (mins)": "uint32",
+    "Avg viewers": "uint32",
+    "Peak viewers": "uint32",
+    "Followers gained": "int32",
+    "Followers per hour": "int32",
+    "Games": None,
+}
+
+_ORDINAL = r"(\d+)(?:st|nd|rd|th) "
+_START_FORMAT = "%A %d %B %Y %H:%M"
+
+
+def parse_start_times(values: pd.Series) -> pd.Series:
+    """
+    "Wednesday 25th December 2024 01:52" -> Timestamp: drop the ordinal suffix, then one
+    vectorized parse. The regex runs in pyarrow's C++ kernels when pyarrow is installed.
+    """
+    try:
+        values = values.astype("string[pyarrow]")
+    except ImportError:
+        values = values.astype("string")
+    return pd.to_datetime(values.str.replace(_ORDINAL, r"\1 ", regex=True), format=_START_FORMAT)
+
+
+class SullyStatsPipeline:
+    """
+    Download, cache and analyse SullyGnome stream stats for many creators.
+
+    CSVs are fetched concurrently over the shared keep-alive session and cached in
+    `data_directory` as `<creator>_stats.csv`, with the response's ETag /
+    Last-Modified kept alongside so later runs send a conditional GET and reuse the
+    cached file on 304. Parsing uses explicit compact dtypes and every metric is a
+    column-wise pandas/numpy expression over all creators at once. Point it at a
+    directory of CSVs (`load_directory`) to run without the network.
+    """
+
+    csv_url = SULLY_CSV_URL
+
+    def __init__(self, data_directory="data", session=None, workers: int = 8, rolling_streams: int = 7):
+        self.data_directory = Path(data_directory)
+        self.data_directory.mkdir(parents=True, exist_ok=True)
+        self.session = session or shared_session(max(10, workers))
+        self.workers = workers
+        self.rolling_streams = rolling_streams  # streams in the rolling trend window
+
+    # -- download ------------------------------------------------------
+    def csv_path(self, creator: str) -> Path:
+        return self.data_directory / f"{creator}_stats.csv"
+
+    def download_csv(self, creator: str):
+        """
+        Fetch one creator's CSV, revalidating a cached copy with If-None-Match /
+        If-Modified-Since. Returns the local path, or None if nothing usable exists.
+        """
+        path = self.csv_path(creator)
+        meta_path = path.with_name(path.name + ".meta.json")
+        headers = {"User-Agent": USER_AGENT}
+        meta = {}
+        if path.exists() and meta_path.exists():
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            except ValueError:
+                meta = {}
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            response = self.session.get(self.csv_url.format(creator=creator), headers=headers, timeout=30)
+        except Exception as e:
+            print(f"Failed to download CSV for {creator}: {e}")
+            return path if path.exists() else None
+
+        if response.status_code == 304:
+            return path
+        if response.status_code != 200:
+            print(f"Failed to download CSV for {creator}. Status code: {response.status_code}")
+            return path if path.exists() else None
+
+        tmp = path.with_name(path.name + ".part")
+        tmp.write_bytes(response.content)
+        os.replace(tmp, path)
+        meta = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+        meta_path.write_text(json.dumps(meta), encoding="utf-8")
+        print(f"CSV file downloaded and saved to {path}")
+        return path
+
+    def download_many(self, creators) -> dict:
+        """{creator: path} for every creator whose CSV could be fetched or was cached."""
+        creators = list(dict.fromkeys(creators))
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(creators) or 1))) as pool:
+            paths = dict(zip(creators, pool.map(self.download_csv, creators)))
+        return {c: p for c, p in paths.items() if p is not None}
+
+    # -- parse ---------------------------------------------------------
+    @classmethod
+    def load_csv(cls, path, creator: str = None) -> pd.DataFrame:
+        """One creator's CSV with compact dtypes, a parsed `start` timestamp and a `creator` column."""
+        return cls.load_many({creator or cls._creator_of(path): path})
+
+    @staticmethod
+    def _creator_of(path) -> str:
+        return Path(path).name.split(" - ")[0].split("_stats")[0]
+
+    @staticmethod
+    def _read_csv(path, creator: str) -> pd.DataFrame:
+        dtypes = {column: dtype for column, dtype in SULLY_DTYPES.items() if dtype}
+        df = pd.read_csv(path, usecols=list(SULLY_DTYPES), dtype=dtypes, encoding="utf-8-sig")
+        df["creator"] = creator
+        return df
+
+    @classmethod
+    def load_many(cls, paths: dict) -> pd.DataFrame:
+        """
+        Concatenate {creator: path} into one frame. Start times are parsed and creator /
+        Games made categorical once over the combined frame rather than per file.
+        """
+        frames = [cls._read_csv(p, creator) for creator, p in paths.items()]
+        if not frames:
+            return pd.DataFrame(columns=[*SULLY_DTYPES, "creator", "start"])
+        df = pd.concat(frames, ignore_index=True)
+        df["start"] = parse_start_times(df["Stream start time"])
+        df["creator"] = df["creator"].astype("category")
+        df["Games"] = df["Games"].astype("category")
+        return df
+
+    def load_directory(self, directory=None) -> pd.DataFrame:
+        """Every SullyGnome CSV in a directory (e.g. fixtures), creator taken from the file name."""
+        directory = Path(directory or self.data_directory)
+        return self.load_many({self._creator_of(p): p for p in sorted(directory.glob("*.csv"))})
+
+    # -- metrics -------------------------------------------------------
+    def stream_metrics(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Per-stream metrics, all vectorized over every creator."""
+        df = df.sort_values(["creator", "start"], kind="stable").reset_index(drop=True)
+        avg = df["Avg viewers"].to_numpy(dtype=np.float64)
+        peak = df["Peak viewers"].to_numpy(dtype=np.float64)
+        hours = df["Stream length (mins)"].to_numpy(dtype=np.float64) / 60.0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            df["Variability Ratio"] = np.where(avg > 0, peak / avg, np.nan).astype(np.float32)
+            df["Peak Deviation Index"] = np.where(avg > 0, (peak - avg) / avg, np.nan).astype(np.float32)
+            df["Hours"] = hours.astype(np.float32)
+            df["Followers per 1k watch hours"] = np.where(
+                df["Watch time (mins)"] > 0,
+                df["Followers gained"].to_numpy(dtype=np.float64) * 60_000 / df["Watch time (mins)"].to_numpy(),
+                np.nan).astype(np.float32)
+
+        by_creator = df.groupby("creator", observed=True)["Avg viewers"]
+        mean = by_creator.transform("mean")
+        std = by_creator.transform("std")
+        df["Avg viewers z"] = ((df["Avg viewers"] - mean) / std.replace(0, np.nan)).astype(np.float32)
+        rolling = by_creator.rolling(self.rolling_streams, min_periods=1).mean().reset_index(level=0, drop=True)
+        df[f"Avg viewers {self.rolling_streams}-stream mean"] = rolling.astype(np.float32)
+        df["Trend vs rolling"] = ((df["Avg viewers"] - rolling) / rolling).astype(np.float32)
+        return df
+
+    @staticmethod
+    def game_metrics(df: pd.DataFrame) -> pd.DataFrame:
+        """Per creator and game: streams, hours, watch time, viewers and followers (multi-game streams count for each)."""
+        games = df.assign(Game=df["Games"].astype("string").str.split(",")).explode("Game")
+        games["Game"] = games["Game"].str.strip().astype("category")
+        return games.groupby(["creator", "Game"], observed=True).agg(
+            streams=("Avg viewers", "size"),
+            hours=("Hours", "sum"),
+            watch_time_mins=("Watch time (mins)", "sum"),
+            avg_viewers=("Avg viewers", "mean"),
+            peak_viewers=("Peak viewers", "max"),
+            followers_gained=("Followers gained", "sum"),
+            variability_ratio=("Variability Ratio", "mean"),
+        ).sort_values(["creator", "watch_time_mins"], ascending=[True, False]).reset_index()
+
+    @staticmethod
+    def creator_metrics(df: pd.DataFrame) -> pd.DataFrame:
+        """One row per creator: totals, viewer mean/std/CV, variability and a viewers-per-stream trend slope."""
+        g = df.groupby("creator", observed=True)
+        summary = g.agg(
+            streams=("Avg viewers", "size"),
+            hours=("Hours", "sum"),
+            watch_time_mins=("Watch time (mins)", "sum"),
+            avg_viewers=("Avg viewers", "mean"),
+            avg_viewers_std=("Avg viewers", "std"),
+            peak_viewers=("Peak viewers", "max"),
+            followers_gained=("Followers gained", "sum"),
+            variability_ratio=("Variability Ratio", "mean"),
+            peak_deviation_index=("Peak Deviation Index", "mean"),
+            first_stream=("start", "min"),
+            last_stream=("start", "max"),
+        )
+        summary["viewers_cv"] = summary["avg_viewers_std"] / summary["avg_viewers"]
+        summary["followers_per_hour"] = summary["followers_gained"] / summary["hours"]
+        # Least-squares slope of avg viewers against stream number, from grouped sums
+        x = g.cumcount().astype(np.float64)
+        y = df["Avg viewers"].astype(np.float64)
+        sums = pd.DataFrame({"creator": df["creator"], "x": x, "y": y, "xy": x * y, "xx": x * x}) \
+            .groupby("creator", observed=True).sum()
+        n = summary["streams"]
+        denominator = n * sums["xx"] - sums["x"] ** 2
+        summary["viewers_trend_per_stream"] = (n * sums["xy"] - sums["x"] * sums["y"]) / denominator.replace(0, np.nan)
+        return summary.reset_index()
+
+    def run(self, creators=None, directory=None) -> dict:
+        """
+        Download (or, with creators=None, read `directory`) and compute everything.
+        Returns {"streams", "games", "creators"} DataFrames.
+        """
+        df = self.load_many(self.download_many(creators)) if creators is not None else self.load_directory(directory)
+        streams = self.stream_metrics(df)
+        return {
+            "streams": streams,
+            "games": self.game_metrics(streams),
+            "creators": self.creator_metrics(streams),
+        }
+
 
 class SullyGnomeScraper:
     def __init__(self, creator_name, data_directory="data"):
         """
         Initialize the SullyGnomeScraper with the content creator's name.
-        
+
         :param creator_name: Name of the content creator
         :param data_directory: Directory to save the CSV files
         """
         self.creator_name = creator_name
         self.data_directory = data_directory
-        os.makedirs(self.data_directory, exist_ok=True)  # Create data directory if it doesn't exist
-        self.langchain = LangChain()
-        self.mcp = MCP()
+        self.pipeline = SullyStatsPipeline(data_directory)
 
     def download_csv(self):
         """
-        Download the CSV file from SullyGnome for the specified content creator.
+        Download the CSV file from SullyGnome for the specified content creator
+        (conditional GET against the cached copy).
         """
-        url = f"https://sullygnome.com/channel/{self.creator_name}/stats/csv"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
-        }
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            csv_file_path = os.path.join(self.data_directory, f"{self.creator_name}_stats.csv")
-            with open(csv_file_path, 'wb') as file:
-                file.write(response.content)
-            print(f"CSV file downloaded and saved to {csv_file_path}")
-            return csv_file_path
-        else:
-            print(f"Failed to download CSV file. Status code: {response.status_code}")
-            return None
+        path = self.pipeline.download_csv(self.creator_name)
+        return str(path) if path else None
 
     def load_csv(self, csv_file_path):
         """
         Load the CSV file into a pandas DataFrame.
-        
+
         :param csv_file_path: Path to the CSV file
         :return: pandas DataFrame
         """
         if os.path.exists(csv_file_path):
-            df = pd.read_csv(csv_file_path)
+            df = self.pipeline.load_csv(csv_file_path, self.creator_name)
             print(f"CSV file loaded from {csv_file_path}")
             return df
         else:
@@ -55,16 +271,13 @@ class SullyGnomeScraper:
 
     def process_data(self, df):
         """
-        Perform any necessary data processing on the DataFrame.
-        
+        Add the per-stream metrics (Variability Ratio, Peak Deviation Index, z-score, rolling trend, ...).
+
         :param df: pandas DataFrame
         :return: Processed DataFrame
         """
         if df is not None:
-            # Example processing: Calculate Variability Ratio (Peak / Average)
-            df["Variability Ratio"] = df["Peak viewers"] / df["Avg viewers"]
-            # Calculate Peak Deviation Index ((Peak - Average) / Average)
-            df["Peak Deviation Index"] = (df["Peak viewers"] - df["Avg viewers"]) / df["Avg viewers"]
+            df = self.pipeline.stream_metrics(df)
             print("Data processed successfully.")
             return df
         else:
@@ -75,20 +288,9 @@ class SullyGnomeScraper:
         """
         Run the entire scraping and processing pipeline.
         """
-        # High-level coordination with LangChain
-        self.langchain.start_pipeline()
-
-        # Download the CSV file using MCP
-        csv_file_path = self.mcp.run_task(self.download_csv)
+        csv_file_path = self.download_csv()
         if csv_file_path:
-            # Load the CSV file into a DataFrame using MCP
-            df = self.mcp.run_task(lambda: self.load_csv(csv_file_path))
-            if df is not None:
-                # Process the data using MCP
-                processed_df = self.mcp.run_task(lambda: self.process_data(df))
-                if processed_df is not None:
-                    # Print the first few rows of the processed DataFrame
-                    print(processed_df.head())
-
-        # End the pipeline
-        self.langchain.end_pipeline()
\ No newline at end of file
+            processed_df = self.process_data(self.load_csv(csv_file_path))
+            if processed_df is not None:
+                # Print the first few rows of the processed DataFrame
+                print(processed_df.head())
@@ -0,0 +1,140 @@
+# tests/test_adls_uploader.py
+import os
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from adls_uploader import ADLSUploader, UploadJournal
+from benchmarks.bench_adls_upload import StubLake, stub_uploader
+
+KB = 1024
+
+
+@pytest.fixture
+def lake():
+    return StubLake(latency=0.0, mb_per_s=1e6)
+
+
+def uploader(lake, tmp_path, **kwargs):
+    kwargs = {"chunk_size": 4 * KB, "checkpoint_chunks": 2, "workers": 4, "file_workers": 2,
+              "journal": UploadJournal(tmp_path / "uploads.sqlite3"), **kwargs}
+    return stub_uploader(lake, **kwargs)
+
+
+def write_log(path, kb, seed=b"x"):
+    path.write_bytes((seed * 63 + b"\n") * (kb * KB // 64))
+    return path
+
+
+def remote_bytes(lake, up, path):
+    return lake.files[up.remote_path(path)][0]
+
+
+def test_remote_path_layout(tmp_path):
+    up = ADLSUploader(journal=UploadJournal(tmp_path / "uploads.sqlite3"), streamers={"12345": "somestreamer"})
+    assert up.remote_path(tmp_path / "chan_chat_log.20240102-030405.csv") == \
+        "chat_logs/streamer=chan/date=2024-01-02/chan_chat_log.20240102-030405.csv"
+    assert up.remote_path(tmp_path / "chan_chat_log.20240102-030405-2.chatz.idx") == \
+        "chat_logs/streamer=chan/date=2024-01-02/chan_chat_log.20240102-030405-2.chatz.idx"
+    vod = write_log(tmp_path / "12345_2000001.jsonl", 1)
+    os.utime(vod, (1_700_000_000, 1_700_000_000))
+    day = datetime.fromtimestamp(1_700_000_000, tz=timezone.utc).strftime("%Y-%m-%d")
+    assert up.remote_path(vod) == f"chat_logs/streamer=somestreamer/date={day}/12345_2000001.jsonl"
+    other = write_log(tmp_path / "notes.csv", 1)
+    assert up.remote_path(other).startswith("chat_logs/streamer=unknown/")
+    up.close()
+
+
+def test_unchanged_files_are_skipped(lake, tmp_path):
+    logs = tmp_path / "chat_logs"
+    logs.mkdir()
+    paths = [write_log(logs / f"chan{i}_chat_log.20240101-000000.csv", 20 + i) for i in range(3)]
+    up = uploader(lake, tmp_path)
+    first = up.upload_directory(logs)
+    assert (first["uploaded"], first["failed"]) == (3, {})
+    for path in paths:
+        assert remote_bytes(lake, up, path) == path.read_bytes()
+    second = up.upload_directory(logs)
+    assert (second["skipped"], second["bytes"]) == (3, 0)
+    up.close()
+
+
+def test_grown_log_sends_only_its_tail(lake, tmp_path):
+    path = write_log(tmp_path / "chan_chat_log.csv", 32)
+    up = uploader(lake, tmp_path)
+    up.upload_file(path)
+    with open(path, "ab") as f:
+        f.write(b"new chat line\n" * 100)
+    result = up.upload_file(path)
+    assert result["status"] == "resumed"
+    assert result["bytes"] == 1400
+    assert remote_bytes(lake, up, path) == path.read_bytes()
+    up.close()
+
+
+def test_interrupted_upload_resumes_from_the_last_commit(lake, tmp_path):
+    path = write_log(tmp_path / "chan_chat_log.csv", 64)
+    up = uploader(lake, tmp_path, workers=1)
+    lake.fail_after = 5  # two 8 KB segments commit, then a chunk of the third fails
+    with pytest.raises(ConnectionError):
+        up.upload_file(path)
+    assert len(lake.files[up.remote_path(path)][0]) == 16 * KB
+    lake.fail_after = None
+    result = up.upload_file(path)
+    assert (result["status"], result["bytes"]) == ("resumed", 48 * KB)
+    assert remote_bytes(lake, up, path) == path.read_bytes()
+    up.close()
+
+
+def test_rewritten_file_is_uploaded_from_the_start(lake, tmp_path):
+    path = write_log(tmp_path / "chan_chat_log.csv", 16)
+    up = uploader(lake, tmp_path)
+    up.upload_file(path)
+    time.sleep(0.01)
+    write_log(path, 24, seed=b"y")  # same name, different prefix: the committed bytes no longer match
+    result = up.upload_file(path)
+    assert (result["status"], result["bytes"]) == ("uploaded", 24 * KB)
+    assert remote_bytes(lake, up, path) == path.read_bytes()
+    up.close()
+
+
+def write_chat_rows(path, day, rows, header=True):
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        if header:
+            f.write("timestamp,username,message,channel,tags,raw\r\n")
+        for i in range(rows):
+            f.write(f"{day} 23:59:{i % 60:02d},user{i},message number {i},chan,,\r\n")
+
+
+def test_active_log_keeps_its_partition_across_days(lake, tmp_path):
+    path = tmp_path / "chan_chat_log.csv"
+    write_chat_rows(path, "2023-11-14", 500)
+    os.utime(path, (1_699_999_000, 1_699_999_000))
+    up = uploader(lake, tmp_path)
+    first = up.upload_file(path)
+    assert first["remote_path"] == "chat_logs/streamer=chan/date=2023-11-14/chan_chat_log.csv"
+
+    size = path.stat().st_size
+    write_chat_rows(path, "2023-11-16", 200, header=False)
+    os.utime(path, (1_700_150_000, 1_700_150_000))  # two days later
+    second = up.upload_file(path)
+    assert second["remote_path"] == first["remote_path"]
+    assert (second["status"], second["bytes"]) == ("resumed", path.stat().st_size - size)
+    assert list(lake.files) == [first["remote_path"]]
+    assert remote_bytes(lake, up, path) == path.read_bytes()
+    up.close()
+
+
+def test_active_archive_is_dated_by_its_first_frame(tmp_path):
+    pytest.importorskip("zstandard")
+    from chat_archive import ChatArchiveWriter
+    first = time.mktime((2023, 11, 14, 12, 0, 0, 0, 0, -1))
+    with ChatArchiveWriter(tmp_path / "chan_chat_log.chatz", time_field="ts") as archive:
+        archive.write({"ts": first, "message": "hi"})
+    up = ADLSUploader(journal=UploadJournal(tmp_path / "uploads.sqlite3"))
+    for name in ("chan_chat_log.chatz", "chan_chat_log.chatz.idx"):
+        path = tmp_path / name
+        os.utime(path, (first + 3 * 86400, first + 3 * 86400))
+        assert up.remote_path(path) == f"chat_logs/streamer=chan/date=2023-11-14/{name}"
+    up.close()
@@ -0,0 +1,50 @@
+# tests/test_chat_archive.py
+import time
+
+import pytest
+
+pytest.importorskip("zstandard")
+
+from chat_archive import ChatArchiveLogWriter, ChatArchiveReader
+
+HEADER = ['timestamp', 'username', 'message', 'channel', 'tags', 'raw']
+
+
+def row(i, ts, channel="test"):
+    stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))
+    return [stamp, f"user{i}", f"message {i}", channel, f"id=msg-{i}", f"raw {i}"]
+
+
+def test_flush_interval_does_not_cut_frames(tmp_path):
+    writer = ChatArchiveLogWriter(tmp_path, HEADER, batch_size=5, flush_interval=0.01, fsync_interval=None).start()
+    for i in range(40):
+        writer.write("test", row(i, 1_700_000_000 + i), 1_700_000_000 + i)
+        time.sleep(0.005)
+    writer.close()
+    archive = ChatArchiveReader(writer.log_path("test"))
+    assert len(archive) == 40
+    assert len(archive.frames) == 1
+
+
+def test_fsync_interval_cuts_frames(tmp_path):
+    writer = ChatArchiveLogWriter(tmp_path, HEADER, flush_interval=0.01, fsync_interval=0.05).start()
+    for i in range(10):
+        writer.write("test", row(i, 1_700_000_000 + i), 1_700_000_000 + i)
+    deadline = time.monotonic() + 5
+    while not writer._files.get("test") or writer._files["test"].frames == 0:
+        assert time.monotonic() < deadline, "fsync never wrote a frame"
+        time.sleep(0.01)
+    # Synced records are readable before the writer is closed
+    assert len(ChatArchiveReader(writer.log_path("test"))) == 10
+    writer.close()
+
+
+def test_records_keep_the_readers_epoch_time(tmp_path):
+    writer = ChatArchiveLogWriter(tmp_path, HEADER).start()
+    writer.write("test", row(0, 1_700_000_000.25), 1_700_000_000.25)
+    writer.write("test", row(1, 1_700_000_001))  # no epoch: parsed from the row's local timestamp
+    writer.close()
+    records = list(ChatArchiveReader(writer.log_path("test")))
+    assert [r["ts"] for r in records] == [1_700_000_000.25, 1_700_000_001.0]
+    assert [r["message"] for r in ChatArchiveReader(writer.log_path("test")).read(1_700_000_000.2,
+                                                                                  1_700_000_000.3)] == ["message 0"]
@@ -0,0 +1,104 @@
+# tests/test_chat_log_writer.py
+import csv
+import os
+import time
+
+import pytest
+
+from chat_log_writer import ChatLogWriter
+
+HEADER = ['timestamp', 'username', 'message', 'channel', 'tags', 'raw']
+
+
+def rows(n, message="hi"):
+    return [("chan", ['2024-01-01 00:00:00', f"user{i}", message, "chan", "", ""], 0.0, None) for i in range(n)]
+
+
+def csv_logs(directory):
+    return sorted(p for p in os.listdir(directory) if p.endswith(".csv"))
+
+
+def test_size_counts_bytes_not_characters(tmp_path):
+    writer = ChatLogWriter(tmp_path, HEADER)
+    writer._write_rows(rows(50, message="日本語のチャット 🎉"))
+    log = writer._files["chan"]
+    log.handle.flush()
+    assert log.size == os.path.getsize(log.path)
+    writer.close()
+
+
+def test_rotate_bytes_with_multibyte_chat(tmp_path):
+    writer = ChatLogWriter(tmp_path, HEADER, rotate_bytes=2000)
+    writer._write_rows(rows(200, message="日本語のチャット 🎉"))
+    writer.close()
+    files = csv_logs(tmp_path)
+    assert len(files) > 1
+    # Each rotated file stops at the first row past the limit, not 3-4x later
+    for name in files[:-1]:
+        assert 2000 <= os.path.getsize(tmp_path / name) < 2100
+    total = 0
+    for name in files:
+        with open(tmp_path / name, newline='', encoding='utf-8') as f:
+            total += sum(1 for _ in csv.reader(f)) - 1
+    assert total == 200
+
+
+def test_reopened_log_appends_without_a_second_header(tmp_path):
+    for _ in range(2):
+        writer = ChatLogWriter(tmp_path, HEADER)
+        writer._write_rows(rows(3))
+        writer.close()
+    with open(tmp_path / "chan_chat_log.csv", newline='', encoding='utf-8') as f:
+        lines = list(csv.reader(f))
+    assert lines[0] == HEADER and len(lines) == 7
+
+
+@pytest.mark.parametrize("writer_class", ["csv", "chatz"])
+def test_hourly_rotation_after_exactly_a_day(tmp_path, monkeypatch, writer_class):
+    if writer_class == "chatz":
+        pytest.importorskip("zstandard")
+        from chat_archive import ChatArchiveLogWriter as cls
+    else:
+        cls = ChatLogWriter
+    now = [(2024, 10, 5)]
+    monkeypatch.setattr(ChatLogWriter, "_hour", staticmethod(lambda ts=None: now[0]))
+    writer = cls(tmp_path, HEADER, rotate_hourly=True)
+    writer._write_rows(rows(1))
+    now[0] = (2024, 11, 5)  # same hour, next day: the writer sat idle for 24 h
+    writer._write_rows(rows(1))
+    writer._write_rows(rows(1))
+    writer.close()
+    assert writer.rotations == 1
+
+
+@pytest.mark.parametrize("writer_class", ["csv", "chatz"])
+def test_hourly_rotation_follows_the_queued_timestamps(tmp_path, writer_class):
+    if writer_class == "chatz":
+        pytest.importorskip("zstandard")
+        from chat_archive import ChatArchiveLogWriter as cls, ChatArchiveReader
+        suffix = ".chatz"
+
+        def count(path):
+            return len(list(ChatArchiveReader(path)))
+    else:
+        cls, suffix = ChatLogWriter, ".csv"
+
+        def count(path):
+            with open(path, newline='', encoding='utf-8') as f:
+                return sum(1 for _ in csv.reader(f)) - 1
+
+    before = time.mktime((2024, 1, 1, 23, 30, 0, 0, 0, -1))
+    after = time.mktime((2024, 1, 2, 0, 10, 0, 0, 0, -1))
+    batch = [("chan", ['', f"user{i}", "hi", "chan", "", ""], 0.0, ts)
+             for i, ts in enumerate([before] * 3 + [after] * 2 + [before + 60])]
+    # The whole backlog is written now, long after both hours: only the row times decide
+    writer = cls(tmp_path, HEADER, rotate_hourly=True)
+    writer._write_rows(batch)
+    writer.close()
+
+    assert writer.rotations == 1
+    rotated = [p for p in os.listdir(tmp_path) if p.endswith(suffix) and p != f"chan_chat_log{suffix}"]
+    assert len(rotated) == 1
+    assert count(tmp_path / rotated[0]) == 3
+    # The late 23:31 row stays in the current file instead of rotating back
+    assert count(tmp_path / f"chan_chat_log{suffix}") == 3
@@ -0,0 +1,159 @@
+# tests/test_chat_pipeline.py
+import threading
+import time
+
+import pytest
+
+from chat_pipeline import ChatPipeline, HandlerQueue
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def test_unknown_overflow_policy_is_rejected():
+    with pytest.raises(ValueError):
+        HandlerQueue(overflow="spill")
+
+
+def test_drop_oldest_keeps_the_newest_messages():
+    q = HandlerQueue(max_size=5, overflow="drop_oldest")
+    scheduled = [q.offer(i) for i in range(12)]
+    assert scheduled == [True] + [False] * 11  # scheduled once until a worker finishes it
+    assert (q.offered, q.dropped, q.max_depth) == (12, 7, 5)
+    assert q.take(10) == [7, 8, 9, 10, 11]
+
+
+def test_sample_keeps_one_in_n_above_the_threshold():
+    q = HandlerQueue(max_size=10, overflow="sample", sample_every=2, sample_above=0.5)
+    for i in range(1, 21):
+        q.offer(i)
+    # 1-5 fill to the threshold, then odd offers are sampled away; 16, 18 and 20 evict the oldest
+    assert (q.offered, q.dropped) == (20, 10)
+    assert q.take(20) == [4, 5, 6, 8, 10, 12, 14, 16, 18, 20]
+
+
+def test_block_waits_for_room_and_drops_nothing():
+    q = HandlerQueue(max_size=2, overflow="block")
+    q.offer(0), q.offer(1)
+    producer = threading.Thread(target=q.offer, args=(2,))
+    producer.start()
+    time.sleep(0.05)
+    assert producer.is_alive() and len(q) == 2
+    assert q.take(1) == [0]
+    producer.join(timeout=5)
+    assert not producer.is_alive()
+    assert q.take(5) == [1, 2] and q.dropped == 0
+
+
+def test_close_releases_a_blocked_producer_without_queueing_its_message():
+    q = HandlerQueue(max_size=2, overflow="block")
+    q.offer(0), q.offer(1)
+    result = []
+    producer = threading.Thread(target=lambda: result.append(q.offer(2)))
+    producer.start()
+    time.sleep(0.05)
+    q.close()
+    producer.join(timeout=5)
+    assert result == [False]
+    assert len(q) == 2 and q.dropped == 1
+    # Later offers are dropped too rather than growing a closed queue
+    assert q.offer(3) is False and len(q) == 2 and q.dropped == 2
+
+
+def test_pipeline_close_releases_a_producer_blocked_on_a_stuck_handler():
+    gate = threading.Event()
+    pipeline = ChatPipeline(workers=1)
+    pipeline.register(lambda batch: gate.wait(5), name="stuck", batch_size=1, max_queue=2)
+    pipeline.start()
+    producer = threading.Thread(target=lambda: [pipeline.publish(i) for i in range(10)])
+    producer.start()
+    assert wait_for(lambda: len(pipeline.handlers["stuck"].queue) == 2)
+    assert producer.is_alive()
+
+    threading.Timer(0.5, gate.set).start()
+    pipeline.close(timeout=0.1)
+    producer.join(timeout=5)
+    assert not producer.is_alive()
+    stats = pipeline.stats()["stuck"]
+    assert stats["offered"] == 10 and stats["dropped"] >= 1
+
+
+def test_each_handler_sees_its_messages_in_order():
+    pipeline = ChatPipeline(workers=4)
+    seen = {name: [] for name in ("a", "b", "c")}
+    for name in seen:
+        pipeline.register(seen[name].extend, name=name, batch_size=7)
+    pipeline.start()
+    for i in range(2000):
+        pipeline.publish(i)
+    assert pipeline.flush(timeout=10)
+    assert all(received == list(range(2000)) for received in seen.values())
+    pipeline.close()
+
+
+def test_a_slow_handler_does_not_stall_the_others():
+    gate = threading.Event()
+    fast = []
+    pipeline = ChatPipeline(workers=2)
+    pipeline.register(lambda batch: gate.wait(5), name="slow", max_queue=1000)
+    pipeline.register(fast.extend, name="fast")
+    pipeline.start()
+    for i in range(500):
+        pipeline.publish(i)
+    # The fast handler drains everything while the slow one is still stuck on its first batch
+    assert wait_for(lambda: len(fast) == 500)
+    assert pipeline.stats()["slow"]["delivered"] == 0
+    gate.set()
+    assert pipeline.flush(timeout=10)
+    assert pipeline.stats()["slow"]["delivered"] == 500
+    pipeline.close()
+
+
+def test_flush_and_close_drain_every_queued_message():
+    received = []
+
+    def handler(batch):
+        time.sleep(0.001)
+        received.extend(batch)
+
+    pipeline = ChatPipeline(workers=2)
+    pipeline.register(handler, name="slowish", batch_size=10)
+    pipeline.start()
+    for i in range(300):
+        pipeline.publish(i)
+    assert pipeline.flush(timeout=10) and received == list(range(300))
+
+    for i in range(300, 600):
+        pipeline.publish(i)
+    pipeline.close(timeout=10)
+    assert received == list(range(600))
+    stats = pipeline.stats()["slowish"]
+    assert (stats["delivered"], stats["dropped"], stats["queue_depth"]) == (600, 0, 0)
+
+    # Nothing is queued, or delivered, after close
+    pipeline.publish(600)
+    assert received == list(range(600)) and pipeline.stats()["slowish"]["queue_depth"] == 0
+
+
+def test_handler_errors_are_counted_and_delivery_continues():
+    received = []
+
+    def flaky(batch):
+        if 3 in batch:
+            raise RuntimeError("boom")
+        received.extend(batch)
+
+    pipeline = ChatPipeline(workers=1)
+    pipeline.register(flaky, batch_size=1)
+    pipeline.start()
+    for i in range(6):
+        pipeline.publish(i)
+    pipeline.close(timeout=5)
+    assert received == [0, 1, 2, 4, 5]
+    assert pipeline.stats()["flaky"]["errors"] == 1
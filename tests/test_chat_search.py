@@ -0,0 +1,79 @@
+# tests/test_chat_search.py
+import sqlite3
+import threading
+
+import pytest
+
+from chat_search import ChatSearchIndex, LiveChatIndexer
+from twitch_chat_streamer import TwitchChatReader
+
+
+def live_messages(n, channel="test", start=0):
+    return [{"channel": channel, "username": f"user{i % 7}", "message": f"hello chat message {i} kappa{i}",
+             "timestamp": 1_700_000_000 + i, "tags": {"id": f"{channel}-{i}"}} for i in range(start, start + n)]
+
+
+@pytest.mark.parametrize("backend", ["hnsw", "flat"])
+def test_recover_drops_vectors_without_metadata(tmp_path, backend):
+    if backend == "hnsw":
+        pytest.importorskip("hnswlib")
+    with ChatSearchIndex(tmp_path, backend=backend) as index:
+        index.add_live_messages(live_messages(50))
+    # A run that saved its vectors but stopped before committing the last rows' metadata
+    conn = sqlite3.connect(str(tmp_path / "messages.sqlite3"))
+    with conn:
+        conn.execute("DELETE FROM messages WHERE label >= 40")
+    conn.close()
+
+    with ChatSearchIndex(tmp_path, backend=backend) as index:
+        assert index.vectors.end() == 40
+        assert len(index.vectors.search(index.embedder.embed(["hello"]), 100)[0]) == 40
+        index.add_live_messages(live_messages(10, start=40))
+        assert len(index) == 50 and index.vectors.end() == 50
+        assert [r["message"] for r in index.search("kappa45", k=1)] == ["hello chat message 45 kappa45"]
+    with ChatSearchIndex(tmp_path, backend=backend) as index:
+        assert index.vectors.end() == 50
+
+
+def test_search_while_indexing_on_another_thread(tmp_path):
+    index = ChatSearchIndex(tmp_path, batch_size=50)
+    indexer = LiveChatIndexer(index, batch_size=50, flush_interval=0.05)
+    errors = []
+
+    def search():
+        try:
+            for i in range(200):
+                index.search(f"query{i} newword{i}", k=3)
+        except Exception as e:
+            errors.append(e)
+
+    searchers = [threading.Thread(target=search) for _ in range(3)]
+    for thread in searchers:
+        thread.start()
+    for message in live_messages(2000):
+        indexer.observe(message)
+    for thread in searchers:
+        thread.join()
+    indexer.close()
+    assert not errors
+    assert len(index) == 2000
+    assert index.search("kappa1234", k=1)[0]["message"] == "hello chat message 1234 kappa1234"
+    index.close()
+
+
+def test_reader_disconnect_indexes_queue_and_saves(tmp_path):
+    pytest.importorskip("hnswlib")
+    index = ChatSearchIndex(tmp_path / "index", backend="hnsw")
+    # A long flush interval leaves everything queued until disconnect
+    indexer = LiveChatIndexer(index, batch_size=10_000, flush_interval=60)
+    reader = TwitchChatReader(["test"], log_directory=str(tmp_path / "logs"), indexer=indexer, print_messages=False)
+    for i in range(100):
+        reader._handle_line(f"@id=msg-{i};tmi-sent-ts=1700000000000 :user{i}!user{i}@user{i}.tmi.twitch.tv "
+                            f"PRIVMSG #test :message number {i}", "test")
+    reader.disconnect()
+    assert indexer.indexed == 100
+
+    # Saved without index.close(): a fresh process sees every vector
+    with ChatSearchIndex(tmp_path / "index", backend="hnsw") as reopened:
+        assert len(reopened) == 100 and reopened.vectors.end() == 100
+    index.close()
@@ -0,0 +1,98 @@
+# tests/test_chat_store.py
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import chat_store
+from benchmarks.synthetic_vod import FakeChatDownloader
+from chat_store import ChatStore, ChatStoreWriter, epoch_ms, raw_login
+from twitch_chat_streamer import TwitchChatReader
+from twitch_vod_chat_logger import TwitchVODChatLogger
+
+
+def test_epoch_ms_normalizes_microseconds():
+    assert epoch_ms(1_700_000_000_123_456) == 1_700_000_000_123
+    assert epoch_ms("1700000000123456") == 1_700_000_000_123
+    assert epoch_ms(1_700_000_000_123) == 1_700_000_000_123
+    assert epoch_ms(None) is None and epoch_ms("") is None
+
+
+def test_live_rows_keep_the_readers_epoch_ms(tmp_path):
+    store = ChatStore(tmp_path / "chat.sqlite3")
+    reader = TwitchChatReader(["chan"], log_directory=str(tmp_path), log_writer=ChatStoreWriter(store),
+                              print_messages=False)
+    seen = []
+    original = reader.handle_chat_message
+    reader.handle_chat_message = lambda message_data: (seen.append(message_data["timestamp"]), original(message_data))
+    reader._handle_line("@id=a :alice!alice@alice.tmi.twitch.tv PRIVMSG #chan :hi", "chan")
+    reader.disconnect()
+
+    # The reader's epoch to the millisecond, not its whole-second local string
+    assert [r["timestamp_ms"] for r in store.channel_window("chan", 0, 2 ** 62)] == [int(seen[0] * 1000)]
+    store.close()
+
+
+def test_rows_without_epoch_fall_back_to_the_local_string(tmp_path):
+    store = ChatStore(tmp_path / "chat.sqlite3")
+    writer = ChatStoreWriter(store).start()
+    stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(1_700_000_000))
+    writer.write("chan", [stamp, "alice", "hi", "chan", "", ""])
+    writer.write("chan", [stamp, "bob", "yo", "chan", "", ""], 1_700_000_000.5)
+    writer.close()
+    assert [r["timestamp_ms"] for r in store.channel_window("chan", 0, 2 ** 62)] == \
+        [1_700_000_000_000, 1_700_000_000_500]
+    store.close()
+
+
+def test_vod_and_live_share_millisecond_timestamps(tmp_path):
+    store = ChatStore(tmp_path / "chat.sqlite3")
+    logger = TwitchVODChatLogger(output_dir=str(tmp_path), chat_downloader=lambda: FakeChatDownloader(50),
+                                 chat_store=store)
+    assert logger.stream_chat_to_file("123", "vod_123.sqlite3", save_to="sqlite", channel="chan") == 50
+    ChatStoreWriter(store)._write_rows([("chan", ["", "alice", "hi", "chan", ""], 0.0, 1_700_000_000.0)])
+
+    vod = store.vod_window("123", 0, 10 ** 9)
+    assert vod[0]["timestamp_ms"] == 1_700_000_000_000
+    assert all(r["timestamp_ms"] < 10 ** 13 for r in vod)
+    # One channel query returns both sources on the same clock
+    window = store.channel_window("chan", 1_700_000_000_000, 1_700_000_000_001)
+    assert sorted(r["source"] for r in window) == ["live", "vod"]
+    store.close()
+
+
+def test_raw_login_reads_the_prefix_nick():
+    assert raw_login("@display-name=Bob\\s;id=a :bob!bob@bob.tmi.twitch.tv PRIVMSG #chan :hi") == "bob"
+    assert raw_login(":carol!carol@carol.tmi.twitch.tv PRIVMSG #chan :hi") == "carol"
+    assert raw_login(":tmi.twitch.tv 001 justinfan :Welcome") is None
+    assert raw_login("PING :tmi.twitch.tv") is None and raw_login("") is None
+
+
+def test_live_author_is_the_login_not_the_display_name(tmp_path):
+    store = ChatStore(tmp_path / "chat.sqlite3")
+    reader = TwitchChatReader(["chan"], log_directory=str(tmp_path), log_writer=ChatStoreWriter(store),
+                              print_messages=False)
+    reader._handle_line("@display-name=\u5c0f\u660e;id=a :xiaoming!xiaoming@xiaoming.tmi.twitch.tv "
+                        "PRIVMSG #chan :ni hao", "chan")
+    reader._handle_line("@display-name=Alice;id=b :alice!alice@alice.tmi.twitch.tv PRIVMSG #chan :hi", "chan")
+    reader.disconnect()
+
+    [row] = store.messages_by_author("xiaoming")
+    assert (row["author"], row["display_name"], row["message"]) == ("xiaoming", "\u5c0f\u660e", "ni hao")
+    assert [r["display_name"] for r in store.messages_by_author("Alice")] == ["Alice"]
+    store.close()
+
+
+def test_lazy_store_is_opened_once_across_threads(tmp_path, monkeypatch):
+    opened = []
+
+    class SlowStore(ChatStore):
+        def __init__(self, path):
+            opened.append(path)
+            time.sleep(0.05)
+            super().__init__(path)
+
+    monkeypatch.setattr(chat_store, "ChatStore", SlowStore)
+    logger = TwitchVODChatLogger(output_dir=str(tmp_path), chat_downloader=lambda: FakeChatDownloader(1))
+    with ThreadPoolExecutor(8) as pool:
+        stores = list(pool.map(lambda _: logger._chat_store(), range(8)))
+    assert len(opened) == 1 and all(s is stores[0] for s in stores)
+    stores[0].close()
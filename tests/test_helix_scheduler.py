@@ -0,0 +1,207 @@
+# tests/test_helix_scheduler.py
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+import pytest
+import requests
+
+import helix_scheduler
+from benchmarks.stub_helix import StubHelix, stub_client_class
+from helix_scheduler import RateLimitScheduler
+from token_cache import TokenCache
+from twitch_client import TwitchCon
+from twitch_client_async import AsyncTwitchCon, HelixError
+
+
+class FakeClock:
+    """Stands in for the time module inside helix_scheduler: sleeping advances the clock"""
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class Response:
+    def __init__(self, status_code=200, limit=None, remaining=None, reset=None):
+        self.status_code = status_code
+        self.headers = {}
+        for key, value in (("Ratelimit-Limit", limit), ("Ratelimit-Remaining", remaining),
+                           ("Ratelimit-Reset", reset)):
+            if value is not None:
+                self.headers[key] = str(value)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(helix_scheduler, "time", fake)
+    return fake
+
+
+def scheduler(**kwargs):
+    kwargs = {"jitter": 0.0, "reserve": 0, **kwargs}
+    return RateLimitScheduler(**kwargs)
+
+
+def test_no_headers_means_no_waiting(clock):
+    s = scheduler()
+    for _ in range(100):
+        assert s.acquire() == 0.0
+    assert clock.sleeps == []
+
+
+def test_empty_bucket_waits_one_token_of_refill(clock):
+    s = scheduler()
+    s.update(Response(limit=10, remaining=0, reset=clock.now + 5).headers)  # refills 2 tokens/s
+    assert s.acquire() == pytest.approx(0.5)
+    assert sum(clock.sleeps) == pytest.approx(0.5)
+
+
+def test_bucket_is_full_after_reset(clock):
+    s = scheduler()
+    s.update(Response(limit=10, remaining=0, reset=clock.now + 5).headers)
+    clock.now += 6
+    assert s.acquire() == 0.0
+    assert s.remaining == 9
+
+
+def test_reserve_is_left_untouched(clock):
+    s = scheduler(reserve=2)
+    s.update(Response(limit=10, remaining=3, reset=clock.now + 7).headers)  # refills 1 token/s
+    assert s.acquire() == 0.0
+    assert s.acquire() == pytest.approx(1.0)
+
+
+def test_in_flight_requests_count_against_remaining(clock):
+    s = scheduler()
+    s.acquire()
+    s.acquire()
+    # The first response's count was taken before the second request reached the server
+    s.update(Response(limit=10, remaining=5, reset=clock.now + 5).headers)
+    assert s.remaining == 4
+
+
+def test_429_waits_for_refill_rather_than_full_reset(clock):
+    s = scheduler()
+    responses = iter([Response(429, limit=10, remaining=0, reset=clock.now + 60), Response(200)])
+    assert s.execute(lambda: next(responses)).status_code == 200
+    assert clock.sleeps == [pytest.approx(6.0)]  # one token refills every 6 s
+    assert (s.throttled, s.retries) == (1, 1)
+
+
+def test_429_without_bucket_waits_until_reset(clock):
+    s = scheduler()
+    responses = iter([Response(429, remaining=0, reset=clock.now + 3), Response(200)])
+    assert s.execute(lambda: next(responses)).status_code == 200
+    assert clock.sleeps == [pytest.approx(3.0)]
+
+
+def test_5xx_backs_off_exponentially_then_returns(clock):
+    s = scheduler(max_retries=3, base_backoff=1.0)
+    calls = []
+    resp = s.execute(lambda: calls.append(1) or Response(503))
+    assert resp.status_code == 503
+    assert len(calls) == 4
+    assert clock.sleeps == [1.0, 2.0, 4.0]
+
+
+def test_4xx_is_returned_without_retrying(clock):
+    s = scheduler()
+    calls = []
+    assert s.execute(lambda: calls.append(1) or Response(404)).status_code == 404
+    assert len(calls) == 1 and clock.sleeps == []
+
+
+def test_connection_errors_are_retried_then_raised(clock):
+    s = scheduler(max_retries=2, base_backoff=1.0)
+
+    def send():
+        raise requests.ConnectionError("connection reset")
+
+    with pytest.raises(requests.ConnectionError):
+        s.execute(send)
+    assert clock.sleeps == [1.0, 2.0]
+    assert s._in_flight == 0
+
+    failures = iter([requests.Timeout("slow")])
+
+    def flaky():
+        for error in failures:
+            raise error
+        return Response(200)
+
+    assert s.execute(flaky).status_code == 200
+
+
+def test_aiohttp_errors_and_timeouts_are_retried():
+    s = scheduler(max_retries=3, base_backoff=0.001)
+    failures = iter([aiohttp.ServerDisconnectedError(), aiohttp.ClientPayloadError("truncated"),
+                     asyncio.TimeoutError()])
+
+    async def flaky():
+        for error in failures:
+            raise error
+        return Response(200)
+
+    assert asyncio.run(s.execute_async(flaky)).status_code == 200
+    assert s.retries == 3 and s._in_flight == 0
+
+
+def test_other_exceptions_are_not_retried(clock):
+    s = scheduler()
+
+    def send():
+        raise ValueError("bad request body")
+
+    with pytest.raises(ValueError):
+        s.execute(send)
+    assert clock.sleeps == [] and s._in_flight == 0
+
+
+def test_twitchcon_paces_against_stub_without_extra_retries(tmp_path):
+    stub = StubHelix(rate_limit=10, window=1.0)
+    with stub as base_url:
+        client = stub_client_class(TwitchCon, base_url)(
+            client_id="test", client_secret="test", token_cache=TokenCache(str(tmp_path / "token.json")),
+            scheduler=RateLimitScheduler(jitter=0.05))
+        with ThreadPoolExecutor(4) as pool:
+            statuses = list(pool.map(lambda i: client._helix_get("users", params={"login": f"u{i}"}).status_code,
+                                     range(30)))
+        assert statuses == [200] * 30
+        assert stub.throttled <= 2
+
+        # A 400 is raised after one request: nothing above the scheduler retries it
+        before = stub.requests
+        with pytest.raises(requests.HTTPError):
+            client._helix_get("users", params=[("login", f"u{i}") for i in range(101)])
+        assert stub.requests == before + 1
+
+
+def test_async_client_retries_non_json_503s(tmp_path):
+    stub = StubHelix()
+
+    async def run(base_url):
+        async with stub_client_class(AsyncTwitchCon, base_url)(
+                client_id="test", client_secret="test", token_cache=TokenCache(str(tmp_path / "token.json")),
+                scheduler=scheduler(max_retries=2, base_backoff=0.01)) as helix:
+            stub.fail_next(2, 503)
+            users = await helix.get_users(["alice"])
+            assert users["alice"]["login"] == "alice"
+            assert stub.requests == 3
+
+            # Out of retries: the 503 surfaces as a HelixError, not a JSON decode error
+            stub.fail_next(3, 503)
+            with pytest.raises(HelixError) as raised:
+                await helix.get_users(["bob"])
+            assert raised.value.status_code == 503 and raised.value.data is None
+
+    with stub as base_url:
+        asyncio.run(run(base_url))
@@ -0,0 +1,67 @@
+# tests/test_irc_parser.py
+from benchmarks.fake_irc import synthetic_line
+from chat_search import _TAG_ID
+from irc_parser import LazyTags, format_tags, parse_line, parse_tags
+from twitch_chat_streamer import TwitchChatReader
+
+
+class RowCollector:
+    def __init__(self):
+        self.rows = []
+
+    def start(self):
+        return self
+
+    def write(self, channel, row, ts=None):
+        self.rows.append(row)
+
+    def close(self):
+        pass
+
+
+def test_parse_privmsg():
+    msg = parse_line(synthetic_line("chan", 3))
+    assert (msg.command, msg.channel, msg.nick) == ("PRIVMSG", "chan", "viewer3")
+    assert msg.tags.get("display-name") == "viewer3"
+    assert msg.tags.get("id").endswith("000000000003")  # not confused with room-id / user-id
+    assert msg.tags.get("missing", "x") == "x"
+
+
+def test_lazy_get_matches_full_decode():
+    raw = "@badge-info=;display-name=A\\sB;emotes=;room-id=1;id=abc;msg=semi\\:colon"
+    tags = LazyTags(raw)
+    decoded = parse_tags(raw)
+    for key in decoded:
+        assert tags.get(key) == decoded[key]
+    assert tags._dict is None
+
+
+def test_format_tags_round_trips():
+    raw = "@color=#FFF;display-name=A\\sB;msg=x\\:y"
+    tags = LazyTags(raw)
+    assert format_tags(tags) == raw[1:]
+    assert tags._dict is None  # the raw slice is reused, not decoded and re-encoded
+    plain = {"display-name": "A B", "msg": "x;y\\z", "empty": ""}
+    assert parse_tags(format_tags(plain)) == plain
+    assert format_tags({}) == ""
+
+
+def test_logged_row_keeps_tags_undecoded(tmp_path):
+    collector = RowCollector()
+    reader = TwitchChatReader(["chan"], log_directory=str(tmp_path), log_writer=collector, print_messages=False)
+    captured = []
+    original = reader.handle_chat_message
+    reader.handle_chat_message = lambda message_data: (captured.append(message_data), original(message_data))
+    line = synthetic_line("chan", 7)
+    reader._handle_line(line, "chan")
+    row = collector.rows[0]
+    assert row[4] == line.partition(" ")[0][1:]
+    assert captured[0]["tags"]._dict is None
+
+
+def test_tag_id_pattern_reads_both_log_formats():
+    raw = format_tags(LazyTags(synthetic_line("chan", 9).partition(" ")[0]))
+    found = _TAG_ID.search(raw)
+    assert (found.group(1) or found.group(2)).endswith("000000000009")
+    found = _TAG_ID.search(str({"room-id": "1", "id": "old-style"}))
+    assert (found.group(1) or found.group(2)) == "old-style"
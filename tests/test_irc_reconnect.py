@@ -0,0 +1,142 @@
+# tests/test_irc_reconnect.py
+import collections
+import os
+import socket
+import time
+
+import pytest
+
+from benchmarks.fake_irc import fake_irc_server
+from ingest_supervisor import _ShardReader
+from irc_reconnect import Backoff, GapLog, in_gap, read_gaps
+from twitch_chat_streamer import TwitchChatReader
+
+
+class CollectingPublisher:
+    """Stands in for ingest_supervisor._Publisher: counts published messages per channel"""
+
+    def __init__(self):
+        self.counts = collections.Counter()
+
+    def start(self):
+        return self
+
+    def publish(self, item):
+        self.counts[item[0]] += 1
+
+    def close(self):
+        pass
+
+
+class CountingReader(TwitchChatReader):
+    received = 0
+
+    def handle_chat_message(self, message_data):
+        self.received += 1
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_backoff_grows_to_the_cap_and_resets():
+    backoff = Backoff(base=1.0, max_delay=8.0, jitter=0.0)
+    assert [backoff.next_delay() for _ in range(6)] == [1.0, 2.0, 4.0, 8.0, 8.0, 8.0]
+    backoff.reset()
+    assert backoff.next_delay() == 1.0
+
+
+def test_backoff_jitter_stays_within_bounds():
+    backoff = Backoff(base=4.0, max_delay=4.0, jitter=0.5)
+    assert all(2.0 <= backoff.next_delay() <= 4.0 for _ in range(100))
+
+
+def test_gap_log_round_trip(tmp_path):
+    path = tmp_path / "gaps.csv"
+    log = GapLog(str(path))
+    log.record(["a", "b"], 100.0, 105.5, "ping timeout")
+    log.record(["a"], 200.0, 201.0, "connection closed")
+    gaps = read_gaps(str(path))
+    assert [(g["channel"], g["seconds"], g["reason"]) for g in gaps] == [
+        ("a", 5.5, "ping timeout"), ("b", 5.5, "ping timeout"), ("a", 1.0, "connection closed")]
+    assert in_gap(gaps, "b", 102.0)
+    assert not in_gap(gaps, "b", 200.5)
+
+
+@pytest.mark.parametrize("failure, reason", [
+    ({"drop_after": 0.5}, "connection closed"),
+    ({"reconnect_after": 0.5}, "server asked to reconnect"),
+    ({"stall_after": 0.5}, "ping timeout"),
+])
+def test_reader_reconnects_and_records_gap(tmp_path, failure, reason):
+    with fake_irc_server(rate=1000, **failure) as (host, port):
+        reader = CountingReader(["a"], log_directory=str(tmp_path), print_messages=False, ping_interval=0.3,
+                                pong_timeout=0.3, reconnect_delay=0.05)
+        reader.server, reader.port = host, port
+        reader.start_listening()
+        try:
+            assert wait_for(lambda: read_gaps(str(tmp_path / "gaps.csv")))
+            before = reader.received
+            assert wait_for(lambda: reader.received > before)  # chat flows again after the reconnect
+        finally:
+            reader.stop_listening()
+    assert read_gaps(str(tmp_path / "gaps.csv"))[0]["reason"] == reason
+
+
+def test_part_does_not_reconnect(tmp_path):
+    publisher = CollectingPublisher()
+    with fake_irc_server(rate=1000) as (host, port):
+        reader = _ShardReader([], publisher, log_directory=str(tmp_path), server=host, port=port)
+        reader.reconnect_delay = 0.05  # a wrongly reconnecting listen thread would be back almost at once
+        reader.is_connected = True
+        reader.join(["a", "b"])
+        try:
+            assert wait_for(lambda: publisher.counts["a"] and publisher.counts["b"])
+            reader.part(["a"])
+            parted_a, parted_b = publisher.counts["a"], publisher.counts["b"]
+            time.sleep(1.0)
+            assert publisher.counts["a"] == parted_a
+            assert publisher.counts["b"] > parted_b
+            assert "a" not in reader.sockets and "a" not in reader.listen_threads
+        finally:
+            reader.disconnect()
+    assert not os.path.exists(tmp_path / "gaps.csv")
+
+
+def test_join_keeps_retrying_a_failed_first_connect(tmp_path):
+    port = free_port()
+    publisher = CollectingPublisher()
+    reader = _ShardReader([], publisher, log_directory=str(tmp_path), server="127.0.0.1", port=port)
+    reader.reconnect_delay = reader.max_reconnect_delay = 0.1
+    reader.is_connected = True
+    reader.join(["a"])  # nothing listening yet: the first connect fails
+    try:
+        assert reader.listen_threads["a"].is_alive()
+        with fake_irc_server(rate=1000, port=port):
+            assert wait_for(lambda: publisher.counts["a"] > 0)
+    finally:
+        reader.disconnect()
+
+
+def test_supervisor_delivers_every_channel(tmp_path):
+    from ingest_supervisor import IngestSupervisor
+    received = collections.Counter()
+    with fake_irc_server(rate=500) as (host, port):
+        supervisor = IngestSupervisor(["a", "b", "c"], workers=2, log_directory=str(tmp_path),
+                                      handler=lambda message_data: received.update([message_data['channel']]),
+                                      server=host, port=port).start()
+        try:
+            assert wait_for(lambda: all(received[c] for c in "abc"), timeout=20)
+        finally:
+            supervisor.stop()
@@ -0,0 +1,56 @@
+# tests/test_parallel_vods.py
+import json
+import time
+
+import pytest
+
+from benchmarks.synthetic_vod import FakeChatDownloader
+from twitch_vod_chat_logger import TwitchVODChatLogger
+from vod_manifest import STATUS_COMPLETE, STATUS_FAILED, VODManifest
+
+VOD_IDS = [str(1000 + i) for i in range(6)]
+
+
+def make_logger(tmp_path, delay=0.0, fail_on=(), manifest=None):
+    return TwitchVODChatLogger(output_dir=str(tmp_path),
+                               chat_downloader=lambda: FakeChatDownloader(100, delay=delay, fail_on=fail_on),
+                               manifest=manifest)
+
+
+def test_failing_vod_does_not_abort_the_batch(tmp_path):
+    logger = make_logger(tmp_path, fail_on={VOD_IDS[2]})
+    result = logger.stream_multiple_vods(VOD_IDS, file_prefix="u", save_to="json", workers=3)
+    assert set(result["failed"]) == {VOD_IDS[2]}
+    assert result["saved"] == {vod_id: 100 for vod_id in VOD_IDS if vod_id != VOD_IDS[2]}
+    for vod_id in result["saved"]:
+        assert len(json.loads((tmp_path / f"u_{vod_id}.json").read_text())) == 100
+
+
+def test_workers_download_concurrently(tmp_path):
+    logger = make_logger(tmp_path, delay=0.3)
+    started = time.perf_counter()
+    result = logger.stream_multiple_vods(VOD_IDS, file_prefix="u", save_to="jsonl", workers=len(VOD_IDS))
+    # One at a time would take 6 x 0.3 s
+    assert time.perf_counter() - started < 1.2
+    assert len(result["saved"]) == len(VOD_IDS)
+    # Each file holds only its own VOD's messages: nothing is shared between threads
+    for vod_id in VOD_IDS:
+        assert len((tmp_path / f"u_{vod_id}.jsonl").read_text().splitlines()) == 100
+    assert logger.chat_data == []
+
+
+def test_parallel_downloads_share_one_manifest(tmp_path):
+    manifest = VODManifest(tmp_path / "manifest.sqlite3")
+    logger = make_logger(tmp_path, fail_on={VOD_IDS[0]}, manifest=manifest)
+    logger.checkpoint_every = 10
+    logger.stream_multiple_vods(VOD_IDS, file_prefix="u", save_to="csv", workers=4)
+    assert manifest.get(VOD_IDS[0])["status"] == STATUS_FAILED
+    for vod_id in VOD_IDS[1:]:
+        entry = manifest.get(vod_id)
+        assert (entry["status"], entry["message_count"], entry["file_name"]) == \
+            (STATUS_COMPLETE, 100, f"u_{vod_id}.csv")
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        make_logger(tmp_path).stream_multiple_vods(VOD_IDS, file_prefix="u", save_to="xml")
@@ -0,0 +1,118 @@
+# tests/test_sully.py
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sully import SullyStatsPipeline
+
+FIXTURE = Path(__file__).resolve().parent.parent / "data" / "meowbuffy - Twitch stream stats in 2024 - SullyGnome.csv"
+
+
+@pytest.fixture
+def fixtures(tmp_path):
+    """The meowbuffy fixture plus a second creator with halved viewers, in their own directory."""
+    shutil.copy(FIXTURE, tmp_path / FIXTURE.name)
+    other = pd.read_csv(FIXTURE, encoding="utf-8-sig")
+    other["Avg viewers"] //= 2
+    other["Stream URL"] = other["Stream URL"].str.replace("meowbuffy", "otherbuffy")
+    other.to_csv(tmp_path / "otherbuffy_stats.csv", index=False)
+    return tmp_path
+
+
+@pytest.fixture
+def result(fixtures):
+    return SullyStatsPipeline(fixtures / "cache", session=object()).run(directory=fixtures)
+
+
+def old_rows(path):
+    """The pre-pipeline scraper: plain read_csv, then the two ratio columns row by row."""
+    df = pd.read_csv(path, encoding="utf-8-sig")
+    df["Variability Ratio"] = df["Peak viewers"] / df["Avg viewers"]
+    df["Peak Deviation Index"] = (df["Peak viewers"] - df["Avg viewers"]) / df["Avg viewers"]
+    return df
+
+
+def start_time(text):
+    day, rest = text.split(" ", 2)[1:]
+    return datetime.strptime(f"{day.rstrip('stndrh')} {rest}", "%d %B %Y %H:%M")
+
+
+def test_run_reads_every_csv_in_the_directory(result):
+    streams, games, creators = result["streams"], result["games"], result["creators"]
+    assert list(creators["creator"]) == ["meowbuffy", "otherbuffy"]
+    assert list(creators["streams"]) == [62, 62]
+    assert len(streams) == 124
+    assert set(games["creator"]) == {"meowbuffy", "otherbuffy"}
+
+
+def test_output_dtypes(result):
+    streams = result["streams"]
+    assert streams["Stream length (mins)"].dtype == np.uint16
+    assert streams["Watch time (mins)"].dtype == np.uint32
+    assert streams["Avg viewers"].dtype == np.uint32
+    assert streams["Peak viewers"].dtype == np.uint32
+    assert streams["Followers gained"].dtype == np.int32
+    assert streams["creator"].dtype == "category"
+    assert streams["Games"].dtype == "category"
+    assert pd.api.types.is_datetime64_dtype(streams["start"])
+    for column in ("Variability Ratio", "Peak Deviation Index", "Hours", "Followers per 1k watch hours",
+                   "Avg viewers z", "Avg viewers 7-stream mean", "Trend vs rolling"):
+        assert streams[column].dtype == np.float32, column
+    assert result["games"]["Game"].dtype == "category"
+
+
+def test_stream_metrics_match_the_per_row_code(fixtures, result):
+    streams = result["streams"].set_index("Stream URL")
+    for creator, path in (("meowbuffy", fixtures / FIXTURE.name), ("otherbuffy", fixtures / "otherbuffy_stats.csv")):
+        old = old_rows(path).set_index("Stream URL")
+        new = streams.loc[old.index]
+        assert (new["creator"] == creator).all()
+        np.testing.assert_allclose(new["Variability Ratio"], old["Variability Ratio"], rtol=1e-6)
+        np.testing.assert_allclose(new["Peak Deviation Index"], old["Peak Deviation Index"], rtol=1e-6, atol=1e-7)
+        assert list(new["start"]) == [pd.Timestamp(start_time(t)) for t in old["Stream start time"]]
+
+        followers = [f * 60_000 / w if w else np.nan for f, w in zip(old["Followers gained"], old["Watch time (mins)"])]
+        np.testing.assert_allclose(new["Followers per 1k watch hours"], followers, rtol=1e-6)
+
+        mean, std = old["Avg viewers"].mean(), old["Avg viewers"].std()
+        np.testing.assert_allclose(new["Avg viewers z"], [(v - mean) / std for v in old["Avg viewers"]],
+                                   rtol=1e-5, atol=1e-6)
+
+        # Rolling mean over the previous 7 streams in start order (the CSV lists newest first)
+        viewers = list(old["Avg viewers"][::-1])
+        rolling = [np.mean(viewers[max(0, i - 6):i + 1]) for i in range(len(viewers))]
+        np.testing.assert_allclose(new["Avg viewers 7-stream mean"][::-1], rolling, rtol=1e-6)
+
+
+def test_creator_metrics_match_the_per_row_code(fixtures, result):
+    creators = result["creators"].set_index("creator")
+    for creator, path in (("meowbuffy", fixtures / FIXTURE.name), ("otherbuffy", fixtures / "otherbuffy_stats.csv")):
+        old = old_rows(path)
+        row = creators.loc[creator]
+        assert row["watch_time_mins"] == old["Watch time (mins)"].sum()
+        assert row["peak_viewers"] == old["Peak viewers"].max()
+        assert row["followers_gained"] == old["Followers gained"].sum()
+        assert row["hours"] == pytest.approx(old["Stream length (mins)"].sum() / 60, rel=1e-6)
+        assert row["avg_viewers"] == pytest.approx(old["Avg viewers"].mean())
+        assert row["viewers_cv"] == pytest.approx(old["Avg viewers"].std() / old["Avg viewers"].mean())
+        assert row["variability_ratio"] == pytest.approx(old["Variability Ratio"].mean(), rel=1e-6)
+        viewers = old["Avg viewers"][::-1].to_numpy(dtype=float)
+        slope = np.polyfit(np.arange(len(viewers)), viewers, 1)[0]
+        assert row["viewers_trend_per_stream"] == pytest.approx(slope, rel=1e-9)
+
+
+def test_game_metrics_count_multi_game_streams_for_each_game(fixtures, result):
+    games = result["games"].set_index(["creator", "Game"])
+    old = old_rows(fixtures / FIXTURE.name)
+    expected = {}
+    for titles, watch in zip(old["Games"], old["Watch time (mins)"]):
+        for game in titles.split(","):
+            streams, total = expected.get(game.strip(), (0, 0))
+            expected[game.strip()] = (streams + 1, total + watch)
+    meow = games.loc["meowbuffy"]
+    assert {g: (r["streams"], r["watch_time_mins"]) for g, r in meow.iterrows()} == expected
+    assert list(meow["watch_time_mins"]) == sorted(meow["watch_time_mins"], reverse=True)
@@ -0,0 +1,77 @@
+# tests/test_vod_manifest.py
+from benchmarks.synthetic_vod import FakeChatDownloader
+from chat_store import ChatStore
+from twitch_vod_chat_logger import TwitchVODChatLogger
+from vod_manifest import STATUS_COMPLETE, VODManifest
+
+
+class CountingDownloads:
+    """chat_downloader factory that counts the downloads started"""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.started = 0
+
+    def __call__(self):
+        self.started += 1
+        return FakeChatDownloader(self.messages)
+
+
+def make_logger(tmp_path, downloads, **kwargs):
+    return TwitchVODChatLogger(output_dir=str(tmp_path), chat_downloader=downloads,
+                               manifest=VODManifest(tmp_path / "manifest.sqlite3"), **kwargs)
+
+
+def test_complete_vod_is_skipped_in_the_same_format(tmp_path):
+    downloads = CountingDownloads(20)
+    logger = make_logger(tmp_path, downloads)
+    assert logger.stream_chat_to_file("1", "u_1.json", save_to="json") == 20
+    assert logger.stream_chat_to_file("1", "u_1.json", save_to="json") == 20
+    assert downloads.started == 1
+
+
+def test_complete_vod_is_downloaded_again_in_another_format(tmp_path):
+    downloads = CountingDownloads(20)
+    logger = make_logger(tmp_path, downloads)
+    logger.stream_chat_to_file("1", "u_1.json", save_to="json")
+    assert logger.stream_chat_to_file("1", "u_1.csv", save_to="csv") == 20
+    assert downloads.started == 2
+    assert (tmp_path / "u_1.csv").exists()
+    assert logger.manifest.get("1")["save_to"] == "csv"
+
+
+def test_complete_vod_whose_file_is_gone_is_downloaded_again(tmp_path):
+    downloads = CountingDownloads(20)
+    logger = make_logger(tmp_path, downloads)
+    logger.stream_chat_to_file("1", "u_1.jsonl", save_to="jsonl")
+    (tmp_path / "u_1.jsonl").unlink()
+    assert logger.stream_chat_to_file("1", "u_1.jsonl", save_to="jsonl") == 20
+    assert downloads.started == 2
+    assert len((tmp_path / "u_1.jsonl").read_text().splitlines()) == 20
+
+
+def test_complete_vod_missing_from_the_store_is_downloaded_again(tmp_path):
+    downloads = CountingDownloads(20)
+    store = ChatStore(tmp_path / "chat.sqlite3")
+    logger = make_logger(tmp_path, downloads, chat_store=store)
+    logger.stream_chat_to_file("1", "u_1.sqlite", save_to="sqlite", channel="chan")
+    store.delete_vod("1")
+    # Downloaded from the start, not resumed from the completed entry's offset
+    assert logger.stream_chat_to_file("1", "u_1.sqlite", save_to="sqlite", channel="chan") == 20
+    assert store.count(vod_id="1") == 20 and downloads.started == 2
+    store.close()
+
+
+def test_unfinished_checks_format_and_file(tmp_path):
+    manifest = VODManifest(tmp_path / "manifest.sqlite3")
+    manifest.add_pending("u", ["1", "2", "3", "4"])
+    for vod_id in ("1", "2", "3"):
+        manifest.update(vod_id, status=STATUS_COMPLETE, save_to="json", file_name=f"u_{vod_id}.json")
+    (tmp_path / "u_1.json").write_text("[]")
+    (tmp_path / "u_2.json").write_text("[]")
+
+    assert manifest.unfinished("u") == ["4"]
+    assert manifest.unfinished("u", save_to="json", directory=tmp_path) == ["4", "3"]
+    assert manifest.unfinished("u", save_to="csv") == ["4", "3", "2", "1"]
+    assert manifest.is_complete("1", "json", "u_1.json", tmp_path)
+    assert not manifest.is_complete("1", "csv")
@@ -0,0 +1,102 @@
+# tests/test_vod_streaming.py
+import itertools
+import json
+
+import pytest
+
+from benchmarks.bench_vod_streaming import SampledLogger
+from benchmarks.synthetic_vod import FakeChatDownloader
+from chat_sinks import ParquetSink
+from twitch_vod_chat_logger import TwitchVODChatLogger
+from vod_manifest import STATUS_COMPLETE, VODManifest
+
+
+def make_logger(tmp_path, messages, manifest=False):
+    return TwitchVODChatLogger(output_dir=str(tmp_path), chat_downloader=lambda: FakeChatDownloader(messages),
+                               manifest=VODManifest(tmp_path / "manifest.sqlite3") if manifest else None)
+
+
+def test_streaming_memory_stays_flat_with_vod_length(tmp_path):
+    logger = SampledLogger(str(tmp_path), 200_000, every=20_000)
+    assert logger.stream_chat_to_file("1", "vod.jsonl", save_to="jsonl") == 200_000
+    (first_n, first_rss), (last_n, last_rss) = logger.samples[0], logger.samples[-1]
+    assert (first_n, last_n) == (20_000, 200_000)
+    # 10x the messages: holding 180k more would cost well over 100 MB; streaming stays within noise
+    assert last_rss - first_rss < 8.0
+
+
+def test_parquet_sink_counts_records_as_written(tmp_path):
+    pytest.importorskip("pyarrow")
+    logger = make_logger(tmp_path, 3)
+    with ParquetSink(tmp_path / "x.parquet", row_group_size=100) as sink:
+        for record in logger.iter_chat("1"):
+            sink.write(record)
+        assert (sink.count, sink.flushed) == (3, 0)
+        sink.flush()
+        assert (sink.count, sink.flushed) == (3, 3)
+
+
+def record_checkpoints(logger):
+    checkpoints = []
+    original = logger._checkpoint
+    logger._checkpoint = lambda vod_id, file_name, save_to, status, count, *rest: (
+        checkpoints.append((status, count)), original(vod_id, file_name, save_to, status, count, *rest))
+    return checkpoints
+
+
+@pytest.mark.parametrize("save_to, expected", [("jsonl", [1_000, 2_000, 2_500]), ("csv", [1_000, 2_000, 2_500]),
+                                               ("parquet", [2_500])])
+def test_checkpoints_and_progress_follow_the_message_count(tmp_path, save_to, expected, capsys):
+    if save_to == "parquet":
+        pytest.importorskip("pyarrow")
+    logger = make_logger(tmp_path, 2_500, manifest=True)
+    logger.checkpoint_every = 1_000
+    checkpoints = record_checkpoints(logger)
+
+    assert logger.stream_chat_to_file("1", f"vod.{save_to}", save_to=save_to, progress_every=1_000) == 2_500
+    # Parquet can't be resumed, so only its completion is recorded
+    assert [count for _, count in checkpoints] == expected
+    assert checkpoints[-1][0] == STATUS_COMPLETE
+    progress = [line for line in capsys.readouterr().out.splitlines() if "messages..." in line]
+    assert len(progress) == 2
+
+
+def test_jsonl_output_is_complete(tmp_path):
+    logger = make_logger(tmp_path, 1_234)
+    logger.stream_chat_to_file("1", "vod.jsonl", save_to="jsonl")
+    with open(tmp_path / "vod.jsonl", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) == 1_234
+    assert records[0]["id"].endswith("000000000000")
+
+
+def test_manifest_does_not_shrink_parquet_row_groups(tmp_path):
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+    sizes = {}
+    for manifest in (False, True):
+        out = tmp_path / str(manifest)
+        out.mkdir()
+        make_logger(out, 20_000, manifest=manifest).stream_chat_to_file("1", "vod.parquet", save_to="parquet")
+        assert pq.ParquetFile(out / "vod.parquet").metadata.num_row_groups == 1
+        sizes[manifest] = (out / "vod.parquet").stat().st_size
+    assert sizes[True] == sizes[False]
+
+
+def test_manifest_checkpoints_chatz_on_its_own_frames(tmp_path):
+    pytest.importorskip("zstandard")
+    from chat_archive import ChatArchiveReader
+    sizes = {}
+    for manifest in (False, True):
+        out = tmp_path / str(manifest)
+        out.mkdir()
+        logger = make_logger(out, 40_000, manifest=manifest)
+        checkpoints = record_checkpoints(logger)
+        logger.stream_chat_to_file("1", "vod.chatz", save_to="chatz")
+        archive = ChatArchiveReader(out / "vod.chatz")
+        sizes[manifest] = (out / "vod.chatz").stat().st_size
+    # Same frames as without a manifest, with a checkpoint at each frame boundary
+    assert sizes[True] == sizes[False]
+    assert [count for _, count in checkpoints[:-1]] == \
+        list(itertools.accumulate(frame[2] for frame in archive.frames))[:-1]
+    assert len(archive) == 40_000
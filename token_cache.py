@@ -0,0 +1,63 @@
+# token_cache.py
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_TOKEN_CACHE = Path(os.getenv("TWITCH_TOKEN_CACHE", Path.home() / ".cache" / "twitch" / "app_token.json"))
+
+
+class TokenCache:
+    """
+    App access tokens persisted to a JSON file, keyed by client ID.
+
+    Lets separate processes (cron jobs, CLI runs) reuse one token until it is
+    close to expiring instead of minting a new one per run. The file is
+    written atomically and readable only by the owner.
+    """
+
+    def __init__(self, path=DEFAULT_TOKEN_CACHE, refresh_margin: float = 300.0):
+        self.path = Path(path)
+        self.refresh_margin = refresh_margin  # treat tokens this close to expiry as expired
+        self._lock = threading.Lock()
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, client_id: str) -> Optional[dict]:
+        """Return {"access_token", "expires_at"} if a usable token is cached."""
+        entry = self._read().get(client_id)
+        if entry and entry.get("expires_at", 0) - self.refresh_margin > time.time():
+            return entry
+        return None
+
+    def put(self, client_id: str, access_token: str, expires_at: float) -> None:
+        with self._lock:
+            data = self._read()
+            data[client_id] = {"access_token": access_token, "expires_at": expires_at}
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=".token-")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                os.chmod(tmp, 0o600)
+                os.replace(tmp, self.path)
+            except OSError as e:
+                print(f"Could not write token cache {self.path}: {e}")
+
+    def invalidate(self, client_id: str) -> None:
+        with self._lock:
+            data = self._read()
+            if data.pop(client_id, None) is not None:
+                try:
+                    with open(self.path, "w", encoding="utf-8") as f:
+                        json.dump(data, f)
+                except OSError:
+                    pass
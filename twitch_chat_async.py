@@ -0,0 +1,252 @@
+# twitch_chat_async.py
+import asyncio
+import collections
+import threading
+import time
+
+from irc_framing import LineFramer
+from irc_parser import parse_line
+from irc_reconnect import Backoff
+from twitch_chat_streamer import TwitchChatReader
+
+
+class IRCLineProtocol(asyncio.BufferedProtocol):
+    """asyncio protocol that lets the event loop receive directly into a LineFramer."""
+
+    def __init__(self, framer: LineFramer, on_line, closed: asyncio.Future):
+        self.framer = framer
+        self.on_line = on_line
+        self.closed = closed
+        self.last_received = None  # epoch seconds of the last data, for gap tracking
+
+    def get_buffer(self, sizehint):
+        return self.framer.writable()
+
+    def buffer_updated(self, nbytes):
+        self.last_received = time.time()
+        self.framer.advance(nbytes)
+        for line in self.framer.lines():
+            self.on_line(line)
+
+    def connection_lost(self, exc):
+        if not self.closed.done():
+            self.closed.set_result(exc)
+
+
+class JoinRateLimiter:
+    """Sliding-window limiter for IRC JOINs (Twitch allows 20 joins per 10 seconds by default)."""
+
+    def __init__(self, max_joins=20, period=10.0):
+        self.max_joins = max_joins
+        self.period = period
+        self._sent = collections.deque()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, count=1):
+        """Wait until `count` joins can be sent without exceeding the limit."""
+        count = min(count, self.max_joins)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._sent and now - self._sent[0] >= self.period:
+                    self._sent.popleft()
+                if len(self._sent) + count <= self.max_joins:
+                    self._sent.extend([now] * count)
+                    return
+                await asyncio.sleep(self.period - (now - self._sent[0]))
+
+
+class AsyncTwitchChatReader(TwitchChatReader):
+    """
+    Read many channels from a single asyncio event loop.
+
+    Channels are spread over a small pool of IRC connections (at most
+    `channels_per_connection` each) and joined in batched `JOIN #a,#b,...`
+    commands that respect the join rate limit. Parsed messages are passed to
+    `handle_chat_message` exactly like the threaded reader. A connection that
+    drops, goes silent or gets a RECONNECT notice is re-opened with backoff and
+    its channels rejoined in batches; the outage is written to the gap log.
+    """
+
+    def __init__(self, channels, log_directory="chat_logs", channels_per_connection=100,
+                 join_batch_size=20, join_rate=20, join_period=10.0, recv_buffer_size=65536,
+                 log_writer=None, analytics=None, indexer=None, metrics=None, print_messages=True,
+                 pipeline=None, ping_interval=60.0, pong_timeout=10.0, connect_timeout=10.0, reconnect_delay=1.0,
+                 max_reconnect_delay=60.0):
+        self.channels_per_connection = channels_per_connection
+        self.join_batch_size = join_batch_size
+        self.join_rate = join_rate
+        self.join_period = join_period
+        self._loop = None
+        self._loop_thread = None
+        self._stop_event = None
+        super().__init__(channels, log_directory=log_directory, recv_buffer_size=recv_buffer_size,
+                         log_writer=log_writer, analytics=analytics, indexer=indexer, metrics=metrics,
+                         print_messages=print_messages, pipeline=pipeline, ping_interval=ping_interval, pong_timeout=pong_timeout,
+                         connect_timeout=connect_timeout, reconnect_delay=reconnect_delay,
+                         max_reconnect_delay=max_reconnect_delay)
+
+    def _connection_groups(self):
+        """Split the channel list into one group per IRC connection"""
+        size = max(1, self.channels_per_connection)
+        return [self.channels[i:i + size] for i in range(0, len(self.channels), size)]
+
+    def _join_batches(self, channels):
+        """Group channels into JOIN lines, keeping each line under the 512 byte IRC limit"""
+        batches, batch, length = [], [], 5
+        for channel in channels:
+            extra = len(channel) + 2
+            if batch and (len(batch) >= self.join_batch_size or length + extra > 500):
+                batches.append(batch)
+                batch, length = [], 5
+            batch.append(channel)
+            length += extra
+        if batch:
+            batches.append(batch)
+        return batches
+
+    async def _session(self, index, channels, limiter, on_connected):
+        """
+        Open one IRC connection, join its channels and dispatch incoming lines until
+        it ends. Returns (reason, last_received): reason is None if it never connected,
+        last_received is None if no data arrived.
+        """
+        loop = asyncio.get_running_loop()
+        closed = loop.create_future()
+        framer = self.framers.get(index)
+        if framer is None:
+            framer = self.framers[index] = LineFramer(self.recv_buffer_size)
+        framer.clear()
+        transport = None
+        state = {"reason": None}
+
+        def on_line(line):
+            if line.startswith('PING'):
+                transport.write(b"PONG :tmi.twitch.tv\r\n")
+            elif ' RECONNECT' in line and parse_line(line).command == 'RECONNECT':
+                state["reason"] = "server asked to reconnect"
+                transport.close()
+            else:
+                self._handle_line(line)
+
+        try:
+            transport, protocol = await asyncio.wait_for(loop.create_connection(
+                lambda: IRCLineProtocol(framer, on_line, closed), self.server, self.port), self.connect_timeout)
+        except Exception as e:
+            print(f"Connection failed for {len(channels)} channels: {e!r}")
+            return None, None
+        if self.metrics is not None:
+            self.metrics.connects.inc()
+            if index in self._connected_before:
+                self.metrics.reconnects.inc()
+        self._connected_before.add(index)
+        on_connected()
+
+        transport.write(b"CAP REQ :twitch.tv/tags twitch.tv/commands\r\n")
+        transport.write(f"PASS oauth:justinfan12345\r\nNICK {self.nickname}\r\n".encode())
+
+        async def join_all():
+            for batch in self._join_batches(channels):
+                await limiter.acquire(len(batch))
+                transport.write(("JOIN " + ",".join(f"#{c}" for c in batch) + "\r\n").encode())
+            print(f"Joined {len(channels)} channels on one connection")
+
+        join_task = asyncio.create_task(join_all())
+        try:
+            # Watchdog: PING a connection that has been quiet for ping_interval and
+            # give up on it if nothing at all comes back within pong_timeout
+            seen, pinged = framer.bytes_received, False
+            timeout = self.ping_interval
+            while True:
+                try:
+                    exc = await asyncio.wait_for(asyncio.shield(closed), timeout)
+                    if not state["reason"]:
+                        state["reason"] = f"error: {exc}" if exc else "connection closed"
+                    break
+                except asyncio.TimeoutError:
+                    if framer.bytes_received != seen:
+                        seen, pinged = framer.bytes_received, False
+                        timeout = self.ping_interval
+                    elif pinged:
+                        state["reason"] = "ping timeout"
+                        break
+                    else:
+                        transport.write(b"PING :tmi.twitch.tv\r\n")
+                        pinged, timeout = True, self.pong_timeout
+        finally:
+            join_task.cancel()
+            transport.abort()
+        return state["reason"], protocol.last_received
+
+    async def _run_connection(self, index, channels, limiter):
+        """Keep one connection's channels joined, reconnecting with backoff and recording gaps"""
+        backoff = Backoff(self.reconnect_delay, self.max_reconnect_delay)
+        outage = {"lost_at": None, "reason": None}
+
+        def on_connected():
+            if outage["lost_at"] is not None:
+                now = time.time()
+                self.gap_log.record(channels, outage["lost_at"], now, outage["reason"])
+                if self.metrics is not None:
+                    self.metrics.gaps.inc()
+                    self.metrics.gap_seconds.observe(now - outage["lost_at"])
+                outage["lost_at"] = None
+
+        retry = False
+        while self.is_connected:
+            if retry:
+                delay = backoff.next_delay()
+                print(f"Reconnecting {len(channels)} channels in {delay:.1f}s")
+                await asyncio.sleep(delay)
+            retry = True
+            reason, last_received = await self._session(index, channels, limiter, on_connected)
+            if reason is None:
+                continue  # connect failed: back off further, same outage
+            if last_received is not None:
+                backoff.reset()
+            outage.update(lost_at=last_received or time.time(), reason=reason)
+            if self.is_connected:
+                print(f"Lost connection for {len(channels)} channels ({reason})")
+
+    async def _main(self):
+        """Run every connection in the pool until stopped"""
+        limiter = JoinRateLimiter(self.join_rate, self.join_period)
+        tasks = [asyncio.create_task(self._run_connection(i, group, limiter))
+                 for i, group in enumerate(self._connection_groups())]
+        await self._stop_event.wait()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def start_listening(self):
+        """Start the event loop in a background thread"""
+        self.is_connected = True
+        self._loop = asyncio.new_event_loop()
+        self._stop_event = asyncio.Event()
+        self._loop_thread = threading.Thread(target=self._loop.run_until_complete,
+                                             args=(self._main(),), daemon=True)
+        self._loop_thread.start()
+
+    def disconnect(self):
+        """Stop the event loop, close every connection and flush the log queue."""
+        self.is_connected = False
+        if self._loop and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+        if self._loop_thread:
+            self._loop_thread.join(timeout=5)
+        if self.pipeline is not None:
+            self.pipeline.close()
+        if self.indexer is not None:
+            self.indexer.close()  # index what is queued and save the vectors
+        self.log_writer.close()
+        print("Disconnected from Twitch chat")
+
+    def stop_listening(self):
+        """Stop listening and disconnect"""
+        self.disconnect()
+
+    def __repr__(self):
+        return (f"AsyncTwitchChatReader(channels={len(self.channels)}, "
+                f"connections={len(self._connection_groups())}, connected={self.is_connected})")
+
+    __str__ = __repr__
@@ -3,13 +3,17 @@ import os
 import socket
 import threading
 import time
-import re
-import csv
-import queue
+from time import perf_counter
 from dotenv import load_dotenv
+from chat_log_writer import ChatLogWriter
+from irc_framing import LineFramer
+from irc_parser import EVENT_COMMANDS, format_tags, parse_line, parse_tags
+from irc_reconnect import Backoff, GapLog
 
 class TwitchChatReader:
-    def __init__(self, channels, log_directory="chat_logs"):
+    def __init__(self, channels, log_directory="chat_logs", recv_buffer_size=65536, log_writer=None,
+                 analytics=None, indexer=None, metrics=None, print_messages=True, pipeline=None, ping_interval=60.0,
+                 pong_timeout=10.0, connect_timeout=10.0, reconnect_delay=1.0, max_reconnect_delay=60.0):
         load_dotenv()
         self.channels = [channel.lower().strip('#') for channel in channels]
         self.nickname = "justinfan12345"  # Anonymous user
@@ -18,47 +22,44 @@ class TwitchChatReader:
         self.sockets = {}
         self.is_connected = False
         self.listen_threads = {}
+        self.recv_buffer_size = recv_buffer_size
+        self.framers = {}  # per-connection LineFramer (bytes/lines/syscalls counters)
         self.log_directory = log_directory
         os.makedirs(self.log_directory, exist_ok=True)  # Create log directory if it doesn't exist
-        self.log_queues = {}
-        self.logging_threads = {}
         self.csv_header = ['timestamp', 'username', 'message', 'channel', 'tags', 'raw']
-
-        for channel in self.channels:
-            self.log_queues[channel] = queue.Queue()
-            log_file = os.path.join(self.log_directory, f"{channel}_chat_log.csv")
-            self.logging_threads[channel] = threading.Thread(target=self._log_worker, args=(channel, log_file), daemon=True)
-            self._setup_csv(channel, log_file)
-            self.logging_threads[channel].start()
-
-    def _setup_csv(self, channel, log_file):
-        """Set up the CSV file with header if it doesn't exist"""
-        if not os.path.exists(log_file):
-            try:
-                with open(log_file, 'w', newline='', encoding='utf-8') as csvfile:
-                    csv_writer = csv.writer(csvfile)
-                    csv_writer.writerow(self.csv_header)
-            except Exception as e:
-                print(f"Error setting up CSV file for {channel}: {e}")
-
-    def _log_worker(self, channel, log_file):
-        """Background thread for writing log entries asynchronously"""
-        while True:
-            data = self.log_queues[channel].get()
-            if data is None:
-                break  # Sentinel value to stop the thread
-            try:
-                with open(log_file, 'a', newline='', encoding='utf-8') as csvfile:
-                    csv_writer = csv.writer(csvfile)
-                    csv_writer.writerow(data)
-            except Exception as e:
-                print(f"Error writing to CSV file for {channel}: {e}")
-            self.log_queues[channel].task_done()
+        # One writer thread for every channel; pass a configured ChatLogWriter to change batching/rotation
+        self.log_writer = log_writer or ChatLogWriter(self.log_directory, self.csv_header)
+        self.log_writer.start()
+        # Optional ChatAnalytics fed every chat message; query analytics.snapshot() while running
+        self.analytics = analytics
+        # Optional chat_search.LiveChatIndexer that embeds chat for semantic search in the background
+        self.indexer = indexer
+        # Printing every message is slow at high volume; turn it off and watch the metrics instead
+        self.print_messages = print_messages
+        # Optional chat_pipeline.ChatPipeline: logging, analytics, indexing and printing then run as
+        # batched handlers on its worker threads, and the reader thread only queues each message
+        self.pipeline = pipeline
+        if pipeline is not None:
+            self._register_pipeline_handlers(pipeline)
+            pipeline.start()
+        # Dropped connections are re-opened with backoff; the time without chat goes to <log_directory>/gaps.csv
+        self.ping_interval = ping_interval    # quiet seconds before we PING the server
+        self.pong_timeout = pong_timeout      # seconds to wait for any reply before calling the socket dead
+        self.connect_timeout = connect_timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.gap_log = GapLog(os.path.join(self.log_directory, "gaps.csv"))
+        self.last_received = {}  # channel -> epoch seconds of the last data received
+        self._stopped = threading.Event()
+        self._connected_before = set()
+        # Optional reader_metrics.ReaderMetrics; serve it with metrics.serve(port) for a /metrics endpoint
+        self.metrics = metrics.watch_reader(self) if metrics is not None else None
 
     def connect(self, channel):
         """Connect to Twitch IRC server for a specific channel."""
         try:
             self.sockets[channel] = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.sockets[channel].settimeout(self.connect_timeout)
             self.sockets[channel].connect((self.server, self.port))
 
             # Send authentication (anonymous)
@@ -71,112 +72,214 @@ class TwitchChatReader:
             self.sockets[channel].send("CAP REQ :twitch.tv/commands\r\n".encode())
 
             print(f"Connected to #{channel}")
+            if self.metrics is not None:
+                self.metrics.connects.inc()
+                if channel in self._connected_before:
+                    self.metrics.reconnects.inc()
+            self._connected_before.add(channel)
             return True
 
         except Exception as e:
             print(f"Connection failed for {channel}: {e}")
+            self._close_socket(channel)
             return False
 
     def disconnect(self):
         """Disconnect from Twitch IRC server."""
         self.is_connected = False
+        self._stopped.set()
         for channel in self.channels:
             if channel in self.sockets and self.sockets[channel]:
                 try:
                     self.sockets[channel].close()
                 except:
                     pass
-            # Stop the logging thread
-            self.log_queues[channel].put(None)
-            self.logging_threads[channel].join()
+        # Deliver what the handlers still have queued, then flush and close the log files
+        if self.pipeline is not None:
+            self.pipeline.close()
+        if self.indexer is not None:
+            self.indexer.close()  # index what is queued and save the vectors
+        self.log_writer.close()
         print("Disconnected from Twitch chat")
 
     def _parse_message(self, response, channel):
-        """Parse IRC message and extract username and message with enhanced parsing"""
+        """Parse a PRIVMSG line and return (username, message, tags)"""
         try:
-            if 'PRIVMSG' in response:
-                # Handle messages with tags (enhanced parsing)
-                if response.startswith('@'):
-                    # Extract tags and message
-                    parts = response.split(' ', 3)
-                    if len(parts) >= 4:
-                        tags = self._parse_tags(parts[0])
-                        message_match = re.search(r':(.+)$', parts[3])
-                        if message_match:
-                            username = tags.get('display-name', 'Unknown')
-                            message = message_match.group(1).strip()
-                            return username, message, tags
-
-                # Fallback to basic parsing
-                username = response.split('!')[0][1:]
-                message = response.split('PRIVMSG')[1].split(':', 1)[1].strip()
-                return username, message, {}
+            msg = parse_line(response)
+            if msg is not None and msg.command == 'PRIVMSG' and msg.trailing is not None:
+                username = msg.tags.get('display-name') or msg.nick
+                return username, msg.trailing.strip(), msg.tags
         except Exception as e:
             print(f"Error parsing message: {e}")
         return None, None, {}
 
     def _parse_tags(self, tag_string):
         """Parse IRC tags from message"""
-        tags = {}
-        tag_string = tag_string.lstrip('@')
-
-        for tag in tag_string.split(';'):
-            if '=' in tag:
-                key, value = tag.split('=', 1)
-                tags[key] = value
+        return parse_tags(tag_string)
 
-        return tags
+    def _handle_line(self, line, channel=None):
+        """Parse one IRC line and route it to handle_chat_message or handle_irc_event"""
+        metrics = self.metrics
+        sampled = metrics is not None and metrics.sample()
+        try:
+            if sampled:
+                started = perf_counter()
+                msg = parse_line(line)
+                metrics.parse_seconds.observe(perf_counter() - started)
+            else:
+                msg = parse_line(line)
+        except Exception as e:
+            if metrics is not None:
+                metrics.parse_errors.inc()
+            print(f"Error parsing message: {e}")
+            return
+        if msg is None:
+            return
+        if msg.command == 'PRIVMSG':
+            if msg.trailing is None:
+                return
+            username = msg.tags.get('display-name') or msg.nick
+            message = msg.trailing.strip()
+            if username and message:
+                message_data = {
+                    'username': username,
+                    'message': message,
+                    'channel': msg.channel or channel,
+                    'timestamp': time.time(),
+                    'tags': msg.tags,
+                    'raw': line
+                }
+                if metrics is None:
+                    self.handle_chat_message(message_data)
+                    return
+                metrics.messages.inc()
+                try:
+                    if sampled:
+                        started = perf_counter()
+                        self.handle_chat_message(message_data)
+                        metrics.handler_seconds.observe(perf_counter() - started)
+                    else:
+                        self.handle_chat_message(message_data)
+                except Exception:
+                    metrics.handler_errors.inc()
+                    raise
+        elif msg.command in EVENT_COMMANDS:
+            if metrics is not None:
+                metrics.events.inc()
+            self.handle_irc_event(msg)
+
+    def _listen_once(self, channel):
+        """
+        Read one connection until it ends. Returns (reason, received_data). A silent
+        socket gets a PING after ping_interval seconds and is given up on if nothing
+        at all arrives within pong_timeout; a RECONNECT notice ends it too.
+        """
+        sock = self.sockets[channel]
+        framer = self.framers.get(channel)
+        if framer is None:
+            framer = self.framers[channel] = LineFramer(self.recv_buffer_size)
+        framer.clear()  # a partial line from the previous connection is garbage
+        received = False
+        ping_sent = False
+        sock.settimeout(self.ping_interval)
+
+        while self.is_connected:
+            try:
+                if not framer.recv_from(sock):
+                    return "connection closed", received
+            except socket.timeout:
+                if ping_sent:
+                    return "ping timeout", received
+                try:
+                    sock.send(b"PING :tmi.twitch.tv\r\n")
+                except OSError as e:
+                    return f"error: {e}", received
+                ping_sent = True
+                sock.settimeout(self.pong_timeout)
+                continue
+            except OSError as e:
+                return f"error: {e}", received
+
+            received = True
+            self.last_received[channel] = time.time()
+            if ping_sent:
+                ping_sent = False
+                sock.settimeout(self.ping_interval)
+
+            # Process complete lines
+            for line in framer.lines():
+
+                # Handle PING to stay connected
+                if line.startswith('PING'):
+                    try:
+                        sock.send("PONG :tmi.twitch.tv\r\n".encode('utf-8'))
+                    except OSError as e:
+                        return f"error: {e}", received
+                elif ' RECONNECT' in line and parse_line(line).command == 'RECONNECT':
+                    return "server asked to reconnect", received
+                else:
+                    try:
+                        self._handle_line(line, channel)
+                    except Exception as e:
+                        print(f"Error handling message in {channel}: {e}")
+        return "stopped", received
+
+    def _close_socket(self, channel):
+        sock = self.sockets.pop(channel, None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def _listening(self, channel):
+        """
+        True while this thread should keep `channel` connected: False after disconnect,
+        once the channel is parted, or once another listen thread has taken it over.
+        """
+        return (self.is_connected and channel in self.channels
+                and self.listen_threads.get(channel) is threading.current_thread())
 
     def listen(self, channel):
-        """Listen for messages with improved buffer handling"""
-        socket = self.sockets[channel]
-        buffer = ""
-
-        while self.is_connected and socket:
-            try:
-                data = socket.recv(1024).decode('utf-8', errors='ignore')
-                if not data:
+        """
+        Listen for messages, reconnecting with exponential backoff and jitter whenever
+        the connection drops, and record each outage in the gap log. Returns once the
+        reader disconnects or `channel` is removed from `channels`.
+        """
+        backoff = Backoff(self.reconnect_delay, self.max_reconnect_delay)
+        while self._listening(channel):
+            lost_at = None
+            if self.sockets.get(channel) is not None:
+                reason, received = self._listen_once(channel)
+                if not self._listening(channel):
                     break
-
-                buffer += data
-
-                # Process complete lines
-                while '\r\n' in buffer:
-                    line, buffer = buffer.split('\r\n', 1)
-
-                    # Handle PING to stay connected
-                    if line.startswith('PING'):
-                        socket.send("PONG :tmi.twitch.tv\r\n".encode('utf-8'))
-                        continue
-
-                    # Parse chat messages
-                    elif 'PRIVMSG' in line:
-                        username, message, tags = self._parse_message(line, channel)
-                        if username and message:
-                            message_data = {
-                                'username': username,
-                                'message': message,
-                                'channel': channel,
-                                'timestamp': time.time(),
-                                'tags': tags,
-                                'raw': line
-                            }
-
-                            self.handle_chat_message(message_data)
-
-            except Exception as e:
-                if self.is_connected:
-                    print(f"Error listening to {channel}: {e}")
-                break
+                lost_at = self.last_received.get(channel, time.time())
+                self._close_socket(channel)
+                if received:
+                    backoff.reset()
+                print(f"Lost connection to #{channel} ({reason})")
+            else:
+                reason = "connect failed"
+
+            while self._listening(channel):
+                delay = backoff.next_delay()
+                print(f"Reconnecting to #{channel} in {delay:.1f}s")
+                if self._stopped.wait(delay) or not self._listening(channel) or self.connect(channel):
+                    break
+            if self._listening(channel) and lost_at is not None:
+                self.gap_log.record([channel], lost_at, time.time(), reason)
+                if self.metrics is not None:
+                    self.metrics.gaps.inc()
+                    self.metrics.gap_seconds.observe(time.time() - lost_at)
 
     def start_listening(self):
-        """Start listening in a separate thread for each channel"""
+        """Start listening in a separate thread for each channel (channels that fail to connect keep retrying)"""
         self.is_connected = True
+        self._stopped.clear()
         for channel in self.channels:
             if channel not in self.sockets or not self.sockets[channel]:
                 if not self.connect(channel):
-                    print(f"Failed to connect to {channel}, skipping")
-                    continue
+                    print(f"Failed to connect to {channel}, retrying in the background")
 
             self.listen_threads[channel] = threading.Thread(
                 target=self.listen,
@@ -206,16 +309,16 @@ class TwitchChatReader:
             self.stop_listening()
             print("Chat listener stopped")
 
-    def handle_chat_message(self, message_data):
-        """Custom message handler"""
-        username = message_data['username']
-        message = message_data['message']
+    def _log_row(self, message_data):
+        """(formatted timestamp, CSV row) for one message"""
         timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(message_data['timestamp']))
-        channel = message_data['channel']
+        return timestamp, [timestamp, message_data['username'], message_data['message'], message_data['channel'],
+                           format_tags(message_data['tags']), message_data['raw']]
 
-        log_data = [timestamp, username, message, channel, str(message_data['tags']), message_data['raw']]
-        print(f"[{timestamp}] {username}: {message} (Channel: {channel})")
-        self.log_queues[channel].put(log_data)
+    def _print_message(self, message_data, timestamp):
+        username = message_data['username']
+        message = message_data['message']
+        print(f"[{timestamp}] {username}: {message} (Channel: {message_data['channel']})")
 
         # Add custom logic here
         if "hello" in message.lower():
@@ -226,6 +329,52 @@ class TwitchChatReader:
             if subscriber:
                 print(f"  -> {username} is a subscriber!")
 
+    def _register_pipeline_handlers(self, pipeline):
+        """The built-in work of handle_chat_message as pipeline handlers. Logs never drop
+        messages (a full queue blocks the reader); the console drops the oldest lines."""
+        def log(batch):
+            write = self.log_writer.write
+            for message_data in batch:
+                write(message_data['channel'], self._log_row(message_data)[1], message_data['timestamp'])
+        pipeline.register(log, name="log")
+
+        if self.analytics is not None:
+            def analytics(batch):
+                observe = self.analytics.observe
+                for message_data in batch:
+                    observe(message_data)
+            pipeline.register(analytics, name="analytics")
+
+        if self.indexer is not None:
+            def indexer(batch):
+                for message_data in batch:
+                    self.indexer.observe(message_data)
+            pipeline.register(indexer, name="indexer", overflow="drop_oldest")
+
+        if self.print_messages:
+            def console(batch):
+                for message_data in batch:
+                    self._print_message(message_data, self._log_row(message_data)[0])
+            pipeline.register(console, name="console", max_queue=1000, overflow="drop_oldest")
+
+    def handle_chat_message(self, message_data):
+        """Custom message handler (with a pipeline, messages are queued for its handlers instead)"""
+        if self.pipeline is not None:
+            self.pipeline.publish(message_data)
+            return
+        timestamp, log_data = self._log_row(message_data)
+        if self.print_messages:
+            self._print_message(message_data, timestamp)
+        self.log_writer.write(message_data['channel'], log_data, message_data['timestamp'])
+        if self.analytics is not None:
+            self.analytics.observe(message_data)
+        if self.indexer is not None:
+            self.indexer.observe(message_data)
+
+    def handle_irc_event(self, message):
+        """Hook for USERNOTICE, CLEARCHAT, ROOMSTATE and other non-chat events (an IRCMessage)"""
+        pass
+
     def __str__(self):
         return f"TwitchChatReader(channels={self.channels}, connected={self.is_connected})"
 
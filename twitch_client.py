@@ -1,12 +1,45 @@
 # pip install requests python-dotenv
 import os
+import threading
 import time
 import json
 import requests
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Callable, Dict, Iterable, List, Optional
+from helix_scheduler import RateLimitScheduler, scheduler_for
+from token_cache import TokenCache
+from user_cache import UserCache
+
+HELIX_USERS_BATCH = 100  # max login/id params per /helix/users call
+
+_session_lock = threading.Lock()
+_shared_session: Optional[requests.Session] = None
+
+
+def shared_session(pool_size: int = 10) -> requests.Session:
+    """
+    Process-wide keep-alive session, so Helix calls reuse TCP+TLS connections.
+    pool_size only applies when the session is first created.
+    """
+    global _shared_session
+    with _session_lock:
+        if _shared_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _shared_session = session
+        return _shared_session
+
 
 class TwitchCon:
-    def __init__(self, client_id: Optional[str] = None, client_secret: Optional[str] = None):
+    auth_url = "https://id.twitch.tv/oauth2/token"
+    helix_url = "https://api.twitch.tv/helix"
+
+    def __init__(self, client_id: Optional[str] = None, client_secret: Optional[str] = None,
+                 pool_size: int = 10, token_cache: Optional[TokenCache] = None,
+                 scheduler: Optional[RateLimitScheduler] = None, user_cache: Optional[UserCache] = None):
         self.client_id = client_id or os.getenv("TWITCH_CLIENT_ID")
         self.client_secret = client_secret or os.getenv("TWITCH_CLIENT_SECRET")
         if not self.client_id or not self.client_secret:
@@ -15,26 +48,41 @@ class TwitchCon:
         self._token: Optional[str] = None
         self._expires_at: float = 0.0
         self.user_id: Optional[str] = None 
-        # Auto-connect on initialization
-        try:
-            self.connect()
-        except Exception as e:
-            # Surface a clear error so callers know initialization failed due to auth/network.
-            raise RuntimeError(f"TwitchCon initialization failed during connect(): {e}") from e
+        self.session = shared_session(pool_size)
+        self.token_cache = token_cache if token_cache is not None else TokenCache()
+        # Paces Helix calls from the Ratelimit-* headers; shared by every TwitchCon with this client ID
+        self.scheduler = scheduler or scheduler_for(self.client_id)
+        self.user_cache = user_cache if user_cache is not None else UserCache()
+        # Called as hook(method, url, status_code, elapsed_seconds) after every request
+        self.request_hooks: List[Callable] = []
+        self.request_stats: dict = {}  # per-endpoint count / total_ms / max_ms
+        self._stats_lock = threading.Lock()
+        # No token is fetched here: the first Helix call (or an explicit connect()) gets one,
+        # so constructing a client costs nothing for commands that never reach Helix
+
+    def connect(self, force: bool = False) -> bool:
+        """
+        Get an app access token, reusing one from the token cache unless force is set.
+        Returns True if successful.
+        """
+        if not force:
+            cached = self.token_cache.get(self.client_id)
+            if cached:
+                self._token = cached["access_token"]
+                self._expires_at = cached["expires_at"]
+                return True
 
-    def connect(self) -> bool:
-        """Get an app access token. Returns True if successful."""
-        url = "https://id.twitch.tv/oauth2/token"
         data = {
             "client_id": self.client_id,
             "client_secret": self.client_secret,
             "grant_type": "client_credentials",
         }
-        resp = requests.post(url, data=data, timeout=10)
+        resp = self._timed("POST", self.auth_url, data=data, timeout=10)
         resp.raise_for_status()
         j = resp.json()
         self._token = j["access_token"]
         self._expires_at = time.time() + j.get("expires_in", 3600)
+        self.token_cache.put(self.client_id, self._token, self._expires_at)
         return True
 
     def is_connected(self) -> bool:
@@ -48,6 +96,43 @@ class TwitchCon:
         self._token = None
         self._expires_at = 0.0
 
+    def _timed(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request on the pooled session, recording its latency and calling request_hooks."""
+        start = time.perf_counter()
+        resp = self.session.request(method, url, **kwargs)
+        elapsed = time.perf_counter() - start
+
+        endpoint = url.split("?", 1)[0]
+        with self._stats_lock:
+            stats = self.request_stats.setdefault(endpoint, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            stats["count"] += 1
+            stats["total_ms"] += elapsed * 1000
+            stats["max_ms"] = max(stats["max_ms"], elapsed * 1000)
+        for hook in self.request_hooks:
+            hook(method, url, resp.status_code, elapsed)
+        return resp
+
+    def _helix_get(self, path: str, params=None, timeout: float = 10) -> requests.Response:
+        """
+        GET a Helix endpoint with the app token through the rate-limit scheduler,
+        refreshing the token once on 401.
+        """
+        if not self.is_connected():
+            self.connect()
+        url = f"{self.helix_url}/{path}"
+        for attempt in range(2):
+            headers = {"Client-ID": self.client_id, "Authorization": f"Bearer {self._token}"}
+            resp = self.scheduler.execute(
+                lambda: self._timed("GET", url, headers=headers, params=params, timeout=timeout))
+            if resp.status_code == 401 and attempt == 0:
+                # Token revoked or expired early: drop it from the cache and mint a new one
+                self.token_cache.invalidate(self.client_id)
+                self.connect(force=True)
+                continue
+            break
+        resp.raise_for_status()
+        return resp
+
 
 
  
@@ -55,23 +140,55 @@ class TwitchCon:
  
 
 
+    def _fetch_users(self, param: str, values: List[str]) -> List[dict]:
+        """One /helix/users call for up to 100 logins or ids."""
+        resp = self._helix_get("users", params=[(param, v) for v in values], timeout=10)
+        return resp.json().get("data", [])
+
+    def get_users(self, logins: Iterable[str] = (), ids: Iterable[str] = (), workers: int = 4) -> Dict[str, dict]:
+        """
+        Resolve many users at once. Returns {login: user} for logins and {id: user} for ids;
+        unknown users are left out.
+        Cached users are served from user_cache; the rest are looked up 100 per request,
+        with up to `workers` requests in flight (still paced by the rate-limit scheduler).
+        """
+        logins = list(dict.fromkeys(l.lower() for l in logins if l))
+        ids = list(dict.fromkeys(str(i) for i in ids if i))
+        cached = self.user_cache.get_many([UserCache.login_key(l) for l in logins] +
+                                          [UserCache.id_key(i) for i in ids])
+
+        batches = []
+        for param, values, key in (("login", logins, UserCache.login_key), ("id", ids, UserCache.id_key)):
+            missing = [v for v in values if key(v) not in cached]
+            batches += [(param, missing[i:i + HELIX_USERS_BATCH])
+                        for i in range(0, len(missing), HELIX_USERS_BATCH)]
+
+        if len(batches) > 1 and workers > 1:
+            with ThreadPoolExecutor(max_workers=min(workers, len(batches))) as pool:
+                pages = list(pool.map(lambda b: self._fetch_users(*b), batches))
+        else:
+            pages = [self._fetch_users(*b) for b in batches]
+        fetched = [user for page in pages for user in page]
+        self.user_cache.put_many(fetched)
+
+        by_key = dict(cached)
+        for user in fetched:
+            by_key[UserCache.login_key(user["login"])] = user
+            by_key[UserCache.id_key(user["id"])] = user
+        result = {l: by_key[UserCache.login_key(l)] for l in logins if UserCache.login_key(l) in by_key}
+        result.update({i: by_key[UserCache.id_key(i)] for i in ids if UserCache.id_key(i) in by_key})
+        return result
+
     def get_user(self, login: str) -> dict:
-        """Return Twitch user object for the given login (or empty dict if not found)."""
+        """
+        Return Twitch user object for the given login (or empty dict if not found)
+        and remember it as user_id/user_name. Served from user_cache when possible.
+        """
         if not login:
             raise ValueError("login is required")
-        # ensure we have a valid token
-        if not self.is_connected():
-            self.connect()
-
-        url = "https://api.twitch.tv/helix/users"
-        headers = {"Client-ID": self.client_id, "Authorization": f"Bearer {self._token}"}
-        resp = requests.get(url, headers=headers, params={"login": login}, timeout=10)
-        resp.raise_for_status()
-        data = resp.json().get("data", [])
-        self.user_id = data[0]["id"] if data else None
-        self.user_name = data[0]["display_name"] if data else None
-        result = data[0] if data else {}
-        print(result)
+        result = self.get_users([login]).get(login.lower(), {})
+        self.user_id = result.get("id")
+        self.user_name = result.get("display_name")
         return result
 
 
@@ -94,36 +211,37 @@ class TwitchCon:
 
 
 
-    def get_vod_ids(self, login: str, only_archive: bool = True) -> list:
+    def get_vod_ids(self, login: str, only_archive: bool = True, stop_at: Optional[str] = None) -> list:
         """
-        Return a list of VOD IDs for the given streamer login.
+        Return a list of VOD IDs for the given streamer login, newest first.
+        If stop_at is given, paging stops at that VOD (or any older one), so only newer VODs are returned.
         Simple synchronous implementation. Returns [] if streamer not found.
         """
         if not login:
             raise ValueError("login is required")
 
-        # ensure token available
-        if not self.is_connected():
-            self.connect()
-
-        # resolve user id using existing get_user()
-        user = self.get_user(login)
+        # resolve user id through the user cache, leaving self.user_id alone
+        user = self.get_users([login]).get(login.lower())
         if not user:
             return []
 
         user_id = user.get("id")
-        url = "https://api.twitch.tv/helix/videos"
-        headers = {"Client-ID": self.client_id, "Authorization": f"Bearer {self._token}"}
         params = {"user_id": user_id, "first": 100}
         if only_archive:
             params["type"] = "archive"
 
         vod_ids = []
         while True:
-            resp = requests.get(url, headers=headers, params=params, timeout=15)
-            resp.raise_for_status()
+            resp = self._helix_get("videos", params=params, timeout=15)
             j = resp.json()
-            vod_ids.extend([v.get("id") for v in j.get("data", []) if v.get("id")])
+            page = [v.get("id") for v in j.get("data", []) if v.get("id")]
+            if stop_at is not None:
+                newer = [v for v in page if int(v) > int(stop_at)]
+                vod_ids.extend(newer)
+                if len(newer) < len(page):
+                    break
+            else:
+                vod_ids.extend(page)
             cursor = j.get("pagination", {}).get("cursor")
             if not cursor:
                 break
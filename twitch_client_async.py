@@ -0,0 +1,230 @@
+# twitch_client_async.py
+# pip install aiohttp
+import asyncio
+import os
+import time
+from collections import namedtuple
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+
+from helix_scheduler import RateLimitScheduler, scheduler_for
+from token_cache import TokenCache
+from twitch_client import HELIX_USERS_BATCH, TwitchCon
+from user_cache import UserCache
+
+# What send() hands the scheduler: the body is read before the connection is released
+HelixResponse = namedtuple("HelixResponse", "status_code headers data")
+
+
+class HelixError(RuntimeError):
+    """A Helix request that failed after retries."""
+
+    def __init__(self, status_code: int, url: str, data=None):
+        super().__init__(f"Helix returned {status_code} for {url}: {data}")
+        self.status_code = status_code
+        self.url = url
+        self.data = data
+
+
+class AsyncTwitchCon:
+    """
+    asyncio counterpart of TwitchCon for bulk Helix work.
+
+    Uses one aiohttp session (at most `max_connections` sockets), the same token
+    cache, user cache and per-client-ID rate-limit scheduler as TwitchCon, so sync
+    and async code in one process share a single budget. The token is fetched on
+    first use. Use as `async with AsyncTwitchCon() as helix: ...`.
+    """
+
+    auth_url = TwitchCon.auth_url
+    helix_url = TwitchCon.helix_url
+
+    def __init__(self, client_id: Optional[str] = None, client_secret: Optional[str] = None,
+                 max_connections: int = 20, token_cache: Optional[TokenCache] = None,
+                 scheduler: Optional[RateLimitScheduler] = None, user_cache: Optional[UserCache] = None,
+                 session: Optional["aiohttp.ClientSession"] = None):
+        self.client_id = client_id or os.getenv("TWITCH_CLIENT_ID")
+        self.client_secret = client_secret or os.getenv("TWITCH_CLIENT_SECRET")
+        if not self.client_id or not self.client_secret:
+            raise ValueError("Set TWITCH_CLIENT_ID and TWITCH_CLIENT_SECRET or pass them in.")
+
+        self.max_connections = max_connections
+        self.token_cache = token_cache if token_cache is not None else TokenCache()
+        self.scheduler = scheduler or scheduler_for(self.client_id)
+        self.user_cache = user_cache if user_cache is not None else UserCache()
+        self._session = session
+        self._owns_session = session is None
+        self._token: Optional[str] = None
+        self._expires_at: float = 0.0
+        self._token_lock: Optional[asyncio.Lock] = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @property
+    def session(self) -> "aiohttp.ClientSession":
+        if self._session is None:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.max_connections))
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and self._owns_session:
+            await self._session.close()
+        self._session = None
+
+    def is_connected(self) -> bool:
+        return bool(self._token) and time.time() < self._expires_at - 30
+
+    async def connect(self, force: bool = False) -> bool:
+        """Get an app access token, reusing one from the token cache unless force is set."""
+        if self._token_lock is None:
+            self._token_lock = asyncio.Lock()
+        async with self._token_lock:
+            if not force and self.is_connected():
+                return True
+            if not force:
+                cached = self.token_cache.get(self.client_id)
+                if cached:
+                    self._token = cached["access_token"]
+                    self._expires_at = cached["expires_at"]
+                    return True
+
+            data = {
+                "client_id": self.client_id,
+                "client_secret": self.client_secret,
+                "grant_type": "client_credentials",
+            }
+            async with self.session.post(self.auth_url, data=data, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+                if resp.status >= 400:
+                    raise HelixError(resp.status, self.auth_url, await resp.text())
+                j = await resp.json()
+            self._token = j["access_token"]
+            self._expires_at = time.time() + j.get("expires_in", 3600)
+            self.token_cache.put(self.client_id, self._token, self._expires_at)
+            return True
+
+    async def _helix_get(self, path: str, params=None, timeout: float = 15) -> dict:
+        """
+        GET a Helix endpoint through the rate-limit scheduler and return its JSON body,
+        refreshing the token once on 401.
+        """
+        if not self.is_connected():
+            await self.connect()
+        url = f"{self.helix_url}/{path}"
+
+        for attempt in range(2):
+            token = self._token
+
+            async def send():
+                headers = {"Client-ID": self.client_id, "Authorization": f"Bearer {token}"}
+                async with self.session.get(url, headers=headers, params=params,
+                                            timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+                    if resp.status >= 500:
+                        # Retried by the scheduler; the body is often a proxy's HTML error page
+                        return HelixResponse(resp.status, resp.headers, None)
+                    data = await resp.json(content_type=None)
+                    return HelixResponse(resp.status, resp.headers, data)
+
+            resp = await self.scheduler.execute_async(send)
+            if resp.status_code == 401 and attempt == 0:
+                # Token revoked or expired early: drop it from the cache and mint a new one
+                self.token_cache.invalidate(self.client_id)
+                await self.connect(force=True)
+                continue
+            break
+        if resp.status_code >= 400:
+            raise HelixError(resp.status_code, url, resp.data)
+        return resp.data
+
+    async def get_users(self, logins: Iterable[str] = (), ids: Iterable[str] = ()) -> Dict[str, dict]:
+        """Async TwitchCon.get_users: cached users first, the rest 100 per concurrent request."""
+        logins = list(dict.fromkeys(l.lower() for l in logins if l))
+        ids = list(dict.fromkeys(str(i) for i in ids if i))
+        cached = self.user_cache.get_many([UserCache.login_key(l) for l in logins] +
+                                          [UserCache.id_key(i) for i in ids])
+
+        batches = []
+        for param, values, key in (("login", logins, UserCache.login_key), ("id", ids, UserCache.id_key)):
+            missing = [v for v in values if key(v) not in cached]
+            batches += [[(param, v) for v in missing[i:i + HELIX_USERS_BATCH]]
+                        for i in range(0, len(missing), HELIX_USERS_BATCH)]
+        pages = await asyncio.gather(*(self._helix_get("users", params=b) for b in batches))
+        fetched = [user for page in pages for user in page.get("data", [])]
+        self.user_cache.put_many(fetched)
+
+        by_key = dict(cached)
+        for user in fetched:
+            by_key[UserCache.login_key(user["login"])] = user
+            by_key[UserCache.id_key(user["id"])] = user
+        result = {l: by_key[UserCache.login_key(l)] for l in logins if UserCache.login_key(l) in by_key}
+        result.update({i: by_key[UserCache.id_key(i)] for i in ids if UserCache.id_key(i) in by_key})
+        return result
+
+    async def iter_videos(self, user_id: str, only_archive: bool = True,
+                          stop_at: Optional[str] = None) -> AsyncIterator[dict]:
+        """
+        Yield full video objects (id, created_at, duration, view_count, ...) for a user,
+        newest first, page by page. With stop_at, stop at that VOD (or any older one).
+        """
+        params = {"user_id": user_id, "first": 100}
+        if only_archive:
+            params["type"] = "archive"
+        while True:
+            j = await self._helix_get("videos", params=dict(params))
+            for video in j.get("data", []):
+                if stop_at is not None and int(video["id"]) <= int(stop_at):
+                    return
+                yield video
+            cursor = j.get("pagination", {}).get("cursor")
+            if not cursor:
+                return
+            params["after"] = cursor
+
+    async def stream_videos(self, logins: Iterable[str], only_archive: bool = True,
+                            stop_at: Optional[Dict[str, str]] = None,
+                            concurrency: int = 10) -> AsyncIterator[Tuple[str, dict]]:
+        """
+        Yield (login, video) for many streamers as pages arrive, paging up to
+        `concurrency` users at once. stop_at maps login -> newest VOD already known.
+        Unknown logins are skipped; a user whose listing fails is reported and skipped.
+        """
+        logins = [l.lower() for l in logins]
+        stop_at = {k.lower(): v for k, v in (stop_at or {}).items()}
+        users = await self.get_users(logins)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1000)
+        limit = asyncio.Semaphore(concurrency)
+        done = object()
+
+        async def pump(login: str, user_id: str):
+            try:
+                async with limit:
+                    async for video in self.iter_videos(user_id, only_archive, stop_at.get(login)):
+                        await queue.put((login, video))
+            except Exception as e:
+                print(f"Failed to list videos for {login}: {e}")
+            finally:
+                await queue.put(done)
+
+        tasks = [asyncio.create_task(pump(l, users[l]["id"])) for l in dict.fromkeys(logins) if l in users]
+        remaining = len(tasks)
+        try:
+            while remaining:
+                item = await queue.get()
+                if item is done:
+                    remaining -= 1
+                else:
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def get_videos(self, logins: Iterable[str], **kwargs) -> Dict[str, List[dict]]:
+        """Collect stream_videos() into {login: [video, ...]}, newest first per login."""
+        videos: Dict[str, List[dict]] = {}
+        async for login, video in self.stream_videos(logins, **kwargs):
+            videos.setdefault(login, []).append(video)
+        return videos
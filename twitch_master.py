@@ -1,60 +1,75 @@
+import os
 from twitch_client import TwitchCon
-from twitch_vod_chat_logger import TwitchVODChatLogger
+from twitch_vod_chat_logger import SAVE_FORMATS, TwitchVODChatLogger
+from vod_manifest import VODManifest
 
 class Twitch(TwitchCon, TwitchVODChatLogger):
-    def __init__(self, client_id=None, client_secret=None, output_dir="chat_logs"):
+    def __init__(self, client_id=None, client_secret=None, output_dir="chat_logs", chat_downloader=None,
+                 manifest_path=None):
         # Initialize both parent classes explicitly
         TwitchCon.__init__(self, client_id=client_id, client_secret=client_secret)
-        TwitchVODChatLogger.__init__(self, output_dir=output_dir)
+        manifest = VODManifest(manifest_path or os.path.join(output_dir, "manifest.sqlite3"))
+        TwitchVODChatLogger.__init__(self, output_dir=output_dir, chat_downloader=chat_downloader,
+                                     manifest=manifest)
 
-    def fetch_and_save_multiple_vods(self, streamer_name: str, vod_ids: list, save_to: str = 'json'):
+    def fetch_and_save_multiple_vods(self, streamer_name: str, vod_ids: list, save_to: str = 'json',
+                                     workers: int = 1) -> dict:
         """
-        Given a list of VOD IDs, fetch chat for each and save to a file named <streamer_name>_<vod_id>.<ext>.
-        Supports 'csv' and 'json' file types. Defaults to 'csv'.
+        Given a list of VOD IDs, fetch chat for each and save to a file named <user_id>_<vod_id>.<ext>.
+        Supports 'csv', 'json', 'jsonl', 'parquet' and 'chatz' file types, or 'sqlite' for the chat store
+        (<output_dir>/chat.sqlite3, tagged with the streamer's login). Defaults to 'json'.
+        Each chat is streamed to its file as it downloads instead of being held in memory.
+        With workers > 1, that many VODs download in parallel; a failing VOD doesn't abort the batch.
         """
+        if save_to not in SAVE_FORMATS:
+            raise ValueError("Invalid save_to value. Must be 'csv', 'json', 'jsonl', 'parquet', 'sqlite' or 'chatz'.")
     
         # ADD: Create logic so that given streamer_name, will look up user_id
         self.get_user(login = streamer_name)
-        
-        for vod_id in vod_ids:
-            # Fetch chat for the current VOD ID
-            self.fetch_chat(vod_id)
-            # Construct filename with streamer name and vod id
-            file_name = f"{self.user_id}_{vod_id}.{save_to}"
-            # Save chat data in the requested format
-            if save_to == 'csv':
-                self.save_csv(file_name=file_name)
-            elif save_to == 'json':
-                self.save_json(file_name=file_name)
-            else:
-                raise ValueError("Invalid save_to value. Must be 'csv' or 'json'.")
+
+        return self.stream_multiple_vods(vod_ids, file_prefix=self.user_id, save_to=save_to, workers=workers,
+                                         channel=streamer_name.lower())
 
    
 
     
-    def run_fetch_and_save_multiple_vods(self, streamer_name: str, save_to: str = 'json', limit: int = None):
+    def run_fetch_and_save_multiple_vods(self, streamer_name: str, save_to: str = 'json', limit: int = None,
+                                         workers: int = 1):
             """
             Encapsulates the default flow:
             - connect
-            - fetch VOD ids for streamer_name
+            - fetch VOD ids newer than the newest one already in the manifest
             - print summary
-            - fetch and save chats for each VOD (optionally limited)
+            - fetch and save chats for each VOD not yet complete in `save_to` format, or whose
+              file is gone (optionally limited),
+              resuming partial csv/jsonl downloads
             - disconnect
 
             Args:
                 streamer_name: Twitch login name (lowercase).
-                save_to: 'csv' or 'json' for chat export format.
+                save_to: 'csv', 'json', 'jsonl', 'parquet', 'sqlite' or 'chatz' for chat export format.
                 limit: if provided, only process the first N VODs.
+                workers: number of VODs to download in parallel.
             """
             try:
                 # self.connect()
-                vod_ids = self.get_vod_ids(streamer_name)
-                print(f"Found {len(vod_ids)} VODs. First: {vod_ids[0] if vod_ids else None}")
+                user = self.get_user(streamer_name)
+                if not user:
+                    print(f"No Twitch user found for login '{streamer_name}'.")
+                    return
+                user_id = user["id"]
+                newest_known = self.manifest.newest_vod_id(user_id)
+                new_ids = self.get_vod_ids(streamer_name, stop_at=newest_known)
+                self.manifest.add_pending(user_id, new_ids)
+                vod_ids = self.manifest.unfinished(user_id, save_to=save_to, directory=self.output_dir)
+                print(f"Found {len(new_ids)} new VODs, {len(vod_ids)} to process. "
+                      f"First: {vod_ids[0] if vod_ids else None}")
 
                 if limit is not None:
                     vod_ids = vod_ids[:limit]
 
                 if vod_ids:
-                    self.fetch_and_save_multiple_vods(streamer_name, vod_ids, save_to=save_to)
+                    self.fetch_and_save_multiple_vods(streamer_name, vod_ids, save_to=save_to, workers=workers)
+                print(f"Manifest: {self.manifest.summary(user_id)}")
             finally:
-                self.disconnect()
\ No newline at end of file
+                self.disconnect()
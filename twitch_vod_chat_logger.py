@@ -1,31 +1,227 @@
 import json
-import csv
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from chat_downloader import ChatDownloader
+from chat_sinks import APPENDABLE_FORMATS, SINKS, CsvSink, ParquetSink, open_sink
+from vod_manifest import STATUS_COMPLETE, STATUS_FAILED, STATUS_PARTIAL, entry_complete
+
+SAVE_FORMATS = tuple(SINKS)
+
+
+def _require_chat_downloader():
+    try:
+        from chat_downloader import ChatDownloader
+    except ImportError as e:
+        raise ImportError("VOD chat downloads require chat-downloader: pip install chat-downloader") from e
+    return ChatDownloader
+
+
+def _default_chat_downloader():
+    """A ChatDownloader, imported on first use so loading this module stays cheap"""
+    return _require_chat_downloader()()
 
 
 class TwitchVODChatLogger:
-    def __init__(self, output_dir: str = "chat_logs"):
+    def __init__(self, output_dir: str = "chat_logs", chat_downloader=None, manifest=None, chat_store=None):
         self.vod_url_or_id = None
+        self.chat_downloader = chat_downloader or _default_chat_downloader  # class or factory, swappable for tests
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.chat_data = []
         self.vods = []  # To store fetched VOD metadata for a streamer
+        self.manifest = manifest  # optional VODManifest: skip finished VODs, resume partial ones
+        self.checkpoint_every = 1000  # messages between manifest checkpoints
+        self.chat_store = chat_store  # ChatStore for save_to='sqlite'; opened on first use if not given
+        self._chat_store_lock = threading.Lock()  # parallel VOD downloads share one lazily opened store
 
 
 
-    def fetch_chat(self, vod_url_or_id: str):
-        """Fetch chat messages from the specified VOD."""
-        # If user passed a numeric ID, turn it into a Twitch VOD URL
+    def _chat_store(self):
+        """The ChatStore that save_to='sqlite' writes into (<output_dir>/chat.sqlite3 by default)."""
+        with self._chat_store_lock:
+            if self.chat_store is None:
+                from chat_store import ChatStore
+                self.chat_store = ChatStore(self.output_dir / "chat.sqlite3")
+            return self.chat_store
+
+    @staticmethod
+    def vod_url(vod_url_or_id) -> str:
+        """Turn a numeric VOD ID into a Twitch VOD URL; URLs pass through."""
         s = str(vod_url_or_id).strip()
         if s.isdigit():
             s = f"https://www.twitch.tv/videos/{s}"
+        return s
+
+    @classmethod
+    def vod_id(cls, vod_url_or_id) -> str:
+        """VOD ID from a numeric ID or a .../videos/<id> URL."""
+        return cls.vod_url(vod_url_or_id).rstrip("/").rsplit("/", 1)[-1]
+
+    def iter_chat(self, vod_url_or_id: str, start_time=None):
+        """Yield extracted chat messages one at a time without keeping them in memory."""
+        chat = self.chat_downloader().get_chat(self.vod_url(vod_url_or_id), start_time=start_time)
+        for msg in chat:
+            yield self._extract_message(msg)
 
-        self.vod_url_or_id = s
-        chat = ChatDownloader().get_chat(self.vod_url_or_id)
-        self.chat_data = [self._extract_message(msg) for msg in chat]
+    def fetch_chat(self, vod_url_or_id: str):
+        """Fetch chat messages from the specified VOD."""
+        self.vod_url_or_id = self.vod_url(vod_url_or_id)
+        self.chat_data = list(self.iter_chat(self.vod_url_or_id))
         return self.chat_data
 
+    def stream_chat_to_file(self, vod_url_or_id: str, file_name: str, save_to: str = 'jsonl',
+                            progress_every: int = 0, channel: str = None) -> int:
+        """
+        Write a VOD's chat straight to disk as it downloads, without filling chat_data.
+        Memory stays constant in the length of the VOD and a crash keeps what was written.
+        Uses no instance state, so several VODs can be streamed concurrently.
+
+        With a manifest, a VOD already complete in this format and file (still on disk,
+        or still in the chat store) is skipped, and a partial csv/jsonl/chatz download is
+        resumed from its last checkpointed `vod_time_s`.
+        With save_to='sqlite' the messages go into the chat store (tagged with vod ID and
+        `channel`) instead of file_name, which is only recorded in the manifest.
+        Returns the number of messages in the file.
+        """
+        file_path = self.output_dir / file_name
+        vod_id = self.vod_id(vod_url_or_id)
+        entry = self.manifest.get(vod_id) if self.manifest else None
+        to_store = save_to == 'sqlite'
+        if entry_complete(entry, save_to, file_name, self.output_dir) and \
+                (not to_store or self._chat_store().count(vod_id=vod_id) >= entry["message_count"]):
+            print(f"VOD {vod_id} already complete ({entry['message_count']} messages), skipping")
+            return entry["message_count"]
+
+        resume = bool(entry and entry["status"] != STATUS_COMPLETE and entry["last_offset"] is not None
+                      and save_to in APPENDABLE_FORMATS
+                      and entry["save_to"] == save_to and entry["file_name"] == file_name
+                      and (to_store or file_path.exists()))
+        base_count = entry["message_count"] if resume else 0
+        last_offset = entry["last_offset"] if resume else None
+        last_id = entry["last_message_id"] if resume else None
+        if resume:
+            # Drop anything written after the last checkpoint; it is fetched again below.
+            if to_store:
+                self._chat_store().truncate_vod(vod_id, base_count)
+            else:
+                os.truncate(file_path, entry["bytes"])
+            print(f"Resuming VOD {vod_id} at {last_offset:.0f}s ({base_count} messages already saved)")
+
+        records = self.iter_chat(vod_url_or_id, start_time=last_offset)
+        if resume:
+            records = self._skip_saved(records, last_offset, last_id)
+
+        sink_kwargs = {"append": True} if resume else {}
+        if to_store:
+            sink_kwargs.update(store=self._chat_store(), vod_id=vod_id, channel=channel)
+
+        record = None
+        written = 0  # counted here rather than read from the sink: sinks differ in when they count
+        # Only formats a resume can append to are checkpointed; flushing json/parquet early would
+        # just shrink their row groups. Archives checkpoint whenever they cut a frame of their own
+        # (nothing is buffered right after one) instead of being forced into small frames.
+        checkpoint = self.manifest is not None and save_to in APPENDABLE_FORMATS
+        try:
+            with open_sink(file_path, save_to, **sink_kwargs) as sink:
+                frames = getattr(sink, "frames", None)
+                for record in records:
+                    sink.write(record)
+                    written += 1
+                    if progress_every and written % progress_every == 0:
+                        print(f"  {file_name}: {base_count + written} messages...")
+                    if not checkpoint:
+                        continue
+                    if frames is not None:
+                        if sink.frames == frames:
+                            continue
+                        frames = sink.frames
+                    elif written % self.checkpoint_every == 0:
+                        sink.flush()
+                    else:
+                        continue
+                    self._checkpoint(vod_id, file_name, save_to, STATUS_PARTIAL, base_count + written,
+                                     file_path, record)
+        except Exception as e:
+            if self.manifest:
+                # Only what the last checkpoint flushed is known to be on disk.
+                self.manifest.update(vod_id, status=STATUS_FAILED, error=str(e))
+            raise
+
+        total = base_count + written
+        if self.manifest:
+            self._checkpoint(vod_id, file_name, save_to, STATUS_COMPLETE, total, file_path, record,
+                             last_offset, last_id)
+        target = self._chat_store().path if to_store else file_path
+        print(f"{save_to.upper()} chat log saved to: {target} ({total} messages)")
+        return total
+
+    def _checkpoint(self, vod_id, file_name, save_to, status, count, file_path, record,
+                    last_offset=None, last_id=None):
+        """Record progress for a VOD in the manifest"""
+        self.manifest.update(
+            vod_id,
+            status=status,
+            file_name=file_name,
+            save_to=save_to,
+            message_count=count,
+            bytes=file_path.stat().st_size if file_path.exists() else 0,
+            last_offset=record["vod_time_s"] if record else last_offset,
+            last_message_id=record["id"] if record else last_id,
+            error=None,
+        )
+
+    @staticmethod
+    def _skip_saved(records, last_offset, last_id):
+        """Drop messages at the resume offset up to and including the last one already saved."""
+        skipping = True
+        for record in records:
+            if skipping:
+                t = record["vod_time_s"]
+                if t is not None and t < last_offset:
+                    continue
+                if t == last_offset:
+                    if record["id"] == last_id:
+                        skipping = False
+                    continue
+                skipping = False
+            yield record
+
+    def stream_multiple_vods(self, vod_ids: list, file_prefix: str, save_to: str = 'json',
+                             workers: int = 1, progress_every: int = 0, channel: str = None) -> dict:
+        """
+        Stream chat for many VODs into <file_prefix>_<vod_id>.<save_to>, up to `workers` at a time.
+        With save_to='sqlite' they go into the chat store, tagged with `channel`.
+
+        A failing VOD is reported and skipped; the rest of the batch carries on.
+        Returns {"saved": {vod_id: message_count}, "failed": {vod_id: error}}.
+        """
+        if save_to not in SAVE_FORMATS:
+            raise ValueError("Invalid save_to value. Must be 'csv', 'json', 'jsonl', 'parquet', 'sqlite' or 'chatz'.")
+
+        saved, failed = {}, {}
+        total = len(vod_ids)
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="vod") as pool:
+            futures = {
+                pool.submit(self.stream_chat_to_file, vod_id, f"{file_prefix}_{vod_id}.{save_to}",
+                            save_to, progress_every, channel): vod_id
+                for vod_id in vod_ids
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                vod_id = futures[future]
+                try:
+                    saved[vod_id] = future.result()
+                    print(f"[{done}/{total}] VOD {vod_id}: {saved[vod_id]} messages")
+                except Exception as e:
+                    failed[vod_id] = e
+                    print(f"[{done}/{total}] VOD {vod_id} failed: {e}")
+
+        print(f"Saved {len(saved)}/{total} VODs in {time.monotonic() - started:.1f}s "
+              f"({len(failed)} failed, {workers} workers)")
+        return {"saved": saved, "failed": failed}
+
     def _extract_message(self, msg):
         """Extract relevant fields from a chat message."""
         badges = msg.get("author", {}).get("badges", [])
@@ -54,12 +250,8 @@ class TwitchVODChatLogger:
             return
 
         file_path = self.output_dir / file_name
-        headers = list(self.chat_data[0].keys())
-
-        with open(file_path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=headers)
-            writer.writeheader()
-            writer.writerows(self.chat_data)
+        with CsvSink(file_path, fieldnames=list(self.chat_data[0].keys())) as sink:
+            sink.write_many(self.chat_data)
 
         print(f"CSV chat log saved to: {file_path}")
 
@@ -70,16 +262,67 @@ class TwitchVODChatLogger:
             json.dump(self.chat_data, f, indent=2, ensure_ascii=False)
         print(f"JSON chat log saved to: {file_path}")
 
-    def run_download_vod(self, vod_url_or_id, file_name: str = "vod_chat.csv", save_to='csv'):
-        self.fetch_chat(vod_url_or_id=vod_url_or_id)
-        print(f"Fetching chat for VOD: {self.vod_url_or_id}")
+    def save_parquet(self, file_name: str = "vod_chat.parquet", row_group_size: int = 50_000):
+        """Save chat data to a Parquet file (typed schema, dictionary-encoded low-cardinality columns)."""
+        if not self.chat_data:
+            print("No chat data available. Did you call fetch_chat()?")
+            return
+
+        file_path = self.output_dir / file_name
+        with ParquetSink(file_path, row_group_size=row_group_size) as sink:
+            sink.write_many(self.chat_data)
+        print(f"Parquet chat log saved to: {file_path}")
+
+    def save_jsonl(self, file_name: str = "vod_chat.jsonl"):
+        """Save chat data to a JSON Lines file."""
+        file_path = self.output_dir / file_name
+        with open_sink(file_path, 'jsonl') as sink:
+            sink.write_many(self.chat_data)
+        print(f"JSONL chat log saved to: {file_path}")
+
+    def save_chatz(self, file_name: str = "vod_chat.chatz", level: int = 9):
+        """Save chat data to a zstd-compressed archive that can be read back by vod_time_s range."""
+        if not self.chat_data:
+            print("No chat data available. Did you call fetch_chat()?")
+            return
+
+        file_path = self.output_dir / file_name
+        with open_sink(file_path, 'chatz', level=level) as sink:
+            sink.write_many(self.chat_data)
+        print(f"CHATZ chat log saved to: {file_path}")
+
+    def save_sqlite(self, file_name: str = None, channel: str = None):
+        """Store chat data in the chat store under the fetched VOD's ID (replacing what it had)."""
+        if not self.chat_data:
+            print("No chat data available. Did you call fetch_chat()?")
+            return
+        store = self._chat_store()
+        vod_id = self.vod_id(self.vod_url_or_id)
+        store.delete_vod(vod_id)
+        store.insert_vod_messages(vod_id, self.chat_data, channel=channel)
+        print(f"SQLITE chat log saved to: {store.path} (VOD {vod_id})")
+
+    def save(self, file_name: str, save_to: str = 'csv'):
+        """Save chat data in the requested format ('csv', 'json', 'jsonl', 'parquet', 'sqlite' or 'chatz')."""
         if save_to == 'csv':
             self.save_csv(file_name=file_name)
-            print("Downloading to CSV...")
-        
         elif save_to == 'json':
             self.save_json(file_name=file_name)
-            print("Downloading to JSON...")
-        
+        elif save_to == 'jsonl':
+            self.save_jsonl(file_name=file_name)
+        elif save_to == 'parquet':
+            self.save_parquet(file_name=file_name)
+        elif save_to == 'sqlite':
+            self.save_sqlite(file_name=file_name)
+        elif save_to == 'chatz':
+            self.save_chatz(file_name=file_name)
         else:
-            raise ValueError("Invalid save_to value. Must be 'csv' or 'json'.")
\ No newline at end of file
+            raise ValueError("Invalid save_to value. Must be 'csv', 'json', 'jsonl', 'parquet', 'sqlite' or 'chatz'.")
+
+    def run_download_vod(self, vod_url_or_id, file_name: str = "vod_chat.csv", save_to='csv'):
+        if save_to not in SAVE_FORMATS:
+            raise ValueError("Invalid save_to value. Must be 'csv', 'json', 'jsonl', 'parquet', 'sqlite' or 'chatz'.")
+        self.vod_url_or_id = self.vod_url(vod_url_or_id)
+        print(f"Fetching chat for VOD: {self.vod_url_or_id}")
+        print(f"Downloading to {save_to.upper()}...")
+        self.stream_chat_to_file(self.vod_url_or_id, file_name=file_name, save_to=save_to)
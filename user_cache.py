@@ -0,0 +1,116 @@
+# user_cache.py
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+
+class UserCache:
+    """
+    TTL + LRU cache of Helix user objects, keyed by lowercase login and by id.
+
+    Entries live in memory (at most `max_size`, least recently used evicted
+    first) and expire after `ttl` seconds. With `path`, entries are also kept
+    in a SQLite file so later runs can skip lookups that are still fresh.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 24 * 3600, path=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, user)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self._conn = None
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(path), check_same_thread=False)
+            with self._lock, self._conn:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS users (
+                        key TEXT PRIMARY KEY,
+                        user TEXT NOT NULL,
+                        expires_at REAL NOT NULL
+                    )""")
+
+    @staticmethod
+    def login_key(login: str) -> str:
+        return "login:" + login.lower()
+
+    @staticmethod
+    def id_key(user_id) -> str:
+        return f"id:{user_id}"
+
+    def _remember(self, key: str, expires_at: float, user: dict) -> None:
+        self._entries[key] = (expires_at, user)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, dict]:
+        """Fresh cached users for the given keys; missing or expired keys are left out."""
+        keys = list(keys)
+        now = time.time()
+        found, missing = {}, []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    found[key] = entry[1]
+                else:
+                    missing.append(key)
+
+            if missing and self._conn is not None:
+                for i in range(0, len(missing), 500):
+                    chunk = missing[i:i + 500]
+                    rows = self._conn.execute(
+                        f"SELECT key, user, expires_at FROM users WHERE expires_at > ? "
+                        f"AND key IN ({', '.join('?' for _ in chunk)})", (now, *chunk)).fetchall()
+                    for key, user, expires_at in rows:
+                        user = json.loads(user)
+                        self._remember(key, expires_at, user)
+                        found[key] = user
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key: str) -> Optional[dict]:
+        return self.get_many([key]).get(key)
+
+    def put_many(self, users: Iterable[dict]) -> None:
+        """Cache user objects under both their login and id."""
+        expires_at = time.time() + self.ttl
+        rows = []
+        with self._lock:
+            for user in users:
+                for key in (self.login_key(user["login"]), self.id_key(user["id"])):
+                    self._remember(key, expires_at, user)
+                    rows.append((key, json.dumps(user), expires_at))
+            if rows and self._conn is not None:
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO users (key, user, expires_at) VALUES (?, ?, ?)", rows)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute("DELETE FROM users")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+                self._conn = None
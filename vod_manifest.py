@@ -0,0 +1,127 @@
+# vod_manifest.py
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+STATUS_PENDING = "pending"
+STATUS_PARTIAL = "partial"
+STATUS_COMPLETE = "complete"
+STATUS_FAILED = "failed"
+
+
+def entry_complete(entry, save_to=None, file_name=None, directory=None) -> bool:
+    """
+    True if a manifest row finished exporting, in `save_to` format to `file_name`
+    when those are given. With the output `directory`, the file must still be
+    there too (chat store exports, save_to='sqlite', have no file to check).
+    """
+    if not entry or entry["status"] != STATUS_COMPLETE:
+        return False
+    if (save_to is not None and entry["save_to"] != save_to) or \
+            (file_name is not None and entry["file_name"] != file_name):
+        return False
+    if directory is not None and entry["save_to"] != "sqlite":
+        return bool(entry["file_name"]) and (Path(directory) / entry["file_name"]).exists()
+    return True
+
+
+class VODManifest:
+    """
+    SQLite record of every VOD a backfill has seen.
+
+    One row per VOD with its status (pending, partial, complete, failed), the
+    file it was written to, message count, byte size and the `vod_time_s` /
+    message id of the last message safely on disk, so reruns can skip finished
+    VODs and resume partial ones. A VOD only counts as finished for the format
+    and file it was exported to. Safe to share between download threads.
+    """
+
+    def __init__(self, path="chat_logs/manifest.sqlite3"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS vods (
+                    vod_id TEXT PRIMARY KEY,
+                    user_id TEXT,
+                    status TEXT NOT NULL,
+                    file_name TEXT,
+                    save_to TEXT,
+                    message_count INTEGER NOT NULL DEFAULT 0,
+                    bytes INTEGER NOT NULL DEFAULT 0,
+                    last_offset REAL,
+                    last_message_id TEXT,
+                    error TEXT,
+                    updated_at REAL NOT NULL
+                )""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS vods_user_status ON vods (user_id, status)")
+
+    def get(self, vod_id) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM vods WHERE vod_id = ?", (str(vod_id),)).fetchone()
+        return dict(row) if row else None
+
+    def update(self, vod_id, **fields):
+        """Insert or update a VOD's row with the given columns."""
+        fields["updated_at"] = time.time()
+        fields.setdefault("status", STATUS_PENDING)
+        columns = ", ".join(fields)
+        placeholders = ", ".join("?" for _ in fields)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in fields)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO vods (vod_id, {columns}) VALUES (?, {placeholders}) "
+                f"ON CONFLICT(vod_id) DO UPDATE SET {updates}",
+                (str(vod_id), *fields.values()))
+
+    def add_pending(self, user_id, vod_ids):
+        """Record newly listed VODs without touching ones already known."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO vods (vod_id, user_id, status, updated_at) VALUES (?, ?, ?, ?)",
+                [(str(v), str(user_id), STATUS_PENDING, now) for v in vod_ids])
+
+    def newest_vod_id(self, user_id) -> Optional[str]:
+        """Highest VOD ID ever listed for a user (Twitch VOD IDs increase over time)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vod_id FROM vods WHERE user_id = ? ORDER BY CAST(vod_id AS INTEGER) DESC LIMIT 1",
+                (str(user_id),)).fetchone()
+        return row["vod_id"] if row else None
+
+    def unfinished(self, user_id, save_to=None, directory=None) -> list:
+        """
+        VOD IDs for a user that are not complete, newest first. With `save_to`,
+        VODs completed in another format count as unfinished, and with `directory`
+        so do VODs whose exported file is gone.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM vods WHERE user_id = ? ORDER BY CAST(vod_id AS INTEGER) DESC",
+                (str(user_id),)).fetchall()
+        return [r["vod_id"] for r in rows if not entry_complete(r, save_to, directory=directory)]
+
+    def is_complete(self, vod_id, save_to=None, file_name=None, directory=None) -> bool:
+        return entry_complete(self.get(vod_id), save_to, file_name, directory)
+
+    def summary(self, user_id=None) -> dict:
+        """Count of VODs per status, optionally for one user."""
+        query = "SELECT status, COUNT(*) AS n FROM vods"
+        params = ()
+        if user_id is not None:
+            query += " WHERE user_id = ?"
+            params = (str(user_id),)
+        with self._lock:
+            rows = self._conn.execute(query + " GROUP BY status", params).fetchall()
+        return {r["status"]: r["n"] for r in rows}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()